@@ -0,0 +1,87 @@
+"""
+DSP mikro-benchmark: eski AudioRouter yolu (buffer başına astype/clip/
+astype/tobytes + rms_level) ile önceden ayrılmış MixDsp aşamasının buffer
+başına maliyetini ve bellek ayırma sayısını karşılaştırır.
+
+    python benchmarks/bench_dsp.py --people 6 --chunk 1024 --iters 2000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ebs_intercom_engine import MixDsp, rms_level  # noqa: E402
+
+
+def legacy_buffer(datas, gains):
+    """Eski yol: kişi başına ayrı gain/clip/int16/bytes + RMS."""
+    outs = []
+    for data, gain in zip(datas, gains):
+        audio_np = np.frombuffer(data, dtype=np.int16)
+        rms_level(audio_np)
+        f = audio_np.astype(np.float32) * gain
+        f = np.clip(f, -32768, 32767).astype(np.int16)
+        outs.append(f.tobytes())
+    return outs
+
+
+def make_dsp_buffer(n, chunk):
+    dsp = MixDsp(n, n, chunk)
+    weights = (np.ones((n, n), dtype=np.float32) - np.eye(n, dtype=np.float32)) * 1.2
+
+    def run(datas, gains):
+        for i, data in enumerate(datas):
+            dsp.load_input(i, data)
+        dsp.levels()
+        return dsp.mix(weights, weights)
+    return run
+
+
+def measure(fn, datas, gains, iters):
+    for _ in range(50):
+        fn(datas, gains)
+
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn(datas, gains)
+    per_buffer_us = (time.perf_counter() - t0) / iters * 1e6
+
+    # Buffer başına geçici (GC'ye giden) bellek tepe değeri
+    tracemalloc.start()
+    fn(datas, gains)
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn(datas, gains)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_buffer_us, peak - base
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--people", type=int, default=6)
+    ap.add_argument("--chunk", type=int, default=1024)
+    ap.add_argument("--iters", type=int, default=2000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    datas = [(rng.standard_normal(args.chunk) * 3000).astype(np.int16).tobytes()
+             for _ in range(args.people)]
+    gains = [1.2] * args.people
+
+    legacy_us, legacy_bytes = measure(legacy_buffer, datas, gains, args.iters)
+    dsp_us, dsp_bytes = measure(make_dsp_buffer(args.people, args.chunk), datas, gains, args.iters)
+
+    print(f"N={args.people} CHUNK={args.chunk}")
+    print(f"  eski yol : {legacy_us:8.1f} µs/buffer, {legacy_bytes:8d} B geçici bellek/buffer")
+    print(f"  MixDsp   : {dsp_us:8.1f} µs/buffer, {dsp_bytes:8d} B geçici bellek/buffer")
+    print(f"  hızlanma : x{legacy_us / dsp_us:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Routing motoru benchmark'ı: MixBus'ı SimBackend (olabildiğince hızlı mod)
+üzerinden kişi sayısı ve buffer boyutu ızgarasında çalıştırır; buffer
+başına işlem süresi yüzdelikleri, kişi başına CPU, 48 kHz'de deadline
+kaçırma sayısı ve bellek kullanımını JSON olarak verir.
+
+    python benchmarks/bench_engine.py --out bench.json
+    python benchmarks/bench_engine.py --people 3 6 --chunks 256 --buffers 500
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ebs_intercom_backend import SimBackend  # noqa: E402
+from ebs_intercom_engine import (  # noqa: E402
+    RATE, ControlState, LoopProfile, MixBus, RoutingMatrix,
+)
+
+# Koşu başına duvar saati sınırı: buffer bütçesinin bu katı + sabit pay.
+# Sim backend gerçek zamandan çok hızlıdır; aşılırsa motor takılmıştır.
+TIMEOUT_FACTOR = 4.0
+TIMEOUT_SLACK_S = 30.0
+
+
+class LoopSource:
+    """Önceden üretilmiş gürültüyü döngüyle veren ucuz kaynak (üretim maliyeti ölçüme girmesin)."""
+    def __init__(self, seed, seconds=1.0):
+        rng = np.random.default_rng(seed)
+        self.data = (rng.standard_normal(int(RATE * seconds)) * 3000).astype(np.int16)
+        self.pos = 0
+
+    def describe(self):
+        return "loop-noise"
+
+    def read(self, n):
+        if self.pos + n > len(self.data):
+            self.pos = 0
+        out = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return out
+
+
+def run_bus(n, chunk, buffers, mode, trace_memory=False):
+    """
+    MixBus'ı buffers kadar buffer çalıştırır; (profil süreleri, cpu, duvar,
+    heap tepe) döner. Süre sınırı aşılırsa ya da döngü hata verirse
+    RuntimeError.
+    """
+    backend = SimBackend(inputs=[LoopSource(k) for k in range(n)], outputs=n,
+                         rate=RATE, realtime=False, capture_seconds=0)
+    routing = RoutingMatrix(n)
+    routing.load(np.ones((n, n), dtype=np.float32))
+    controls = ControlState(n)
+    target = buffers if mode == "blocking" else buffers * n  # callback: cihaz başına kayıt
+    # Durdurma beklerken gelen kayıtlar için pay; halka sarmamalı (run_case
+    # callback kayıtlarını n'li gruplar hâlinde toplar)
+    profile = LoopProfile(target + 1024)
+    stop_event = threading.Event()
+
+    errors = []
+    bus = MixBus(backend, backend.input_ids, backend.output_ids, routing, controls,
+                 [None] * n, stop_event, mode=mode, chunk=chunk, profile=profile,
+                 on_error=lambda title, msg: errors.append(f"{title}: {msg}"))
+
+    if trace_memory:
+        tracemalloc.start()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    bus.start()
+    deadline = wall0 + buffers * chunk / RATE * TIMEOUT_FACTOR + TIMEOUT_SLACK_S
+    while profile.count < target and bus.is_alive() and not bus.loop_errors and not errors:
+        if time.perf_counter() > deadline:
+            errors.append(f"zaman aşımı: {profile.count}/{target} buffer")
+            break
+        time.sleep(0.005)
+    stop_event.set()
+    bus.join()
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    backend.terminate()
+    if bus.loop_errors:
+        errors.append(f"ses döngüsünde {bus.loop_errors} hata")
+    if profile.count > len(profile.times):
+        errors.append(f"profil halkası taştı: {profile.count}/{len(profile.times)} kayıt")
+    if errors:
+        raise RuntimeError(f"N={n} CHUNK={chunk} {mode}: " + "; ".join(errors))
+    return profile.values(), cpu, wall, peak
+
+
+def run_case(n, chunk, buffers, mode):
+    times, cpu, wall, _ = run_bus(n, chunk, buffers, mode)
+    # Bellek ayrı ve kısa bir koşuda (tracemalloc süreleri bozmasın)
+    _, _, _, peak = run_bus(n, chunk, min(buffers, 200), mode, trace_memory=True)
+
+    if mode == "callback":
+        # Aynı bloktaki cihaz callback'lerini topla -> buffer başına süre
+        usable = len(times) - len(times) % n
+        times = times[:usable].reshape(-1, n).sum(axis=1)
+    deadline = chunk / RATE
+    processed = len(times)
+    us = times * 1e6
+
+    return {
+        "people": n,
+        "chunk": chunk,
+        "mode": mode,
+        "buffers": int(processed),
+        "deadline_us": round(deadline * 1e6, 1),
+        "p50_us": round(float(np.percentile(us, 50)), 1),
+        "p90_us": round(float(np.percentile(us, 90)), 1),
+        "p99_us": round(float(np.percentile(us, 99)), 1),
+        "max_us": round(float(us.max()), 1),
+        "deadline_misses": int(np.count_nonzero(times > deadline)),
+        "cpu_us_per_person_buffer": round(cpu / max(processed, 1) / n * 1e6, 2),
+        # Gerçek zamanda çalışsaydı kişi başına tek çekirdek yükü (%)
+        "cpu_percent_per_person_realtime": round(cpu / (max(processed, 1) * deadline) / n * 100, 3),
+        "realtime_factor": round(processed * deadline / wall, 1),
+        "py_heap_peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--people", type=int, nargs="+", default=[3, 6, 12, 24, 48])
+    ap.add_argument("--chunks", type=int, nargs="+", default=[128, 256, 512, 1024])
+    ap.add_argument("--buffers", type=int, default=2000, help="durum başına buffer sayısı")
+    ap.add_argument("--mode", choices=["blocking", "callback"], default="blocking")
+    ap.add_argument("--out", help="JSON çıktı dosyası (verilmezse stdout)")
+    args = ap.parse_args()
+    if any(n < 1 for n in args.people):
+        ap.error("--people en az 1 olmalı")
+
+    results = []
+    for n in args.people:
+        for chunk in args.chunks:
+            try:
+                r = run_case(n, chunk, args.buffers, args.mode)
+            except RuntimeError as e:
+                print(f"[Benchmark HATASI] {e}", file=sys.stderr)
+                sys.exit(1)
+            results.append(r)
+            print(f"N={n:<3} CHUNK={chunk:<5} p50={r['p50_us']:>8.1f}µs p99={r['p99_us']:>8.1f}µs "
+                  f"miss={r['deadline_misses']:<4} cpu/kişi={r['cpu_percent_per_person_realtime']:.3f}%",
+                  file=sys.stderr)
+
+    report = {
+        "benchmark": "ebs_intercom_engine",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "rate": RATE,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
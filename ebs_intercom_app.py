@@ -1,212 +1,27 @@
 import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox, simpledialog
 import numpy as np
-import pyaudio
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 
-RATE = 48000
-CHUNK = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-
-
-
-
-def rms_level(int16_audio: np.ndarray):
-    if int16_audio.size == 0:
-        return 0.0
-    rms = np.sqrt(np.mean(int16_audio.astype(np.float32) ** 2))
-    level = (rms / 32768.0) * 100.0
-    return float(np.clip(level, 0, 100))
-
-
-def is_real_input(dev):
-    name = dev["name"].lower()
-    if dev["maxInput"] < 1:
-        return False
-    bad_words = ["mapper", "mix", "virtual", "wave", "stereo", "default"]
-    if any(bad in name for bad in bad_words):
-        return False
-    return True
-
-
-def is_real_output(dev):
-    name = dev["name"].lower()
-    if dev["maxOutput"] < 1:
-        return False
-    bad_words = ["mapper", "mix", "virtual", "wave", "stereo", "default"]
-    if any(bad in name for bad in bad_words):
-        return False
-    return True
-
-
-class AudioRouter(threading.Thread):
-    """
-    Bir kişinin mikrofonunu okur, Gain/Mute/PTT uygular,
-    routing matrisine göre diğer çıkışlara yollar.
-    """
-    def __init__(self, p, mic_id, out_ids_by_person,
-                 routing_getter, routing_lock,
-                 gain_var, mute_var, ptt_enabled_var, ptt_pressed_var,
-                 vu_callback, stop_event, self_index):
-        super().__init__(daemon=True)
-        self.p = p
-        self.mic_id = mic_id
-        self.out_ids_by_person = out_ids_by_person  # list length N
-        self.routing_getter = routing_getter        # callable(i)->list[bool]
-        self.routing_lock = routing_lock
-        self.gain_var = gain_var
-        self.mute_var = mute_var
-        self.ptt_enabled_var = ptt_enabled_var
-        self.ptt_pressed_var = ptt_pressed_var
-        self.vu_callback = vu_callback
-        self.stop_event = stop_event
-        self.self_index = self_index
-
-        self.mic_stream = None
-        self.out_streams = {}  # person_index -> stream
-
-    def open_streams(self):
-        self.mic_stream = self.p.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK,
-            input_device_index=self.mic_id
-        )
-
-        # Kendi hariç tüm kişilerin output stream'ini aç
-        for j, oid in enumerate(self.out_ids_by_person):
-            if j == self.self_index:
-                continue
-            s = self.p.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                output=True,
-                frames_per_buffer=CHUNK,
-                output_device_index=oid
-            )
-            self.out_streams[j] = s
-
-    def close_streams(self):
-        try:
-            if self.mic_stream:
-                self.mic_stream.stop_stream()
-                self.mic_stream.close()
-        except:
-            pass
-
-        for s in self.out_streams.values():
-            try:
-                s.stop_stream()
-                s.close()
-            except:
-                pass
-
-        self.out_streams = {}
+from ebs_intercom_backend import PyAudioBackend
+from ebs_intercom_devices import DeviceRegistry
+from ebs_intercom_engine import (
+    CHUNK, RATE, LATENCY_PROFILES, MAX_PEOPLE,
+    endpoint, measure_loopback_latency, capture_scene, recall_scene,
+    RoutingMatrix, ControlState, MixBus,
+)
+from ebs_intercom_matrix_view import GLOW_LOCK, GLOW_OFF, GLOW_ON, MatrixCanvas
+from ebs_intercom_presets import PRESET_FADE_MS, PresetLibrary
+from ebs_intercom_process import EngineProcess, SharedPlane
+from ebs_intercom_scenes import SceneStore
+from ebs_intercom_vu import VuMeterBank
 
-    def run(self):
-        import time
-    
-        try:
-            self.open_streams()
-        except Exception as e:
-            messagebox.showerror("Audio Stream Hatası", str(e))
-            self.stop_event.set()
-            return
-    
-        # -----------------------------------------
-        # 🔥 Reset ve VU limit zamanlayıcıları
-        # -----------------------------------------
-        self.last_reset = time.time()
-        self.last_vu_update = 0
-    
-        while not self.stop_event.is_set():
-            try:
-                # ==========================================================
-                # 🔥 1) Her 300 saniyede (5 dakika) stream RESETLE
-                # ==========================================================
-                if time.time() - self.last_reset > 300:
-                    try:
-                        print("[INFO] Audio stream resetleniyor...")
-                        self.close_streams()
-                        self.open_streams()
-                    except Exception as e:
-                        print("[Reset HATASI]:", e)
-    
-                    self.last_reset = time.time()
-    
-                # ==========================================================
-                # 🔥 2) Mikrofondan veri oku
-                # ==========================================================
-                data = self.mic_stream.read(CHUNK, exception_on_overflow=False)
-                audio_np = np.frombuffer(data, dtype=np.int16)
-    
-                # ==========================================================
-                # 🔥 3) VU Meter: 50ms'den hızlı güncellemeyi engelle
-                # ==========================================================
-                now = time.time()
-                if self.vu_callback and (now - self.last_vu_update) > 0.05:
-                    lvl = rms_level(audio_np)
-                    self.vu_callback(lvl)
-                    self.last_vu_update = now
-    
-                # ==========================================================
-                # 🔥 4) Mute veya PTT kapalıysa sesi tamamen kes
-                # ==========================================================
-                if self.mute_var.get():
-                    continue
-    
-                if self.ptt_enabled_var.get() and not self.ptt_pressed_var.get():
-                    continue
-    
-                # ==========================================================
-                # 🔥 5) Gain uygula
-                # ==========================================================
-                gain = float(self.gain_var.get())
-                if gain != 1.0:
-                    f = audio_np.astype(np.float32) * gain
-                    f = np.clip(f, -32768, 32767).astype(np.int16)
-                    out_data = f.tobytes()
-                else:
-                    out_data = data
-    
-                # ==========================================================
-                # 🔥 6) Routing tablosunu güvenli şekilde al
-                # ==========================================================
-                with self.routing_lock:
-                    row = self.routing_getter(self.self_index)
-    
-                # ==========================================================
-                # 🔥 7) Sesi gerekli kişilere yaz (route et)
-                # ==========================================================
-                for j, s in self.out_streams.items():
-                    if row[j]:
-                        try:
-                            s.write(out_data)
-                        except Exception as e:
-                            print("[Write HATASI]:", e)
-                            continue
-    
-            except Exception as e:
-                print("[Thread HATASI]:", e)
-                time.sleep(0.05)
-                continue
-    
-        # ==========================================================
-        # 🔥 8) Stop etkin → tüm streamleri kapat
-        # ==========================================================
-        self.close_streams()
+PANELS_PER_ROW = 6
+MIN_PEOPLE = 2
+SCENES_DIR = "sahneler"
 
-def fix_turkish(text):
-    try:
-        return text.encode("latin1").decode("utf-8")
-    except:
-        return text
 
 class IntercomApp:
     def __init__(self, root):
@@ -219,14 +34,49 @@ class IntercomApp:
            "Teknik Yayın Modu": "presets/teknik_yayin.json"
         }
         self.selected_preset = tk.StringVar(value="EBS Default Modu")
+        # Tüm preset'ler bir kez derlenir; dosya değişince (mtime) yeniden
+        self.preset_library = PresetLibrary(self.presets)
+        for label, issues in self.preset_library.issues().items():
+            for issue in issues:
+                print(f"[Preset UYARISI] {label}: {issue}")
+
+        # Sahneler açılışta önbelleğe alınır: çağırırken disk okunmaz
+        self.scene_store = SceneStore(SCENES_DIR)
+        self.scene_store.preload()
+        self.selected_scene = tk.StringVar(value="")
+        self._applying_scene = False
+
+        self.engine_modes = {
+           "Klasik (Blocking)": "blocking",
+           "Düşük Gecikme (Callback)": "callback"
+        }
+        self.selected_engine_mode = tk.StringVar(value="Klasik (Blocking)")
+        # Motor ayrı süreçte: GUI işi (animasyon, çizim) ses yoluyla GIL paylaşmaz
+        self.isolated_engine = tk.BooleanVar(value=True)
+        self.selected_latency = tk.StringVar(value="Güvenli (1024)")
+        # Ayrı kristalli cihazların saat kayması telafisi; telafi edilen
+        # cihaz 1.5-3 buffer ek gecikme taşıdığından varsayılan kapalı
+        self.drift_compensation = tk.BooleanVar(value=False)
+
+        # Öncelikli kişi (Reji) konuşurken diğer kaynakların kısılma miktarı
+        self.duck_depths = {
+           "-6 dB": -6.0,
+           "-10 dB": -10.0,
+           "-15 dB": -15.0,
+           "-20 dB": -20.0,
+           "Tam Kıs (-60 dB)": -60.0
+        }
+        self.selected_duck_depth = tk.StringVar(value="-15 dB")
 
         self.root = root
         self.root.title("Çok Kişilik Interkom - Mixer Routing")
         self.root.geometry("1200x760")
         self.root.resizable(True, True)
 
-        self.p = pyaudio.PyAudio()
-        self.devices = self.get_devices()
+        self.p = PyAudioBackend()
+        # Önbellekli cihaz listesi; takılan/çıkarılan cihazlar arka planda izlenir
+        self.registry = DeviceRegistry(self.p)
+        self._names_cache = (None, [], [])
 
         self.stop_event = threading.Event()
         self.routers = []
@@ -234,18 +84,32 @@ class IntercomApp:
 
         self.person_count_var = tk.IntVar(value=3)
         self.person_panels = []
+        self.controls = ControlState(0)
+
+        # routing matrix (NxN float32), kilitsiz okunur
+        self.routing = RoutingMatrix(0)
 
-        # routing matrix (python bool), lock ile korunur
-        self.routing_lock = threading.Lock()
-        self.routing = []  # NxN bool
+        # Ses thread'i (ya da motor süreci) seviyeleri buraya yazar; tek GUI
+        # zamanlayıcısı okur. Dizi paylaşılan bellekte: iki modda da aynı
+        self.plane = SharedPlane.create()
+        self.vu_levels = self.plane.levels
 
         self.build_ui()
         self.build_person_panels()
         self.init_routing_matrix()
-    # ---------- Mixer UI Helpers (LED / Fade / Hover) ----------
-    def _hex_to_rgb(self, hx):
-        hx = hx.lstrip("#")
-        return tuple(int(hx[i:i+2], 16) for i in (0, 2, 4))
+
+        self.vu_bank = VuMeterBank(
+            self.root, self.vu_levels,
+            lambda: [(p["vu_bar"], p["peak_label"]) for p in self.person_panels]
+        )
+        self.vu_bank.start()
+
+        # Yayın sürerken tam tarama yapılmaz; gerekirse 🔄 Cihazları Yenile
+        self.registry.start_watch(
+            on_change=lambda added, removed: self.root.after(0, self.on_devices_changed, added, removed),
+            paused=lambda: self.running
+        )
+
     def center_window(self, win, w=None, h=None):
         win.update_idletasks()
         
@@ -265,131 +129,37 @@ class IntercomApp:
     
         win.geometry(f"{w}x{h}+{x}+{y}")
 
-    def _rgb_to_hex(self, rgb):
-        return "#%02x%02x%02x" % rgb
-
-    def _blend(self, c1, c2, t):
-        r1, g1, b1 = self._hex_to_rgb(c1)
-        r2, g2, b2 = self._hex_to_rgb(c2)
-        r = int(r1 + (r2 - r1) * t)
-        g = int(g1 + (g2 - g1) * t)
-        b = int(b1 + (b2 - b1) * t)
-        return self._rgb_to_hex((r, g, b))
-
-    def _fade_circle(self, canvas, circle_id, start_color, end_color, steps=8, delay=18):
-        # Basit fade (renk geçişi)
-        def step(k=0):
-            if k > steps:
-                return
-            color = self._blend(start_color, end_color, k / steps)
-            canvas.itemconfig(circle_id, fill=color, outline=color)
-            canvas.after(delay, lambda: step(k+1))
-        step()
-
-    def _click_pulse(self, canvas, circle_id, base_color):
-        # Kısa tıklama animasyonu: parlayıp normale dönsün
-        bright = self._blend(base_color, "#ffffff", 0.35)
-        self._fade_circle(canvas, circle_id, base_color, bright, steps=4, delay=12)
-        canvas.after(80, lambda: self._fade_circle(canvas, circle_id, bright, base_color, steps=5, delay=14))
-
-    def _set_led_state(self, cell, state):
-        """
-        state: "on" | "off" | "lock"
-        cell: {"cv":canvas,"circle":id,"text":id,"label":id}
-        """
-        if state == "lock":
-            color = "#555555"
-            emoji = "⚪"
-        elif state == "on":
-            color = "#1fa64b"   # LED yeşil
-            emoji = "🟢"
-        else:
-            color = "#c0392b"   # LED kırmızı
-            emoji = "🔴"
-
-        cv = cell["cv"]
-        circle_id = cell["circle"]
-        text_id = cell["text"]
-
-        current = cv.itemcget(circle_id, "fill") or color
-        self._fade_circle(cv, circle_id, current, color, steps=7, delay=16)
-        cv.itemconfig(text_id, text=emoji)
-        cell["color"] = color
-        cell["state"] = state
-
-
-    
     # ---------------- Devices ----------------
-    def get_devices(self):
-        devs = []
-        for i in range(self.p.get_device_count()):
-            info = self.p.get_device_info_by_index(i)
-            
-            fixed_name = fix_turkish(info["name"])
-            
-            devs.append({
-                "id": i,
-                "name": fixed_name,
-                "maxInput": info.get("maxInputChannels", 0),
-                "maxOutput": info.get("maxOutputChannels", 0)
-            })
-        return devs
-    
+    @property
+    def devices(self):
+        return self.registry.devices
+
     def list_inputs(self):
-        # Aramak istediğin isim keyword'leri
-        role_keywords = ["moderatör", "reji", "konuk1", "konuk2", "konuk3"]
-    
-        found = []           # Sonuç listesi
-        used_roles = set()   # Hangi role ait cihaz alındı?
-    
-        for d in self.devices:
-            if not is_real_input(d):
-                continue
-    
-            name_low = d["name"].lower()
-    
-            for role in role_keywords:
-                if role in name_low and role not in used_roles:
-                    found.append(d)      # sadece ilk bulunanı ekle
-                    used_roles.add(role) # o role için başka ekleme yapılmayacak
-                    break
-    
-        return found
+        # Rol anahtar kelimeleri (moderatör, reji, konuk1..3) ve çok kanallı
+        # arabirimler; kayıt tarama başına bir kez hesaplar
+        return self.registry.inputs()
 
     def list_outputs(self):
-        role_keywords = ["moderatör", "reji", "konuk1", "konuk2", "konuk3"]
-    
-        found = []
-        used_roles = set()
-    
-        for d in self.devices:
-            if not is_real_output(d):
-                continue
-    
-            name_low = d["name"].lower()
-    
-            for role in role_keywords:
-                if role in name_low and role not in used_roles:
-                    found.append(d)
-                    used_roles.add(role)
-                    break
-    
-        return found
+        return self.registry.outputs()
 
-    def load_routing_preset(self):
-        import json
-        preset_path = self.presets.get(self.selected_preset.get(), "")
-        try:
-            with open(preset_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print("Routing preset yüklenemedi:", e)
-            return {}
+    def current_preset(self):
+        """Seçili preset (derlenmiş, önbellekten)."""
+        return self.preset_library.get(self.selected_preset.get())
     
      
 
     def parse_id(self, s):
-        return int(s.split(" - ")[0].strip())
+        """"3 - isim" -> (3, None), "3:2 - isim" -> (3, 1)."""
+        return endpoint(s.split(" - ")[0].strip())
+
+    def endpoint_label(self, ep):
+        """(3, None) -> "3 - isim", (3, 1) -> "3:2 - isim (Kanal 2)" (endpoint_names biçimi)."""
+        dev_id, ch = ep
+        d = self.registry.get(dev_id)
+        name = d["name"] if d else "?"
+        if ch is None:
+            return f"{dev_id} - {name}"
+        return f"{dev_id}:{ch + 1} - {name} (Kanal {ch + 1})"
 
     # ---------------- UI ----------------
     def build_ui(self):
@@ -409,7 +179,7 @@ class IntercomApp:
 
         count_cb = tb.Combobox(
             topbar, width=6, state="readonly",
-            values=[3, 4, 5, 6],
+            values=list(range(MIN_PEOPLE, MAX_PEOPLE + 1)),
             textvariable=self.person_count_var
         )
         count_cb.pack(side=LEFT)
@@ -420,13 +190,37 @@ class IntercomApp:
             bootstyle="info", command=self.open_mixer
         ).pack(side=LEFT, padx=8)
 
+        tb.Button(
+            topbar, text="🩺 Stream Sağlığı",
+            bootstyle="secondary-outline", command=self.open_health
+        ).pack(side=LEFT, padx=(0, 8))
+
+        tb.Button(
+            topbar, text="📈 Ölçüm",
+            bootstyle="secondary-outline", command=self.open_meters
+        ).pack(side=LEFT, padx=(0, 8))
+
         tb.Button(
             topbar, text="🔄 Cihazları Yenile",
             bootstyle="secondary", command=self.refresh_devices
         ).pack(side=RIGHT)
 
-        self.grid_holder = tb.Frame(main)
-        self.grid_holder.pack(fill=BOTH, expand=True)
+        # 6'dan fazla kişi satırlara sarılır; kartlar dikey kaydırılabilir
+        holder = tb.Frame(main)
+        holder.pack(fill=BOTH, expand=True)
+        scroll_cv = tk.Canvas(holder, highlightthickness=0, bg="#222222")
+        scroll_bar = tb.Scrollbar(holder, orient=VERTICAL, command=scroll_cv.yview)
+        scroll_cv.configure(yscrollcommand=scroll_bar.set)
+        scroll_bar.pack(side=RIGHT, fill=Y)
+        scroll_cv.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.grid_holder = tb.Frame(scroll_cv)
+        inner = scroll_cv.create_window(0, 0, window=self.grid_holder, anchor="nw")
+        self.grid_holder.bind(
+            "<Configure>",
+            lambda e: scroll_cv.configure(scrollregion=scroll_cv.bbox("all"))
+        )
+        scroll_cv.bind("<Configure>", lambda e: scroll_cv.itemconfig(inner, width=e.width))
 
         controls = tb.Frame(main)
         controls.pack(fill=X, pady=8)
@@ -444,6 +238,36 @@ class IntercomApp:
         )
         self.stop_btn.pack(side=LEFT, padx=5)
 
+        tb.Button(
+            controls, text="⏱ Gecikme Ölç",
+            bootstyle="secondary-outline", command=self.measure_latency
+        ).pack(side=LEFT, padx=5)
+
+        self.record_btn = tb.Button(
+            controls, text="⏺ Kayıt",
+            bootstyle="danger-outline", command=self.toggle_recording,
+            width=10, state=DISABLED
+        )
+        self.record_btn.pack(side=LEFT, padx=5)
+
+        tb.Label(controls, text="Sahne:", font=("Segoe UI", 11, "bold")).pack(side=LEFT, padx=(20, 6))
+        self.scene_cb = tb.Combobox(
+            controls, width=18, state="readonly",
+            values=self.scene_store.names(),
+            textvariable=self.selected_scene
+        )
+        self.scene_cb.pack(side=LEFT)
+
+        tb.Button(
+            controls, text="💾 Sahne Kaydet",
+            bootstyle="secondary-outline", command=self.save_scene
+        ).pack(side=LEFT, padx=5)
+
+        tb.Button(
+            controls, text="▶ Sahneyi Çağır",
+            bootstyle="info-outline", command=self.recall_selected_scene
+        ).pack(side=LEFT, padx=5)
+
         hint = (
             "• Her kişi için farklı mikrofon ve farklı kulaklık/çıkış seç.\n"
             "• Varsayılan routing: herkes herkesi duyar, kimse kendini duymaz.\n"
@@ -462,142 +286,326 @@ class IntercomApp:
         preset_cb.pack(side=LEFT)
         
         preset_cb.bind("<<ComboboxSelected>>", lambda e: self.on_change_preset())
-        
+
+        tb.Label(topbar, text="Motor:", font=("Segoe UI", 11, "bold")).pack(side=LEFT, padx=(20, 6))
+
+        tb.Combobox(
+            topbar,
+            width=22,
+            state="readonly",
+            values=list(self.engine_modes.keys()),
+            textvariable=self.selected_engine_mode
+        ).pack(side=LEFT)
+
+        tb.Checkbutton(topbar, text="Ayrı Süreç", variable=self.isolated_engine,
+                       bootstyle="round-toggle").pack(side=LEFT, padx=(8, 0))
+
+        tb.Label(topbar, text="Buffer:", font=("Segoe UI", 11, "bold")).pack(side=LEFT, padx=(20, 6))
+
+        tb.Combobox(
+            topbar,
+            width=16,
+            state="readonly",
+            values=list(LATENCY_PROFILES.keys()),
+            textvariable=self.selected_latency
+        ).pack(side=LEFT)
+
+        tb.Checkbutton(topbar, text="Drift Telafisi", variable=self.drift_compensation,
+                       bootstyle="round-toggle").pack(side=LEFT, padx=(8, 0))
+
+        tb.Label(topbar, text="Ducking:", font=("Segoe UI", 11, "bold")).pack(side=LEFT, padx=(20, 6))
+
+        tb.Combobox(
+            topbar,
+            width=14,
+            state="readonly",
+            values=list(self.duck_depths.keys()),
+            textvariable=self.selected_duck_depth
+        ).pack(side=LEFT)
+
     def on_change_preset(self):
+        """
+        Preset'i uygular. Çalışırken ses yolu PRESET_FADE_MS içinde yeni
+        matrise geçer (dosya okunmaz, akış kesilmez, onay penceresi yok).
+        """
+        label = self.selected_preset.get()
+        preset = self.current_preset()
+        names = [p["name_var"].get() for p in self.person_panels]
+        issues = preset.check(names)
+
         if self.running:
-            messagebox.showinfo("Uyarı", "Preset değiştirmek için interkomu durdurun.")
-            return
-    
-        self.init_routing_matrix()
-        messagebox.showinfo("Preset Yüklendi", f"'{self.selected_preset.get()}' uygulanmıştır.")
+            self.routing.load(preset.matrix(names), fade_ms=PRESET_FADE_MS)
+            print(f"[INFO] Preset canlı uygulandı: {label}")
+        else:
+            self.init_routing_matrix()
+
+        if issues:
+            messagebox.showwarning("Preset Uyarısı", f"'{label}':\n• " + "\n• ".join(issues))
+        elif not self.running:
+            messagebox.showinfo("Preset Yüklendi", f"'{label}' uygulanmıştır.")
 
     def clear_person_panels(self):
         for w in self.grid_holder.winfo_children():
             w.destroy()
         self.person_panels = []
 
+    def device_names(self):
+        """Combobox listeleri; cihaz listesi değişmedikçe yeniden kurulmaz."""
+        version, in_names, out_names = self._names_cache
+        if version != self.registry.version:
+            in_names = self.endpoint_names(self.list_inputs(), "maxInput")
+            out_names = self.endpoint_names(self.list_outputs(), "maxOutput")
+            self._names_cache = (self.registry.version, in_names, out_names)
+        return in_names, out_names
+
+    def endpoint_names(self, devices, key):
+        """
+        Cihaz başına "id - isim"; çok kanallı arabirimlerde (2'den fazla
+        kanal) ayrıca kanal başına "id:kanal - isim (Kanal k)". Motor aynı
+        arabirimin kanallarını tek stream'de açar.
+        """
+        names = []
+        for d in devices:
+            names.append(f'{d["id"]} - {d["name"]}')
+            if d[key] > 2:
+                names += [f'{d["id"]}:{ch} - {d["name"]} (Kanal {ch})'
+                          for ch in range(1, d[key] + 1)]
+        return names
+
+    def default_name(self, idx):
+        default_names_base = ["Reji", "Moderatör", "Konuk", "Konuk1", "Konuk2", "Konuk3"]
+        if idx < len(default_names_base):
+            return default_names_base[idx]
+        return f"Konuk{idx - 2}"
+
     def build_person_panels(self):
         self.clear_person_panels()
 
         n = int(self.person_count_var.get())
-        inputs = self.list_inputs()
-        outputs = self.list_outputs()
-        in_names = [f'{d["id"]} - {d["name"]}' for d in inputs]
-        out_names = [f'{d["id"]} - {d["name"]}' for d in outputs]
-
-        default_names_base = ["Reji", "Moderatör", "Konuk", "Konuk1", "Konuk2", "Konuk3"]
-        default_names = default_names_base[:n]
+        in_names, out_names = self.device_names()
 
-        # grid sütunlarını eşitle
-        for c in range(n):
-            self.grid_holder.columnconfigure(c, weight=1)
+        self.controls = ControlState(n)
 
         for idx in range(n):
-            card = tb.Labelframe(self.grid_holder, text=f"Kişi {idx+1}", padding=10, bootstyle="primary")
-            card.grid(row=0, column=idx, padx=6, pady=6, sticky="nsew")
-
-            name_var = tk.StringVar(value=default_names[idx])
-            mic_var = tk.StringVar(value=in_names[0] if in_names else "")
-            out_var = tk.StringVar(value=out_names[0] if out_names else "")
-            gain_var = tk.DoubleVar(value=1.0)
-            mute_var = tk.BooleanVar(value=False)
-
-            # PTT default: son kişi (guest) kapalı olsun, diğerleri açık
-            ptt_enabled_var = tk.BooleanVar(value=False if idx == n-1 else True)
-            ptt_pressed_var = tk.BooleanVar(value=False)
-
-            tb.Label(card, text="👤 İsim/Rol:").pack(anchor="w")
-            tb.Entry(card, textvariable=name_var, width=24).pack(pady=(0, 6))
-
-            tb.Label(card, text="🎙 Mikrofon Seç:").pack(anchor="w")
-            tb.Combobox(card, values=in_names, textvariable=mic_var,
-                        width=24, state="readonly").pack(pady=(0, 6))
-
-            tb.Label(card, text="🔊 Kulaklık / Çıkış Seç:").pack(anchor="w")
-            tb.Combobox(card, values=out_names, textvariable=out_var,
-                        width=24, state="readonly").pack(pady=(0, 6))
-
-            tb.Label(card, text="VU Meter:").pack(anchor="w")
-            vu = tb.Progressbar(card, length=180, maximum=100, bootstyle="info-striped")
-            vu.pack(pady=(0, 6))
-
-            tb.Label(card, text="Gain:").pack(anchor="w")
-            tb.Scale(card, from_=0.2, to=2.5, variable=gain_var,
-                     length=180, bootstyle="info").pack(pady=(0, 2))
-            tb.Label(card, textvariable=gain_var).pack(anchor="e")
-
-            tb.Checkbutton(card, text="Mute", variable=mute_var,
-                           bootstyle="danger").pack(anchor="w", pady=(4, 2))
-
-            tb.Checkbutton(card, text="PTT Modu (Bas-Konuş)",
-                           variable=ptt_enabled_var,
-                           bootstyle="warning").pack(anchor="w", pady=(0, 4))
-
-            ptt_btn = tb.Button(card, text="🎤 BAS & KONUŞ",
-                                bootstyle="success-outline", width=18)
-            ptt_btn.pack(pady=(0, 4))
-
-            def on_press(ev, v=ptt_pressed_var):
-                v.set(True)
-
-            def on_release(ev, v=ptt_pressed_var):
-                v.set(False)
-
-            ptt_btn.bind("<ButtonPress-1>", on_press)
-            ptt_btn.bind("<ButtonRelease-1>", on_release)
-            ptt_btn.bind("<Leave>", on_release)
-
-            self.person_panels.append({
-                "name_var": name_var,
-                "mic_var": mic_var,
-                "out_var": out_var,
-                "gain_var": gain_var,
-                "mute_var": mute_var,
-                "ptt_enabled_var": ptt_enabled_var,
-                "ptt_pressed_var": ptt_pressed_var,
-                "vu_bar": vu,
-            })
+            # PTT default: son kişi (guest) kapalı olsun, diğerleri açık.
+            # Reji öncelikli: konuşunca diğerleri duck edilir
+            self.add_person_panel(
+                self.default_name(idx),
+                in_names[0] if in_names else "",
+                out_names[0] if out_names else "",
+                in_names, out_names,
+                ptt_enabled=idx != n - 1,
+                priority=idx == 0
+            )
+            self.publish_controls(idx)
+        self.regrid_person_panels()
+
+    def add_person_panel(self, name, mic, out, in_names, out_names, ptt_enabled=True, priority=False):
+        """Kişi kartını oluşturup listenin sonuna ekler (kontrolleri yayınlamaz)."""
+        idx = len(self.person_panels)
+        card = tb.Labelframe(self.grid_holder, text=f"Kişi {idx+1}", padding=10, bootstyle="primary")
+        card.grid(row=idx // PANELS_PER_ROW, column=idx % PANELS_PER_ROW,
+                  padx=6, pady=6, sticky="nsew")
+
+        name_var = tk.StringVar(value=name)
+        mic_var = tk.StringVar(value=mic)
+        out_var = tk.StringVar(value=out)
+        gain_var = tk.DoubleVar(value=1.0)
+        mute_var = tk.BooleanVar(value=False)
+        ptt_enabled_var = tk.BooleanVar(value=ptt_enabled)
+        ptt_pressed_var = tk.BooleanVar(value=False)
+        gate_var = tk.BooleanVar(value=False)
+        priority_var = tk.BooleanVar(value=priority)
+
+        panel = {
+            "card": card,
+            "name_var": name_var,
+            "mic_var": mic_var,
+            "out_var": out_var,
+            "gain_var": gain_var,
+            "mute_var": mute_var,
+            "ptt_enabled_var": ptt_enabled_var,
+            "ptt_pressed_var": ptt_pressed_var,
+            "gate_var": gate_var,
+            "priority_var": priority_var,
+        }
+
+        head = tb.Frame(card)
+        head.pack(fill=X)
+        tb.Label(head, text="👤 İsim/Rol:").pack(side=LEFT)
+        tb.Button(head, text="✖", bootstyle="danger-link", width=2,
+                  command=lambda: self.remove_person(panel)).pack(side=RIGHT)
+        tb.Entry(card, textvariable=name_var, width=24).pack(pady=(0, 6))
+
+        tb.Label(card, text="🎙 Mikrofon Seç:").pack(anchor="w")
+        mic_box = tb.Combobox(card, values=in_names, textvariable=mic_var,
+                              width=24, state="readonly")
+        mic_box.pack(pady=(0, 6))
+
+        tb.Label(card, text="🔊 Kulaklık / Çıkış Seç:").pack(anchor="w")
+        out_box = tb.Combobox(card, values=out_names, textvariable=out_var,
+                              width=24, state="readonly")
+        out_box.pack(pady=(0, 6))
+
+        # Çalışırken seçim değişirse yalnızca bu kişinin cihazı değişir
+        panel["mic_box"], panel["out_box"] = mic_box, out_box
+        panel["active"] = {"mic": mic, "out": out}
+        mic_box.bind("<<ComboboxSelected>>", lambda ev: self.on_device_selected(panel, "mic"))
+        out_box.bind("<<ComboboxSelected>>", lambda ev: self.on_device_selected(panel, "out"))
+
+        tb.Label(card, text="VU Meter:").pack(anchor="w")
+        vu = tb.Progressbar(card, length=180, maximum=100, bootstyle="info-striped")
+        vu.pack(pady=(0, 0))
+        panel["vu_bar"] = vu
+        peak = tb.Label(card, text="Peak 0", foreground="#bbbbbb", font=("Segoe UI", 8))
+        peak.pack(anchor="e", pady=(0, 4))
+        panel["peak_label"] = peak
+
+        tb.Label(card, text="Gain:").pack(anchor="w")
+        tb.Scale(card, from_=0.2, to=2.5, variable=gain_var,
+                 length=180, bootstyle="info").pack(pady=(0, 2))
+        tb.Label(card, textvariable=gain_var).pack(anchor="e")
+
+        tb.Checkbutton(card, text="Mute", variable=mute_var,
+                       bootstyle="danger").pack(anchor="w", pady=(4, 2))
+
+        tb.Checkbutton(card, text="PTT Modu (Bas-Konuş)",
+                       variable=ptt_enabled_var,
+                       bootstyle="warning").pack(anchor="w", pady=(0, 4))
+
+        tb.Checkbutton(card, text="Gürültü Kapısı (VAD)",
+                       variable=gate_var,
+                       bootstyle="info").pack(anchor="w", pady=(0, 4))
+
+        tb.Checkbutton(card, text="Öncelik (Diğerlerini Kıs)",
+                       variable=priority_var,
+                       bootstyle="danger").pack(anchor="w", pady=(0, 4))
+
+        ptt_btn = tb.Button(card, text="🎤 BAS & KONUŞ",
+                            bootstyle="success-outline", width=18)
+        ptt_btn.pack(pady=(0, 4))
+
+        def on_press(ev, v=ptt_pressed_var):
+            v.set(True)
+
+        def on_release(ev, v=ptt_pressed_var):
+            v.set(False)
+
+        ptt_btn.bind("<ButtonPress-1>", on_press)
+        ptt_btn.bind("<ButtonRelease-1>", on_release)
+        ptt_btn.bind("<Leave>", on_release)
+
+        self.person_panels.append(panel)
+
+        # Ses thread'leri Tk değişkenlerini okumaz: her değişiklik
+        # GUI thread'inde ControlState'e yayınlanır. Kişiler eklenip
+        # çıkarıldıkça sıra değiştiğinden indeks her seferinde bulunur.
+        for var in (gain_var, mute_var, ptt_enabled_var, ptt_pressed_var, gate_var, priority_var):
+            var.trace_add("write", lambda *_: self.publish_controls(self.person_panels.index(panel)))
+        return panel
+
+    def regrid_person_panels(self):
+        # grid sütunlarını eşitle (en fazla PANELS_PER_ROW sütun)
+        used = min(len(self.person_panels), PANELS_PER_ROW)
+        for c in range(PANELS_PER_ROW):
+            self.grid_holder.columnconfigure(c, weight=1 if c < used else 0)
+        for idx, panel in enumerate(self.person_panels):
+            panel["card"].configure(text=f"Kişi {idx+1}")
+            panel["card"].grid(row=idx // PANELS_PER_ROW, column=idx % PANELS_PER_ROW)
+        self.person_count_var.set(len(self.person_panels))
+
+    def add_person(self):
+        """
+        Sona yeni kişi ekler. Interkom çalışıyorsa yalnızca yeni kişinin
+        stream'leri açılır; diğer route'lar kesilmez.
+        """
+        n = len(self.person_panels)
+        if n >= MAX_PEOPLE:
+            messagebox.showinfo("Uyarı", f"En fazla {MAX_PEOPLE} kişi eklenebilir.")
+            return False
+
+        # Başkasının kullanmadığı ilk mikrofon/çıkış
+        in_names, out_names = self.device_names()
+        used_mics = {p["mic_var"].get() for p in self.person_panels}
+        used_outs = {p["out_var"].get() for p in self.person_panels}
+        mic = next((m for m in in_names if m not in used_mics), in_names[0] if in_names else "")
+        out = next((o for o in out_names if o not in used_outs), out_names[0] if out_names else "")
+
+        # Yeni kişinin routing satırı/sütunu preset'ten
+        name = self.default_name(n)
+        names = [p["name_var"].get() for p in self.person_panels] + [name]
+        full = self.current_preset().matrix(names)
+        sends, hears = full[n, :n], full[:n, n]
+
+        # Eklenen konuklar PTT kapalı başlar
+        panel = self.add_person_panel(name, mic, out, in_names, out_names, ptt_enabled=False)
+        if self.running and self.routers:
+            try:
+                self.routers[0].add_person(
+                    self.parse_id(mic), self.parse_id(out),
+                    sends=sends, hears=hears, ptt_enabled=False
+                )
+            except Exception as e:
+                self.person_panels.remove(panel)
+                panel["card"].destroy()
+                messagebox.showerror("Kişi Eklenemedi", str(e))
+                return False
+        else:
+            self.controls.add(ptt_enabled=False)
+            self.routing.add_person(sends, hears)
+
+        self.publish_controls(n)
+        self.regrid_person_panels()
+        return True
+
+    def remove_person(self, panel):
+        """Kişiyi çıkarır; çalışıyorsa yalnızca onun stream'leri kapanır."""
+        if len(self.person_panels) <= MIN_PEOPLE:
+            messagebox.showinfo("Uyarı", f"En az {MIN_PEOPLE} kişi olmalı.")
+            return False
+        i = self.person_panels.index(panel)
+        if self.running and self.routers:
+            self.routers[0].remove_person(i)
+        else:
+            self.routing.remove_person(i)
+            self.controls.remove(i)
+        self.person_panels.pop(i)
+        panel["card"].destroy()
+        self.regrid_person_panels()
+        return True
+
+    def publish_controls(self, i):
+        # Sahne çağrılırken kontroller zaten tek seferde yayınlandı
+        if self._applying_scene:
+            return
+        p = self.person_panels[i]
+        try:
+            gain = float(p["gain_var"].get())
+        except (tk.TclError, ValueError):
+            return
+        self.controls.publish(
+            i, gain,
+            p["mute_var"].get(),
+            p["ptt_enabled_var"].get(),
+            p["ptt_pressed_var"].get(),
+            p["gate_var"].get(),
+            p["priority_var"].get()
+        )
 
     # ---------------- Routing / Mixer ----------------
     def init_routing_matrix(self):
         n = int(self.person_count_var.get())
-    
-        # JSON preset'i yükle
-        routing_preset = self.load_routing_preset()
-    
-        # Kişi isimlerini al (Reji, Moderatör, Konuk...)
+
+        # Kişi isimlerini al (Reji, Moderatör, Konuk...) -> derlenmiş preset'ten matris
         names = [p["name_var"].get() for p in self.person_panels]
-    
-        with self.routing_lock:
-            self.routing = []
-    
-            for i in range(n):
-                row = []
-                speaker = names[i]  # konuşanın ismi
-    
-                for j in range(n):
-                    if i == j:
-                        row.append(False)
-                        continue
-    
-                    listener = names[j]
-    
-                    # JSON'da tanımlı mı?
-                    if speaker in routing_preset:
-                        allowed = routing_preset[speaker]["hear"]
-                        row.append(listener in allowed)
-                    else:
-                        # JSON'da bulunmuyorsa varsayılan herkesi duysun
-                        row.append(True)
-    
-                self.routing.append(row)
-    
+        matrix = self.current_preset().matrix(names)
+
+        # Tek referans değişimiyle yayınla
+        if self.routing.size != n:
+            self.routing = RoutingMatrix(n)
+        self.routing.load(matrix)
 
-    def routing_getter(self, i):
-        return self.routing[i]
     def open_mixer(self):
-        n = int(self.person_count_var.get())
-    
         win = tb.Toplevel(self.root)
         win.title("🎚 Neon Mikser / Routing Matrix")
         win.geometry("1040x720")
@@ -613,182 +621,102 @@ class IntercomApp:
             bg="#0f111a"
         )
         title.pack(pady=20)
-    
-        # --- Outer Container ---
-        outer = tk.Frame(win, bg="#0f111a")
-        outer.pack(fill="both", expand=True, padx=20, pady=10)
-    
-        table = tk.Frame(outer, bg="#0f111a")
-        table.pack()
-    
-        # --- Column Names ---
-        tk.Label(table, text="", bg="#0f111a").grid(row=0, column=0, padx=10)
-    
-        for j in range(n):
-            name = self.person_panels[j]["name_var"].get()
-            lbl = tk.Label(
-                table,
-                text=f"🎧 {name}",
-                font=("Segoe UI", 12, "bold"),
-                fg="#9da5ff",
-                bg="#0f111a",
-            )
-            lbl.grid(row=0, column=j+1, padx=20, pady=10)
-    
-        # --- Routing Cells Storage ---
-        cells = {}
-    
-        # 🔮 LED Glow Colors
-        glow_on = "#7dffb2"
-        glow_off = "#ff7d7d"
-        glow_lock = "#7d7d7d"
-    
-        # --- Build Matrix ---
-        for i in range(n):
-            name_i = self.person_panels[i]["name_var"].get()
-            left_label = tk.Label(
-                table,
-                text=f"🎙 {name_i}",
-                font=("Segoe UI", 12, "bold"),
-                fg="#9da5ff",
-                bg="#0f111a"
-            )
-            left_label.grid(row=i+1, column=0, padx=10, pady=10)
-    
-            for j in range(n):
-    
-                # --- Circle Button Canvas ---
-                canvas = tk.Canvas(
-                    table,
-                    width=65,
-                    height=65,
-                    bg="#131622",
-                    highlightthickness=0
-                )
-    
-                canvas.grid(row=i+1, column=j+1, padx=18, pady=14)
-    
-                # Draw circle
-                circle = canvas.create_oval(
-                    10, 10, 55, 55,
-                    fill="#1a1d2e", outline="#1a1d2e"
-                )
-    
-                # Neon Glow Shadow (Outer halo)
-                halo = canvas.create_oval(
-                    5, 5, 60, 60,
-                    outline="",
-                    fill=""
-                )
-    
-                # Determine initial state
-                if i == j:
-                    state = "lock"
-                    fill_color = glow_lock
-                else:
-                    state = "on" if self.routing[i][j] else "off"
-                    fill_color = glow_on if state == "on" else glow_off
-    
-                # Fill circle
-                canvas.itemconfig(circle, fill=fill_color)
-    
-                # Save cell reference
-                cells[(i, j)] = {
-                    "canvas": canvas,
-                    "circle": circle,
-                    "halo": halo,
-                    "state": state
-                }
-    
-                # --- Hover Effects ---
-                def make_hover(ii=i, jj=j):
-                    def on_enter(_):
-                        if cells[(ii, jj)]["state"] == "lock":
-                            return
-                        # Halo glow
-                        canvas = cells[(ii, jj)]["canvas"]
-                        halo_id = cells[(ii, jj)]["halo"]
-                        canvas.itemconfig(halo_id, fill="#3d3d3d")
-                    def on_leave(_):
-                        canvas = cells[(ii, jj)]["canvas"]
-                        halo_id = cells[(ii, jj)]["halo"]
-                        canvas.itemconfig(halo_id, fill="")
-                    return on_enter, on_leave
-    
-                on_enter, on_leave = make_hover()
-                canvas.bind("<Enter>", on_enter)
-                canvas.bind("<Leave>", on_leave)
-    
-                # --- CLICK TOGGLE ---
-                if i != j:
-                    def make_toggle(ii=i, jj=j):
-                        def toggle(_):
-                            # Update routing
-                            with self.routing_lock:
-                                self.routing[ii][jj] = not self.routing[ii][jj]
-                                new_state = "on" if self.routing[ii][jj] else "off"
-    
-                            cell = cells[(ii, jj)]
-                            canvas = cell["canvas"]
-    
-                            if new_state == "on":
-                                color = glow_on
-                            else:
-                                color = glow_off
-    
-                            canvas.itemconfig(cell["circle"], fill=color)
-                            cell["state"] = new_state
-    
-                            # Pulse Animation
-                            def pulse(k=0):
-                                if k > 6:
-                                    canvas.itemconfig(cell["halo"], fill="")
-                                    return
-                            
-                                # simulate alpha by using lighter/darker gray
-                                brightness = 200 - k * 20  # 200 → 80
-                                hex_val = f"{brightness:02x}"
-                                color = f"#{hex_val}{hex_val}{hex_val}"
-                            
-                                canvas.itemconfig(cell["halo"], fill=color)
-                                canvas.after(40, lambda: pulse(k+1))
-                            
-    
-                            pulse()
-    
-                        return toggle
-                    canvas.bind("<Button-1>", make_toggle())
-    
-        # --- Bottom Legend ---
-        legend = tk.Frame(win, bg="#0f111a")
-        legend.pack(pady=20)
-    
-        tk.Label(legend, text="🟢 Açık", fg=glow_on, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
-        tk.Label(legend, text="🔴 Kapalı", fg=glow_off, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
-        tk.Label(legend, text="⚪ Kilitli", fg=glow_lock, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
-    
+
+        # --- Bottom: legend + close (matris kalan alanı doldurur) ---
         tk.Button(win, text="Kapat", command=win.destroy,
                   bg="#1a1d2e", fg="#9da5ff",
                   font=("Segoe UI", 12), relief="flat",
-                  activebackground="#25293a").pack(pady=24)
-                  
+                  activebackground="#25293a").pack(side="bottom", pady=24)
+
+        legend = tk.Frame(win, bg="#0f111a")
+        legend.pack(side="bottom", pady=(20, 0))
+
+        tk.Label(legend, text="🟢 Açık", fg=GLOW_ON, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
+        tk.Label(legend, text="🔴 Kapalı", fg=GLOW_OFF, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
+        tk.Label(legend, text="⚪ Kilitli", fg=GLOW_LOCK, bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
+        tk.Label(legend, text="🖱 Tekerlek: seviye ±1 dB · Sağ tık: 0 dB", fg="#9da5ff", bg="#0f111a", font=("Segoe UI", 12)).pack(side="left", padx=12)
+
+        # --- Matrix: tek canvas, hit-test, kirli hücre çizimi ---
+        view = MatrixCanvas(
+            win,
+            lambda: self.routing,
+            lambda: [p["name_var"].get() for p in self.person_panels]
+        )
+        view.frame.pack(fill="both", expand=True, padx=20, pady=10)
+
         self.center_window(win, 1040, 720)
 
+    def open_health(self):
+        """Çalışan mix bus'ın stream başına sağlık sayaçları (1 sn yenilenir)."""
+        win = tb.Toplevel(self.root)
+        win.title("🩺 Stream Sağlığı")
+        win.geometry("1080x360")
+
+        cols = ("stream", "durum", "overflow", "underrun", "hata",
+                "yeniden_acma", "yazma_ms", "max_yazma_ms", "hiz_hz", "drift_ppm")
+        tree = tb.Treeview(win, columns=cols, show="headings", height=12)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=180 if c == "stream" else 90, anchor="center")
+        tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for r in self.routers:
+                for row in r.health_report():
+                    tree.insert("", "end", values=[row[c] for c in cols])
+            win.after(1000, refresh)
 
+        refresh()
+        self.center_window(win, 1080, 360)
+
+    def open_meters(self):
+        """Giriş ve çıkış busları için peak/RMS dBFS ve LUFS benzeri yükseklik."""
+        win = tb.Toplevel(self.root)
+        win.title("📈 Ölçüm")
+        win.geometry("760x420")
+
+        cols = ("kanal", "peak_dbfs", "rms_dbfs", "lufs_m", "lufs_s")
+        tree = tb.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=220 if c == "kanal" else 120, anchor="center")
+        tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for r in self.routers:
+                for row in r.meter_snapshot():
+                    tree.insert("", "end", values=[row[c] for c in cols])
+            win.after(500, refresh)
+
+        refresh()
+        self.center_window(win, 760, 420)
 
     # ---------------- Actions ----------------
     def on_change_person_count(self):
+        # Sondan ekle/çıkar: mevcut kişilerin ayarları (ve çalışıyorsa
+        # sesleri) korunur
+        target = int(self.person_count_var.get())
+        while len(self.person_panels) < target:
+            if not self.add_person():
+                break
+        while len(self.person_panels) > target:
+            if not self.remove_person(self.person_panels[-1]):
+                break
+        self.person_count_var.set(len(self.person_panels))
+
+    def start_intercom(self, mode=None):
         if self.running:
-            messagebox.showinfo("Çalışıyor", "Önce interkomu durdurmalısın.")
-            # eski değere geri dön
             return
 
-        self.build_person_panels()
-        self.init_routing_matrix()
-
-    def start_intercom(self):
-        if self.running:
-            return
+        # mode: "blocking" | "callback" (verilmezse arayüzdeki seçim)
+        if mode is None:
+            mode = self.engine_modes.get(self.selected_engine_mode.get(), "blocking")
 
         try:
             n = int(self.person_count_var.get())
@@ -800,30 +728,49 @@ class IntercomApp:
             messagebox.showwarning("Eksik Seçim", "Lütfen tüm mikrofon ve çıkışları seç.")
             return
 
+        # Önceki motor (thread ya da süreç) cihazları bırakmış olsun
+        for r in self.routers:
+            r.join(timeout=5.0)
         self.stop_event.clear()
         self.routers = []
 
-        def make_vu_cb(vu_bar):
-            def cb(level):
-                self.root.after(0, lambda: vu_bar.configure(value=level))
-            return cb
-
-        for i in range(n):
-            r = AudioRouter(
+        panels = self.person_panels[:n]
+        on_error = lambda title, msg: self.root.after(0, lambda: messagebox.showerror(title, msg))
+        ducking = {"depth_db": self.duck_depths.get(self.selected_duck_depth.get(), -15.0)}
+        drift = self.drift_compensation.get()
+        if self.isolated_engine.get():
+            # Routing/kontroller paylaşılan belleğe yansıtılır, yapısal
+            # işlemler (kişi ekle, cihaz değiştir, kayıt) komutla gider
+            self.routers.append(EngineProcess(
+                self.plane,
+                self.registry,
+                mics,
+                outs,
+                self.routing,
+                self.controls,
+                self.stop_event,
+                mode=mode,
+                chunk=self.current_chunk(),
+                on_error=on_error,
+                drift=drift,
+                ducking=ducking
+            ))
+        else:
+            self.routers.append(MixBus(
                 self.p,
-                mics[i],
+                mics,
                 outs,
-                self.routing_getter,
-                self.routing_lock,
-                self.person_panels[i]["gain_var"],
-                self.person_panels[i]["mute_var"],
-                self.person_panels[i]["ptt_enabled_var"],
-                self.person_panels[i]["ptt_pressed_var"],
-                make_vu_cb(self.person_panels[i]["vu_bar"]),
+                self.routing,
+                self.controls,
+                [None] * len(panels),
                 self.stop_event,
-                self_index=i
-            )
-            self.routers.append(r)
+                mode=mode,
+                chunk=self.current_chunk(),
+                on_error=on_error,
+                levels=self.vu_levels,
+                drift=drift,
+                ducking=ducking
+            ))
 
         for r in self.routers:
             r.start()
@@ -831,30 +778,209 @@ class IntercomApp:
         self.running = True
         self.start_btn.config(state=DISABLED)
         self.stop_btn.config(state=NORMAL)
+        self.record_btn.config(state=NORMAL)
+
+    def current_chunk(self):
+        return LATENCY_PROFILES.get(self.selected_latency.get(), CHUNK)
+
+    def measure_latency(self):
+        """Routing'de açık her konuşan → dinleyen çifti için loopback gecikmesi."""
+        if self.running:
+            messagebox.showinfo("Çalışıyor", "Gecikme ölçümü için interkomu durdurun.")
+            return
+
+        try:
+            mics = [self.parse_id(p["mic_var"].get()) for p in self.person_panels]
+            outs = [self.parse_id(p["out_var"].get()) for p in self.person_panels]
+        except Exception:
+            messagebox.showwarning("Eksik Seçim", "Lütfen tüm mikrofon ve çıkışları seç.")
+            return
+
+        chunk = self.current_chunk()
+        buffer_ms = chunk * 1000.0 / RATE
+        names = [p["name_var"].get() for p in self.person_panels]
+        routing = self.routing.matrix
+        pairs = [(int(i), int(j)) for i, j in zip(*np.nonzero(routing)) if i != j]
+
+        def worker():
+            lines = []
+            for i, j in pairs:
+                # i konuşur, j duyar: j'nin çıkışı -> i'nin mikrofonu
+                try:
+                    ms = measure_loopback_latency(self.p, mics[i], outs[j], chunk)
+                except Exception as e:
+                    lines.append(f"{names[i]} → {names[j]}: hata ({e})")
+                    continue
+                if ms is None:
+                    lines.append(f"{names[i]} → {names[j]}: impuls algılanamadı")
+                else:
+                    lines.append(f"{names[i]} → {names[j]}: {ms + buffer_ms:.1f} ms "
+                                 f"(cihaz {ms:.1f} + buffer {buffer_ms:.1f})")
+            for line in lines:
+                print("[Gecikme]", line)
+            text = "\n".join(lines) or "Ölçülecek routing yok."
+            self.root.after(0, lambda: messagebox.showinfo("Gecikme Ölçümü", text))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def toggle_recording(self):
+        """Çok kanallı gösteri kaydını başlat / durdur (kişi başına mic + çıkış izleri)."""
+        if not (self.running and self.routers):
+            return
+        bus = self.routers[0]
+        if bus.recorder is not None:
+            bus.stop_recording()
+            self.record_btn.config(text="⏺ Kayıt", bootstyle="danger-outline")
+            return
+
+        directory = filedialog.askdirectory(title="Kayıt klasörü", mustexist=False)
+        if not directory:
+            return
+        try:
+            bus.start_recording(directory)
+        except Exception as e:
+            messagebox.showerror("Kayıt Hatası", str(e))
+            return
+        self.record_btn.config(text="⏹ Kaydı Durdur", bootstyle="danger")
+
+    def save_scene(self):
+        """Routing, kontroller ve cihaz atamalarını yeni sahne sürümü olarak kaydeder."""
+        name = simpledialog.askstring("Sahne Kaydet", "Sahne adı:",
+                                      initialvalue=self.selected_scene.get(), parent=self.root)
+        if not name:
+            return
+        try:
+            mics = [self.parse_id(p["mic_var"].get()) for p in self.person_panels]
+            outs = [self.parse_id(p["out_var"].get()) for p in self.person_panels]
+        except Exception:
+            messagebox.showwarning("Eksik Seçim", "Lütfen tüm mikrofon ve çıkışları seç.")
+            return
+        names = [p["name_var"].get() for p in self.person_panels]
+        scene = capture_scene(name, names, self.routing, self.controls, mics, outs, self.registry)
+        version = self.scene_store.save(scene)
+        self.scene_cb.configure(values=self.scene_store.names())
+        self.selected_scene.set(name)
+        print(f"[INFO] Sahne kaydedildi: {name} (v{version})")
+
+    def recall_selected_scene(self):
+        """
+        Seçili sahneyi çağırır. Yalnızca farklı olan çapraz noktalar,
+        kişiler ve cihazlar değişir; çalışırken akış kesilmez.
+        """
+        name = self.selected_scene.get()
+        if not name:
+            return
+        try:
+            scene = self.scene_store.load(name)
+            mics = [self.parse_id(p["active"]["mic"]) for p in self.person_panels]
+            outs = [self.parse_id(p["active"]["out"]) for p in self.person_panels]
+            bus = self.routers[0] if self.running and self.routers else None
+            report = recall_scene(scene, self.routing, self.controls, mics, outs,
+                                  self.registry, bus, self.current_chunk())
+        except Exception as e:
+            messagebox.showerror("Sahne Çağrılamadı", str(e))
+            return
+
+        # Paneller sahneyi göstersin (kontroller yeniden yayınlanmaz)
+        self._applying_scene = True
+        try:
+            for i, p in enumerate(self.person_panels):
+                gain, mute, ptt, gate, priority = scene.controls[i].tolist()
+                p["name_var"].set(scene.names[i])
+                p["gain_var"].set(round(gain, 2))
+                p["mute_var"].set(bool(mute))
+                p["ptt_enabled_var"].set(bool(ptt))
+                p["gate_var"].set(bool(gate))
+                p["priority_var"].set(bool(priority))
+                for kind, ep in (("mic", report["mics"][i]), ("out", report["outs"][i])):
+                    label = self.endpoint_label(ep)
+                    p[f"{kind}_var"].set(label)
+                    p["active"][kind] = label
+        finally:
+            self._applying_scene = False
 
     def stop_intercom(self):
         if not self.running:
             return
 
+        # Kayıt, motor thread'i stream'leri kapatınca kendiliğinden kapanır
         self.stop_event.set()
         self.running = False
         self.start_btn.config(state=NORMAL)
         self.stop_btn.config(state=DISABLED)
+        self.record_btn.config(text="⏺ Kayıt", bootstyle="danger-outline", state=DISABLED)
 
-        for p in self.person_panels:
-            p["vu_bar"].configure(value=0)
+        # Metreler VU zamanlayıcısında sıfıra doğru düşer
+        self.vu_levels[:] = 0
+
+    def on_device_selected(self, panel, kind):
+        """Combobox seçimi: interkom çalışıyorsa kişinin cihazı canlı değişir."""
+        var = panel[f"{kind}_var"]
+        value = var.get()
+        if value == panel["active"][kind]:
+            return
+        if self.running and self.routers:
+            i = self.person_panels.index(panel)
+            try:
+                ref = self.parse_id(value)
+                self.routers[0].swap_device(i, **{f"{kind}_id": ref})
+            except Exception as e:
+                var.set(panel["active"][kind])
+                messagebox.showerror("Cihaz Değiştirilemedi", str(e))
+                return
+        panel["active"][kind] = value
+
+    def update_device_lists(self):
+        """Panellerin combobox listelerini kayıttan tazeler (seçimler korunur)."""
+        in_names, out_names = self.device_names()
+        for panel in self.person_panels:
+            panel["mic_box"].configure(values=in_names)
+            panel["out_box"].configure(values=out_names)
+
+    def on_devices_changed(self, added, removed):
+        """Arka plan izleyicisi: listeleri tazele; canlı kişinin cihazı çıktıysa uyar."""
+        self.update_device_lists()
+        gone = {d["id"] for d in removed if d["id"] is not None}
+        if not (self.running and gone):
+            return
+        def uses_gone(value):
+            try:
+                return self.parse_id(value)[0] in gone
+            except ValueError:
+                return False
+
+        users = [p["name_var"].get() for p in self.person_panels
+                 if uses_gone(p["active"]["mic"]) or uses_gone(p["active"]["out"])]
+        if users:
+            names = ", ".join(d["name"] for d in removed)
+            messagebox.showwarning(
+                "Cihaz Çıkarıldı",
+                f"{names} çıkarıldı.\nEtkilenen: {', '.join(users)}\n"
+                "Diğer route'lar çalışıyor; bu kişiler için başka cihaz seç."
+            )
 
     def refresh_devices(self):
+        """
+        Cihaz listesini hemen yeniler. Çalışırken kişiler ve route'lar
+        korunur, yalnızca seçim listeleri güncellenir (arka plan izleyicisi
+        bu sırada taramaz, çıkan canlı cihaz uyarısı buradan verilir).
+        """
+        added, removed = self.registry.refresh()
         if self.running:
-            messagebox.showinfo("Çalışıyor", "Önce interkomu durdurmalısın.")
-            return
-        self.devices = self.get_devices()
-        self.build_person_panels()
-        self.init_routing_matrix()
-        messagebox.showinfo("Yenilendi", "Cihaz listesi yenilendi.")
+            self.on_devices_changed(added, removed)
+        else:
+            self.build_person_panels()
+            self.init_routing_matrix()
+        messagebox.showinfo("Yenilendi",
+                            f"Cihaz listesi yenilendi (+{len(added)} / -{len(removed)}).")
 
     def on_close(self):
+        self.registry.stop_watch()
         self.stop_intercom()
+        # Motor süreci stream'lerini kapatıp çıksın; sonra paylaşılan bellek bırakılır
+        for r in self.routers:
+            r.join(timeout=5.0)
+        self.plane.close()
         try:
             self.p.terminate()
         except:
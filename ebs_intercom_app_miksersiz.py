@@ -6,11 +6,22 @@ import pyaudio
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 
+from ebs_intercom_engine import NoiseGate
+from ebs_intercom_vu import VuMeterBank
+
 RATE = 48000
 CHUNK = 1024
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 
+# Buffer boyutu profilleri (frame). 128 @ 48kHz ≈ 2.7 ms / buffer
+LATENCY_PROFILES = {
+    "Ultra Düşük (128)": 128,
+    "Düşük (256)": 256,
+    "Normal (512)": 512,
+    "Güvenli (1024)": 1024,
+}
+
 # VU meter ölçekleme
 def rms_level(int16_audio: np.ndarray):
     if int16_audio.size == 0:
@@ -38,27 +49,51 @@ def is_real_output(dev):
         return False
     return True
 
+class ControlState:
+    """
+    Kişi başına kontrol durumu (gain, mute, PTT modu, PTT basılı, gürültü kapısı).
+    GUI thread'i her değişiklikte yeni, salt-okunur bir dizi yayınlar;
+    ses thread'leri Tkinter değişkenlerine dokunmadan self.state'i okur.
+    """
+    GAIN, MUTE, PTT_ENABLED, PTT_PRESSED, GATE = range(5)
+
+    def __init__(self, n):
+        state = np.zeros((n, 5), dtype=np.float32)
+        state[:, self.GAIN] = 1.0
+        state.flags.writeable = False
+        self.state = state
+
+    def publish(self, i, gain, mute, ptt_enabled, ptt_pressed, gate=False):
+        state = self.state.copy()
+        state[i] = (gain, mute, ptt_enabled, ptt_pressed, gate)
+        state.flags.writeable = False
+        self.state = state
+
 class AudioRouter(threading.Thread):
     """
     Bir mikrofonu okur, PTT/Mute/Gain uygular, diğer çıkışlara yazar.
-    Ayrıca VU seviyesini callback ile GUI’ye yollar.
+    VU seviyesini paylaşılan levels dizisine yazar; GUI kendi
+    zamanlayıcısıyla okur (Tk kuyruğuna buffer başına çağrı gitmez).
     """
-    def __init__(self, p, mic_id, out_ids, gain_var, mute_var,
-                 ptt_enabled_var, ptt_pressed_var,
-                 vu_callback, stop_event):
+    def __init__(self, p, mic_id, out_ids, controls, index,
+                 levels, stop_event, chunk=CHUNK):
         super().__init__(daemon=True)
         self.p = p
         self.mic_id = mic_id
         self.out_ids = out_ids
-        self.gain_var = gain_var
-        self.mute_var = mute_var
-        self.ptt_enabled_var = ptt_enabled_var
-        self.ptt_pressed_var = ptt_pressed_var
-        self.vu_callback = vu_callback
+        self.controls = controls  # ControlState
+        self.index = index
+        self.levels = levels
         self.stop_event = stop_event
+        self.chunk = chunk
 
         self.mic_stream = None
         self.out_streams = []
+        self.gate = NoiseGate(1)
+        # Kapı kazancı buffer boyunca bir öncekinden yeniye doğrusal
+        # rampayla değişir (mikser motorundaki MixDsp rampası gibi)
+        self.gate_gain = 1.0
+        self.ramp = np.arange(1, chunk + 1, dtype=np.float32) / chunk
 
     def open_streams(self):
         self.mic_stream = self.p.open(
@@ -66,7 +101,7 @@ class AudioRouter(threading.Thread):
             channels=CHANNELS,
             rate=RATE,
             input=True,
-            frames_per_buffer=CHUNK,
+            frames_per_buffer=self.chunk,
             input_device_index=self.mic_id
         )
 
@@ -76,7 +111,7 @@ class AudioRouter(threading.Thread):
                 channels=CHANNELS,
                 rate=RATE,
                 output=True,
-                frames_per_buffer=CHUNK,
+                frames_per_buffer=self.chunk,
                 output_device_index=oid
             )
             for oid in self.out_ids
@@ -107,27 +142,39 @@ class AudioRouter(threading.Thread):
 
         while not self.stop_event.is_set():
             try:
-                data = self.mic_stream.read(CHUNK, exception_on_overflow=False)
+                data = self.mic_stream.read(self.chunk, exception_on_overflow=False)
                 audio_np = np.frombuffer(data, dtype=np.int16)
 
-                # VU meter güncelle
-                lvl = rms_level(audio_np)
-                if self.vu_callback:
-                    self.vu_callback(lvl)
+                # VU meter seviyesi (GUI zamanlayıcısı okur)
+                self.levels[self.index] = rms_level(audio_np)
+
+                # Kontrol durumunun anlık görüntüsü (Tk'ye dokunmadan)
+                gain, mute, ptt_enabled, ptt_pressed, gate_on = self.controls.state[self.index]
 
                 # Mute kontrolü
-                if self.mute_var.get():
+                if mute:
                     continue
 
                 # PTT kontrolü
-                if self.ptt_enabled_var.get() and not self.ptt_pressed_var.get():
+                if ptt_enabled and not ptt_pressed:
                     # PTT aktif ama basılmıyor -> gönderme
                     continue
 
-                # Gain uygula
-                gain = float(self.gain_var.get())
-                if gain != 1.0:
-                    f = audio_np.astype(np.float32) * gain
+                # Gürültü kapısı (VAD): kapalı kaldıkça hiç yazma; açılış ve
+                # kapanışta kapı kazancı buffer içinde rampalanır (klik olmaz)
+                g = float(self.gate.process(audio_np.astype(np.float32)[None, :])[0]) if gate_on else 1.0
+                g_prev, self.gate_gain = self.gate_gain, g
+                if g == 0.0 and g_prev == 0.0:
+                    continue
+
+                # Gain (ve kapı rampası) uygula
+                gain = float(gain)
+                if gain != 1.0 or g != 1.0 or g_prev != 1.0:
+                    if g == g_prev:
+                        env = gain * g
+                    else:
+                        env = gain * (g_prev + (g - g_prev) * self.ramp[:len(audio_np)])
+                    f = audio_np.astype(np.float32) * env
                     f = np.clip(f, -32768, 32767).astype(np.int16)
                     out_data = f.tobytes()
                 else:
@@ -140,6 +187,7 @@ class AudioRouter(threading.Thread):
                 continue
 
         self.close_streams()
+        self.levels[self.index] = 0
 
 
 class IntercomApp:
@@ -156,8 +204,19 @@ class IntercomApp:
         self.routers = []
         self.running = False
 
+        self.selected_latency = tk.StringVar(value="Güvenli (1024)")
+
+        # Ses thread'leri seviyeleri buraya yazar; tek GUI zamanlayıcısı okur
+        self.vu_levels = np.zeros(3, dtype=np.float32)
+
         self.build_ui()
 
+        self.vu_bank = VuMeterBank(
+            self.root, self.vu_levels,
+            lambda: [(p["vu_bar"], p["peak_label"]) for p in self.person_panels]
+        )
+        self.vu_bank.start()
+
     def get_devices(self):
         devs = []
         for i in range(self.p.get_device_count()):
@@ -199,6 +258,7 @@ class IntercomApp:
         default_names = ["Spiker", "Soru Sorana", "Konuk"]
 
         self.person_panels = []
+        self.controls = ControlState(3)
 
         for idx in range(3):
             card = tb.Labelframe(grid, text=f"Kişi {idx+1}", padding=12, bootstyle="primary")
@@ -234,7 +294,9 @@ class IntercomApp:
             # --- VU Meter
             tb.Label(card, text="VU Meter (Konuşma Seviyesi):").pack(anchor="w")
             vu = tb.Progressbar(card, length=210, maximum=100, bootstyle="info-striped")
-            vu.pack(pady=(0, 8))
+            vu.pack(pady=(0, 0))
+            peak = tb.Label(card, text="Peak 0", foreground="#bbbbbb", font=("Segoe UI", 8))
+            peak.pack(anchor="e", pady=(0, 6))
 
             # --- Gain
             tb.Label(card, text="Gain (Ses Seviyesi):").pack(anchor="w")
@@ -253,6 +315,11 @@ class IntercomApp:
                                             variable=ptt_enabled_var, bootstyle="warning")
             ptt_enable_chk.pack(anchor="w", pady=(0, 6))
 
+            # --- Gürültü kapısı
+            gate_var = tk.BooleanVar(value=False)
+            tb.Checkbutton(card, text="Gürültü Kapısı (VAD)", variable=gate_var,
+                           bootstyle="info").pack(anchor="w", pady=(0, 6))
+
             # --- PTT Buton (hold to talk)
             ptt_btn = tb.Button(card, text="🎤 BAS & KONUŞ",
                                 bootstyle="success-outline", width=20)
@@ -276,9 +343,16 @@ class IntercomApp:
                 "mute_var": mute_var,
                 "ptt_enabled_var": ptt_enabled_var,
                 "ptt_pressed_var": ptt_pressed_var,
-                "vu_bar": vu
+                "gate_var": gate_var,
+                "vu_bar": vu,
+                "peak_label": peak
             })
 
+            # Değişiklikleri GUI thread'inde ControlState'e yayınla
+            for var in (gain_var, mute_var, ptt_enabled_var, ptt_pressed_var, gate_var):
+                var.trace_add("write", lambda *_, i=idx: self.publish_controls(i))
+            self.publish_controls(idx)
+
         hint = (
             "Kişi 1 ve 2: USB mikrofonlu kulaklık seç.\n"
             "Kişi 3: Laptop dahili mic+speaker veya ayrı ses kartı seçebilirsin.\n"
@@ -299,9 +373,28 @@ class IntercomApp:
                                   width=10, state=DISABLED)
         self.stop_btn.pack(side=LEFT, padx=5)
 
+        tb.Label(controls, text="Buffer:").pack(side=LEFT, padx=(20, 6))
+        tb.Combobox(controls, width=16, state="readonly",
+                    values=list(LATENCY_PROFILES.keys()),
+                    textvariable=self.selected_latency).pack(side=LEFT)
+
         tb.Button(controls, text="🔄 Cihazları Yenile",
                   bootstyle="secondary", command=self.refresh_devices).pack(side=RIGHT, padx=5)
 
+    def publish_controls(self, i):
+        p = self.person_panels[i]
+        try:
+            gain = float(p["gain_var"].get())
+        except (tk.TclError, ValueError):
+            return
+        self.controls.publish(
+            i, gain,
+            p["mute_var"].get(),
+            p["ptt_enabled_var"].get(),
+            p["ptt_pressed_var"].get(),
+            p["gate_var"].get()
+        )
+
     def start_intercom(self):
         if self.running:
             return
@@ -315,46 +408,34 @@ class IntercomApp:
 
         self.stop_event.clear()
         self.routers = []
-
-        # --- VU callback üret (thread-safe)
-        def make_vu_cb(vu_bar):
-            def cb(level):
-                # GUI güncellemesini main thread'e taşı
-                self.root.after(0, lambda: vu_bar.configure(value=level))
-            return cb
+        chunk = LATENCY_PROFILES.get(self.selected_latency.get(), CHUNK)
 
         # Routing:
         # Mic1 -> Out2, Out3
         self.routers.append(AudioRouter(
             self.p, mics[0], [outs[1], outs[2]],
-            self.person_panels[0]["gain_var"],
-            self.person_panels[0]["mute_var"],
-            self.person_panels[0]["ptt_enabled_var"],
-            self.person_panels[0]["ptt_pressed_var"],
-            make_vu_cb(self.person_panels[0]["vu_bar"]),
-            self.stop_event
+            self.controls, 0,
+            self.vu_levels,
+            self.stop_event,
+            chunk=chunk
         ))
 
         # Mic2 -> Out1, Out3
         self.routers.append(AudioRouter(
             self.p, mics[1], [outs[0], outs[2]],
-            self.person_panels[1]["gain_var"],
-            self.person_panels[1]["mute_var"],
-            self.person_panels[1]["ptt_enabled_var"],
-            self.person_panels[1]["ptt_pressed_var"],
-            make_vu_cb(self.person_panels[1]["vu_bar"]),
-            self.stop_event
+            self.controls, 1,
+            self.vu_levels,
+            self.stop_event,
+            chunk=chunk
         ))
 
         # Mic3 -> Out1, Out2
         self.routers.append(AudioRouter(
             self.p, mics[2], [outs[0], outs[1]],
-            self.person_panels[2]["gain_var"],
-            self.person_panels[2]["mute_var"],
-            self.person_panels[2]["ptt_enabled_var"],
-            self.person_panels[2]["ptt_pressed_var"],
-            make_vu_cb(self.person_panels[2]["vu_bar"]),
-            self.stop_event
+            self.controls, 2,
+            self.vu_levels,
+            self.stop_event,
+            chunk=chunk
         ))
 
         for r in self.routers:
@@ -373,9 +454,8 @@ class IntercomApp:
         self.start_btn.config(state=NORMAL)
         self.stop_btn.config(state=DISABLED)
 
-        # VU meterları sıfırla
-        for p in self.person_panels:
-            p["vu_bar"].configure(value=0)
+        # VU meterlar zamanlayıcıda sıfıra doğru düşer
+        self.vu_levels[:] = 0
 
     def refresh_devices(self):
         if self.running:
@@ -0,0 +1,630 @@
+"""
+Ses G/Ç backend'leri. Motor yalnızca bu PyAudio benzeri arayüzü kullanır:
+
+    backend.open(rate=..., channels=..., input=/output=True,
+                 frames_per_buffer=..., input_device_index=/output_device_index=...,
+                 stream_callback=None)
+    backend.get_device_count(), backend.get_device_info_by_index(i)
+    backend.scan_devices()   # güncel liste (hot-plug), info + "index"
+    backend.is_format_supported(rate, device, channels, input)
+    backend.terminate()
+
+PyAudioBackend gerçek ses kartlarını kullanır (pyaudio yalnızca burada,
+ilk kullanımda içe aktarılır). SimBackend sanal mikrofonlar (sine / noise /
+WAV) ve çıktıyı dizilere yakalayan sanal çıkışlar sunar; gerçek zamanlı
+ya da olabildiğince hızlı çalışarak test ve benchmark'ları ses kartı
+olmadan mümkün kılar.
+
+Çok kanallı stream'lerde örnekler PyAudio'daki gibi iç içedir
+(frame başına kanal sayısı kadar int16).
+"""
+import json
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+# PortAudio sabitleri (pyaudio ile aynı değerler)
+paContinue = 0
+paComplete = 1
+paInputOverflow = 0x2
+paOutputUnderflow = 0x4
+paInputOverflowed = -9981
+paOutputUnderflowed = -9980
+paDeviceUnavailable = -9985
+
+# Stream açıkken cihaz listesi ayrı süreçte (taze PortAudio) taranır
+_SCAN_SCRIPT = (
+    "import json, pyaudio\n"
+    "pa = pyaudio.PyAudio()\n"
+    "print(json.dumps([pa.get_device_info_by_index(i) for i in range(pa.get_device_count())]))\n"
+    "pa.terminate()\n"
+)
+
+
+class AudioBackend:
+    """Backend arayüzü; tüm örnekler int16 PCM."""
+    name = "base"
+
+    def open(self, rate, channels, input=False, output=False, frames_per_buffer=1024,
+             input_device_index=None, output_device_index=None, stream_callback=None):
+        raise NotImplementedError
+
+    def get_device_count(self):
+        raise NotImplementedError
+
+    def get_device_info_by_index(self, i):
+        raise NotImplementedError
+
+    def scan_devices(self):
+        """
+        Şu an takılı cihazlar: info sözlükleri, "index" = açılırken
+        kullanılacak id (None: görülüyor ama bu süreçte henüz açılamaz).
+        """
+        return [dict(self.get_device_info_by_index(i), index=i)
+                for i in range(self.get_device_count())]
+
+    def is_format_supported(self, rate, device, channels, input):
+        """Cihaz bu hız ve kanal sayısıyla (int16) açılabilir mi?"""
+        return True
+
+    def terminate(self):
+        pass
+
+
+class PyAudioBackend(AudioBackend):
+    """Gerçek ses kartları (PortAudio)."""
+    name = "pyaudio"
+
+    def __init__(self):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.pa = pyaudio.PyAudio()
+        # PortAudio yeniden başlatılırken (scan_devices) açma/sorgu yapılmasın
+        self._lock = threading.RLock()
+
+    def open(self, rate, channels, input=False, output=False, frames_per_buffer=1024,
+             input_device_index=None, output_device_index=None, stream_callback=None):
+        with self._lock:
+            return self.pa.open(
+                format=self.pyaudio.paInt16,
+                channels=channels,
+                rate=rate,
+                input=input,
+                output=output,
+                frames_per_buffer=frames_per_buffer,
+                input_device_index=input_device_index,
+                output_device_index=output_device_index,
+                stream_callback=stream_callback
+            )
+
+    def get_device_count(self):
+        with self._lock:
+            return self.pa.get_device_count()
+
+    def get_device_info_by_index(self, i):
+        with self._lock:
+            return self.pa.get_device_info_by_index(i)
+
+    def scan_devices(self):
+        """
+        PortAudio cihaz listesini yalnızca başlatılırken tarar. Açık stream
+        yoksa yeniden başlatılır ve liste tazelenir; stream açıkken canlı
+        route'lara dokunulmaz, tarama ayrı süreçte yapılır: bu süreçte
+        bilinmeyen (yeni takılan) cihazlar index=None ile döner.
+        """
+        with self._lock:
+            # PyAudio açık stream'lerini _streams'te tutar
+            if not getattr(self.pa, "_streams", True):
+                self.pa.terminate()
+                self.pa = self.pyaudio.PyAudio()
+                return super().scan_devices()
+            known = super().scan_devices()
+        try:
+            out = subprocess.run([sys.executable, "-c", _SCAN_SCRIPT],
+                                 capture_output=True, text=True, timeout=10, check=True)
+            fresh = json.loads(out.stdout)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            print(f"[Cihaz HATASI]: tarama yapılamadı: {e}")
+            return known
+
+        def key(info):
+            return (info["name"], info.get("hostApi"),
+                    info.get("maxInputChannels"), info.get("maxOutputChannels"))
+
+        ids = {}
+        for info in known:
+            ids.setdefault(key(info), []).append(info["index"])
+        for info in fresh:
+            same = ids.get(key(info))
+            info["index"] = same.pop(0) if same else None
+        return fresh
+
+    def is_format_supported(self, rate, device, channels, input):
+        side = "input" if input else "output"
+        try:
+            with self._lock:
+                return bool(self.pa.is_format_supported(rate, **{
+                    f"{side}_device": device,
+                    f"{side}_channels": channels,
+                    f"{side}_format": self.pyaudio.paInt16,
+                }))
+        except ValueError:
+            # PyAudio desteklenmeyen formatta False yerine ValueError fırlatır
+            return False
+
+    def terminate(self):
+        self.pa.terminate()
+
+
+# ---------------- Simülasyon ----------------
+class SineSource:
+    def __init__(self, freq=440.0, amplitude=0.3, rate=48000):
+        self.step = 2 * np.pi * freq / rate
+        self.amplitude = amplitude * 32767
+        self.phase = 0.0
+
+    def describe(self):
+        return f"sine {self.step:.4f} rad"
+
+    def read(self, n):
+        t = self.phase + self.step * np.arange(n, dtype=np.float64)
+        self.phase = float((self.phase + self.step * n) % (2 * np.pi))
+        return (np.sin(t) * self.amplitude).astype(np.int16)
+
+
+class NoiseSource:
+    def __init__(self, amplitude=0.1, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.amplitude = amplitude * 32767
+
+    def describe(self):
+        return "noise"
+
+    def read(self, n):
+        return (self.rng.standard_normal(n) * self.amplitude / 3).astype(np.int16)
+
+
+class SilenceSource:
+    def describe(self):
+        return "silence"
+
+    def read(self, n):
+        return np.zeros(n, dtype=np.int16)
+
+
+class WavSource:
+    """Mono'ya indirgenmiş, gerekirse doğrusal olarak yeniden örneklenmiş WAV; sonda başa sarar."""
+    def __init__(self, path, rate=48000, loop=True):
+        self.path = path
+        self.loop = loop
+        with wave.open(path, "rb") as w:
+            channels = w.getnchannels()
+            src_rate = w.getframerate()
+            if w.getsampwidth() != 2:
+                raise ValueError(f"{path}: yalnızca 16-bit PCM WAV destekleniyor")
+            data = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        data = data.reshape(-1, channels).mean(axis=1)
+        if src_rate != rate and len(data):
+            n = int(len(data) * rate / src_rate)
+            data = np.interp(np.arange(n) * src_rate / rate, np.arange(len(data)), data)
+        self.data = data.astype(np.int16)
+        self.pos = 0
+
+    def describe(self):
+        return f"wav {self.path}"
+
+    def read(self, n):
+        out = np.zeros(n, dtype=np.int16)
+        filled = 0
+        while filled < n and len(self.data):
+            if self.pos >= len(self.data):
+                if not self.loop:
+                    break
+                self.pos = 0
+            k = min(n - filled, len(self.data) - self.pos)
+            out[filled:filled + k] = self.data[self.pos:self.pos + k]
+            filled += k
+            self.pos += k
+        return out
+
+
+def make_source(spec, rate=48000, seed=0):
+    """
+    "sine", "sine:440", "sine:440:0.5", "noise", "noise:0.2", "silence",
+    "wav:dosya.wav" -> kaynak nesnesi.
+    """
+    kind, _, rest = str(spec).partition(":")
+    args = [a for a in rest.split(":") if a] if kind != "wav" else [rest]
+    if kind == "sine":
+        freq = float(args[0]) if args else 440.0
+        amp = float(args[1]) if len(args) > 1 else 0.3
+        return SineSource(freq, amp, rate)
+    if kind == "noise":
+        return NoiseSource(float(args[0]) if args else 0.1, seed)
+    if kind == "silence":
+        return SilenceSource()
+    if kind == "wav":
+        return WavSource(rest, rate)
+    raise ValueError(f"Bilinmeyen kaynak: {spec!r}")
+
+
+class SimStream:
+    """
+    SimBackend stream'i: PyAudio Stream ile aynı yöntemler. Gerçek zamanlı
+    modda cihazın kendi saatiyle (hız x (1 + ppm)) ilerler; blocking
+    yazma, sürücü kuyruğu (capacity) doluysa yer açılana kadar bekler,
+    kuyruk boşalmışsa underflow bildirir. Okunmayan giriş capacity'yi
+    aşarsa eski veri atılır (overflow).
+    """
+    def __init__(self, backend, device, rate, frames_per_buffer, is_input, callback, channels=1):
+        self.backend = backend
+        self.device = device
+        self.channels = channels
+        self.rate = rate
+        self.clock = rate * (1.0 + device.ppm * 1e-6)
+        self.frames_per_buffer = frames_per_buffer
+        self.capacity = frames_per_buffer * 4
+        self.is_input = is_input
+        self.callback = callback
+        self.frames_done = 0
+        self.t0 = None
+        self.active = False
+
+    # --- zamanlama ---
+    def _start_clock(self):
+        if self.t0 is None:
+            self.t0 = time.perf_counter()
+
+    def _elapsed(self):
+        """Cihaz saatine göre geçen frame sayısı."""
+        self._start_clock()
+        return int((time.perf_counter() - self.t0) * self.clock)
+
+    def _wait_until(self, frames):
+        """Gerçek zamanlı modda frames'in süresi dolana kadar bekle."""
+        if not self.backend.realtime:
+            return
+        self._start_clock()
+        delay = self.t0 + frames / self.clock - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _check_present(self):
+        if not self.device.present:
+            e = IOError(f"Cihaz {self.device.index} çıkarıldı")
+            e.errno = paDeviceUnavailable
+            raise e
+
+    # --- blocking API ---
+    def read(self, num_frames, exception_on_overflow=True):
+        self._check_present()
+        if self.backend.realtime:
+            lost = self._elapsed() - self.frames_done - self.capacity
+            if lost > 0:
+                # Sürücü buffer'ı taştı: en eski veri kaybolur
+                self.device.read(lost, self.channels)
+                self.frames_done += lost
+        self._wait_until(self.frames_done + num_frames)
+        self.frames_done += num_frames
+        return self.device.read(num_frames, self.channels).tobytes()
+
+    def write(self, frames, num_frames=None, exception_on_underflow=False):
+        self._check_present()
+        samples = np.frombuffer(frames, dtype=np.int16).reshape(-1, self.channels)
+        underflow = False
+        if self.backend.realtime:
+            played = self._elapsed()
+            if 0 < self.frames_done < played:
+                # Kuyruk boşalmış, cihaz sessizlik çaldı
+                underflow = True
+                self.frames_done = played
+            self._wait_until(max(self.frames_done, played) + len(samples) - self.capacity)
+        self.device.capture(samples)
+        self.frames_done += len(samples)
+        if underflow and exception_on_underflow:
+            e = IOError("Output underflowed")
+            e.errno = paOutputUnderflowed
+            raise e
+
+    def get_read_available(self):
+        if not self.backend.realtime:
+            return self.frames_per_buffer
+        return max(0, self._elapsed() - self.frames_done)
+
+    def get_write_available(self):
+        if not self.backend.realtime:
+            return self.capacity
+        queued = max(0, self.frames_done - self._elapsed())
+        return max(0, self.capacity - queued)
+
+    # --- kontrol ---
+    def start_stream(self):
+        self.active = True
+        if self.callback is not None:
+            self.t0 = None
+            self.frames_done = 0
+            self._start_clock()
+            self.backend._attach(self)
+
+    def stop_stream(self):
+        self.active = False
+        if self.callback is not None:
+            self.backend._detach(self)
+
+    def close(self):
+        self.stop_stream()
+
+    def is_active(self):
+        return self.active
+
+    # --- callback sürücüsü ---
+    def next_due(self):
+        """Bir sonraki callback'in duvar saati zamanı (buffer dolduğunda)."""
+        return self.t0 + (self.frames_done + self.frames_per_buffer) / self.clock
+
+    def _pump(self):
+        n = self.frames_per_buffer
+        if not self.device.present:
+            # Çıkarılan cihazın callback'i durur (PortAudio'daki gibi)
+            self.active = False
+            return
+        if self.is_input:
+            data = self.device.read(n, self.channels).tobytes()
+            _, flag = self.callback(data, n, {}, 0)
+        else:
+            out, flag = self.callback(None, n, {}, 0)
+            self.device.capture(np.frombuffer(out, dtype=np.int16).reshape(-1, self.channels))
+        self.frames_done += n
+        if flag != paContinue:
+            self.active = False
+
+
+class SimDevice:
+    """
+    Sanal cihaz. Giriş: kanal başına bir kaynak (sources), çıkış: channels
+    kanallı yakalayıcı. Yakalanan bloklar frame x kanal dizileridir.
+    rate: desteklenen tek örnekleme hızı; ppm: saat hatası (bağımsız
+    cihazlar arasındaki kaymayı taklit eder).
+    """
+    def __init__(self, index, name, sources=None, channels=1, capture_seconds=0, rate=48000, ppm=0.0):
+        self.index = index
+        self.name = name
+        self.rate = rate
+        self.ppm = float(ppm)
+        self.sources = list(sources or [])
+        self.is_input = bool(self.sources)
+        self.channels = len(self.sources) if self.is_input else channels
+        self.capture_limit = int(capture_seconds * rate)
+        self.captured_chunks = []
+        self.captured_frames = 0
+        self.held = 0
+        self.present = True     # unplug() ile False: taramada görünmez, stream'ler hata verir
+        self.lock = threading.Lock()
+
+    @property
+    def source(self):
+        return self.sources[0]
+
+    def read(self, n, channels=1):
+        """İlk channels kanalın n frame'i, iç içe (frame x kanal)."""
+        if channels > self.channels:
+            raise IOError(f"Cihaz {self.index}: {self.channels} kanal var, {channels} istendi")
+        if channels == 1:
+            return self.sources[0].read(n)
+        return np.column_stack([src.read(n) for src in self.sources[:channels]])
+
+    def capture(self, samples):
+        if not self.capture_limit:
+            self.captured_frames += len(samples)
+            return
+        with self.lock:
+            self.captured_chunks.append(samples.copy())
+            self.captured_frames += len(samples)
+            self.held += len(samples)
+            # Yalnızca son capture_limit frame'i tut (bellek sınırlı)
+            while self.captured_chunks and self.held - len(self.captured_chunks[0]) >= self.capture_limit:
+                self.held -= len(self.captured_chunks.pop(0))
+
+    def captured(self, channel=None):
+        """Tek kanallı cihazda 1-D dizi; çok kanallıda frame x kanal ya da tek kanal."""
+        with self.lock:
+            if not self.captured_chunks:
+                data = np.zeros((0, self.channels), dtype=np.int16)
+            else:
+                data = np.concatenate(self.captured_chunks)
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        if channel is not None:
+            return data[:, channel].copy() if channel < data.shape[1] else np.zeros(len(data), np.int16)
+        if self.channels == 1:
+            return data[:, 0].copy()
+        return data
+
+
+class SimBackend(AudioBackend):
+    """
+    Sanal ses kartı. Girişler kaynak tanımlarından (make_source), çıkışlar
+    sayısı kadar yakalayıcı cihazdan oluşur:
+
+        SimBackend(inputs=["sine:440", "noise", "wav:konuk.wav"], outputs=3)
+
+    Çok kanallı cihaz: girişte kaynak listesi, çıkışta kanal sayısı listesi:
+
+        SimBackend(inputs=[["sine:300", "sine:500", "noise"]], outputs=[8])
+
+    Farklı hız / saat kayması: cihaz tanımı yerine sözlük verilebilir:
+
+        SimBackend(inputs=[{"source": "sine:440", "rate": 44100, "ppm": 120}],
+                   outputs=[{"channels": 2, "ppm": -80}])
+
+    Cihaz id'leri: önce girişler (0..I-1), sonra çıkışlar (I..I+O-1).
+    realtime=True: stream'ler duvar saatine göre ilerler (gerçek cihaz gibi).
+    realtime=False: olabildiğince hızlı (benchmark / offline).
+    capture_seconds: her çıkışta saklanacak son ses süresi (0 = saklama).
+    """
+    name = "sim"
+
+    def __init__(self, inputs=("sine",), outputs=1, rate=48000, realtime=True,
+                 capture_seconds=10.0, seed=0):
+        self.rate = rate
+        self.realtime = realtime
+        self.capture_seconds = capture_seconds
+        self.seed = seed
+        self.devices = []
+        for spec in inputs:
+            self.plug_input(spec)
+        for spec in [1] * outputs if isinstance(outputs, int) else list(outputs):
+            self.plug_output(spec)
+
+        self._cb_streams = []
+        self._cb_lock = threading.Lock()
+        self._driver = None
+        self._driver_stop = threading.Event()
+
+    # ---------------- Hot-plug ----------------
+    def plug_input(self, spec):
+        """Sanal mikrofon takar (kaynak tanımı ya da sözlük); dönüş: cihaz id'si."""
+        k = sum(d.is_input for d in self.devices)
+        opts = spec if isinstance(spec, dict) else {"sources": spec}
+        specs = opts.get("sources", opts.get("source", "sine"))
+        specs = specs if isinstance(specs, (list, tuple)) else [specs]
+        dev_rate = int(opts.get("rate", self.rate))
+        srcs = [s if hasattr(s, "read") else make_source(s, dev_rate, self.seed + k * 64 + c)
+                for c, s in enumerate(specs)]
+        label = srcs[0].describe() if len(srcs) == 1 else f"{len(srcs)} kanal"
+        self.devices.append(SimDevice(len(self.devices), f"Sim Mic {k} ({label})", srcs,
+                                      rate=dev_rate, ppm=opts.get("ppm", 0.0)))
+        return len(self.devices) - 1
+
+    def plug_output(self, spec=1):
+        """Sanal çıkış takar (kanal sayısı ya da sözlük); dönüş: cihaz id'si."""
+        k = sum(not d.is_input for d in self.devices)
+        opts = spec if isinstance(spec, dict) else {"channels": spec}
+        channels = int(opts.get("channels", 1))
+        label = f"Sim Out {k}" if channels == 1 else f"Sim Out {k} ({channels} kanal)"
+        self.devices.append(SimDevice(len(self.devices), label, channels=channels,
+                                      capture_seconds=self.capture_seconds,
+                                      rate=int(opts.get("rate", self.rate)), ppm=opts.get("ppm", 0.0)))
+        return len(self.devices) - 1
+
+    def unplug(self, device_index):
+        """
+        Cihazı çıkarır: taramada görünmez, açık stream'leri hata verir.
+        Id'ler kaymaz (PortAudio'nun başlatıldığı andaki liste gibi).
+        """
+        self.devices[device_index].present = False
+
+    @property
+    def input_ids(self):
+        return [d.index for d in self.devices if d.is_input]
+
+    @property
+    def output_ids(self):
+        return [d.index for d in self.devices if not d.is_input]
+
+    def get_device_count(self):
+        return len(self.devices)
+
+    def get_device_info_by_index(self, i):
+        d = self.devices[i]
+        return {
+            "index": i,
+            "name": d.name,
+            "maxInputChannels": d.channels if d.is_input else 0,
+            "maxOutputChannels": 0 if d.is_input else d.channels,
+            "defaultSampleRate": float(d.rate),
+            "hostApi": 0,
+        }
+
+    def scan_devices(self):
+        return [dict(self.get_device_info_by_index(d.index), index=d.index)
+                for d in self.devices if d.present]
+
+    def is_format_supported(self, rate, device, channels, input):
+        d = self.devices[device]
+        return d.is_input == bool(input) and rate == d.rate and 1 <= channels <= d.channels
+
+    def open(self, rate, channels, input=False, output=False, frames_per_buffer=1024,
+             input_device_index=None, output_device_index=None, stream_callback=None):
+        if input:
+            dev = self.devices[input_device_index]
+            if not dev.is_input:
+                raise IOError(f"Cihaz {input_device_index} giriş değil")
+        else:
+            dev = self.devices[output_device_index]
+            if dev.is_input:
+                raise IOError(f"Cihaz {output_device_index} çıkış değil")
+        if not dev.present:
+            raise IOError(f"Cihaz {dev.index} takılı değil")
+        if not 1 <= channels <= dev.channels:
+            raise IOError(f"Cihaz {dev.index}: geçersiz kanal sayısı {channels}")
+        if rate != dev.rate:
+            raise ValueError(f"Cihaz {dev.index}: geçersiz örnekleme hızı {rate} (desteklenen {dev.rate})")
+        stream = SimStream(self, dev, rate, frames_per_buffer, bool(input), stream_callback, channels)
+        if stream_callback is None:
+            stream.active = True
+        return stream
+
+    def captured(self, device_index, channel=None):
+        """Çıkış cihazına yazılan son sesin kopyası (int16); channel verilirse o kanal."""
+        return self.devices[device_index].captured(channel)
+
+    # ---------------- Callback sürücüsü ----------------
+    def pump(self, blocks=1):
+        """
+        Tüm aktif callback stream'lerini blok blok ilerletir: önce
+        girişler, sonra çıkışlar (gerçek cihazdaki sıraya benzer).
+        """
+        with self._cb_lock:
+            streams = sorted(self._cb_streams, key=lambda s: not s.is_input)
+        for _ in range(blocks):
+            for s in streams:
+                if s.active:
+                    s._pump()
+
+    def _attach(self, stream):
+        with self._cb_lock:
+            if stream not in self._cb_streams:
+                self._cb_streams.append(stream)
+            if self._driver is None:
+                self._driver_stop.clear()
+                self._driver = threading.Thread(target=self._drive, daemon=True)
+                self._driver.start()
+
+    def _detach(self, stream):
+        with self._cb_lock:
+            if stream in self._cb_streams:
+                self._cb_streams.remove(stream)
+
+    def _drive(self):
+        """
+        Gerçek zamanlı modda her stream kendi saatiyle (hız, ppm, buffer
+        boyutu) çağrılır; farklı saatli cihazlar birbirinden kayar.
+        """
+        while not self._driver_stop.is_set():
+            with self._cb_lock:
+                streams = sorted(self._cb_streams, key=lambda s: not s.is_input)
+            if not streams:
+                time.sleep(0.001)
+                continue
+            if not self.realtime:
+                self.pump()
+                time.sleep(0)  # GIL'i bırak
+                continue
+            now = time.perf_counter()
+            for s in streams:
+                if s.active and s.next_due() <= now:
+                    s._pump()
+            delay = min(s.next_due() for s in streams) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def terminate(self):
+        self._driver_stop.set()
+        if self._driver is not None:
+            self._driver.join(timeout=1.0)
+            self._driver = None
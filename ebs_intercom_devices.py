@@ -0,0 +1,258 @@
+"""
+Cihaz kaydı: backend'in cihaz listesinin önbellekli, indeksli kopyası.
+
+Her taramada cihazları baştan dolaşıp isimleri yeniden düzeltmek /
+küçük harfe çevirmek yerine liste bir kez normalleştirilir ve id, isim
+ve rol anahtar kelimesine (reji, moderatör, konuk1 ...) göre indekslenir.
+refresh() backend'i yeniden tarar, değişmeyen cihaz kayıtlarını olduğu
+gibi korur ve yalnızca takılan / çıkarılan cihazları döndürür; indeks
+yalnızca liste değiştiğinde yeniden kurulur ve tek referansla
+yayınlanır (okuyucular kilitsiz okur).
+
+start_watch() arka planda izler: tam tarama (PortAudio'yu yeniden
+başlatır ya da ayrı süreçte tarar) yalnızca işletim sisteminin cihaz
+listesi değişince (Linux: /dev/snd, /proc/asound/cards) ya da bu işaret
+yoksa uzun aralıkla yapılır; paused() doğruyken (yayın sürerken) hiç
+yapılmaz, kullanıcı isterse refresh() doğrudan çağrılır. Değişiklik
+olunca on_change(eklenen, çıkarılan) çağrılır (GUI'de root.after ile
+kendi thread'ine taşınmalıdır).
+"""
+import os
+import threading
+import time
+
+ROLE_KEYWORDS = ("moderatör", "reji", "konuk1", "konuk2", "konuk3")
+VIRTUAL_WORDS = ("mapper", "mix", "virtual", "wave", "stereo", "default")
+WATCH_INTERVAL = 30.0  # saniye; değişiklik işareti yokken tam tarama aralığı
+TOKEN_INTERVAL = 2.0   # saniye; ucuz değişiklik işaretinin yoklanması
+
+
+def fix_turkish(text):
+    try:
+        return text.encode("latin1").decode("utf-8")
+    except:
+        return text
+
+
+def device_change_token():
+    """
+    Ses cihazı listesinin ucuz işareti (PortAudio'ya dokunmaz): değiştiyse
+    tarama gerekir. Linux'ta /dev/snd düğümleri ve /proc/asound/cards;
+    okunamazsa (diğer sistemler) None.
+    """
+    try:
+        nodes = tuple(sorted(os.listdir("/dev/snd")))
+        with open("/proc/asound/cards", "r", encoding="utf-8", errors="replace") as f:
+            cards = f.read()
+    except OSError:
+        return None
+    return nodes, cards
+
+
+def normalize_name(name):
+    """Karşılaştırma anahtarı: küçük harf, tek boşluk."""
+    return " ".join(name.casefold().split())
+
+
+def is_real_input(dev):
+    name = dev["name"].lower()
+    if dev["maxInput"] < 1:
+        return False
+    if any(bad in name for bad in VIRTUAL_WORDS):
+        return False
+    return True
+
+
+def is_real_output(dev):
+    name = dev["name"].lower()
+    if dev["maxOutput"] < 1:
+        return False
+    if any(bad in name for bad in VIRTUAL_WORDS):
+        return False
+    return True
+
+
+def role_devices(devices, real, key, role_keywords):
+    """
+    Rol anahtar kelimesine göre seçilen cihazlar: her rol için ilk cihaz;
+    2'den fazla kanallı arabirimler (kanalları kişilere dağıtılır) her zaman.
+    Dönüş: (liste, {rol: cihaz}).
+    """
+    found, roles = [], {}
+    for d in devices:
+        if d["id"] is None or not real(d):
+            continue
+        if d[key] > 2:
+            found.append(d)
+            continue
+        for role in role_keywords:
+            if role in d["norm"] and role not in roles:
+                found.append(d)
+                roles[role] = d
+                break
+    return found, roles
+
+
+class DeviceIndex:
+    """Bir taramanın değiştirilemez görünümü (cihazlar + indeksler)."""
+    def __init__(self, devices, role_keywords):
+        self.devices = tuple(devices)
+        self.by_key = {d["key"]: d for d in self.devices}
+        self.by_id = {d["id"]: d for d in self.devices if d["id"] is not None}
+        self.by_name = {}
+        for d in self.devices:
+            self.by_name.setdefault(d["norm"], []).append(d)
+        self.inputs, self.input_roles = role_devices(self.devices, is_real_input, "maxInput", role_keywords)
+        self.outputs, self.output_roles = role_devices(self.devices, is_real_output, "maxOutput", role_keywords)
+
+
+class DeviceRegistry:
+    """
+    p: ses backend'i (scan_devices). Cihaz kaydı get_devices() ile aynı
+    alanları taşır; ek olarak "norm" (normalleştirilmiş isim), "key"
+    (taramalar arası kimlik) ve "rate". "id" None ise cihaz takılı ama bu
+    süreçte henüz açılamaz (PortAudio: stream'ler kapanınca açılabilir).
+    """
+    def __init__(self, p, role_keywords=ROLE_KEYWORDS):
+        self.p = p
+        self.role_keywords = tuple(role_keywords)
+        self.version = 0
+        self._index = DeviceIndex((), self.role_keywords)
+        self._names = {}                    # ham isim -> (düzeltilmiş, normalleştirilmiş)
+        self._lock = threading.Lock()       # aynı anda tek tarama
+        self._watcher = None
+        self._watch_stop = threading.Event()
+        self.refresh()
+
+    # ---------------- Okuyucular (kilitsiz) ----------------
+    @property
+    def devices(self):
+        return self._index.devices
+
+    def inputs(self):
+        """Kişilere atanabilir mikrofonlar (rol başına ilk cihaz + çok kanallılar)."""
+        return self._index.inputs
+
+    def outputs(self):
+        return self._index.outputs
+
+    def get(self, device_id):
+        return self._index.by_id.get(device_id)
+
+    def role(self, role, want_input=True):
+        """Rol anahtar kelimesine ("reji", "konuk1" ...) düşen cihaz ya da None."""
+        index = self._index
+        return (index.input_roles if want_input else index.output_roles).get(normalize_name(role))
+
+    def find(self, ref, want_input):
+        """Config'teki cihaz: id (int) ya da isim (tam eşleşme, yoksa isim parçası) -> id."""
+        if isinstance(ref, int):
+            return ref
+        key = "maxInput" if want_input else "maxOutput"
+        norm = normalize_name(str(ref))
+        index = self._index
+        candidates = index.by_name.get(norm, ())
+        matches = [d for d in candidates if d[key] >= 1 and d["id"] is not None]
+        if not matches:
+            matches = [d for d in index.devices
+                       if d[key] >= 1 and d["id"] is not None and norm in d["norm"]]
+        if not matches:
+            raise ValueError(f"Cihaz bulunamadı: {ref!r}")
+        return matches[0]["id"]
+
+    # ---------------- Tarama ----------------
+    def describe(self, info, seen):
+        raw = info["name"]
+        names = self._names.get(raw)
+        if names is None:
+            fixed = fix_turkish(raw)
+            names = self._names[raw] = (fixed, normalize_name(fixed))
+        max_in = info.get("maxInputChannels", 0)
+        max_out = info.get("maxOutputChannels", 0)
+        # Aynı isimli cihazlar sırayla ayrılır
+        base = (names[1], info.get("hostApi"), max_in, max_out)
+        seen[base] = seen.get(base, -1) + 1
+        return {
+            "id": info.get("index"),
+            "name": names[0],
+            "maxInput": max_in,
+            "maxOutput": max_out,
+            "rate": int(round(float(info.get("defaultSampleRate", 0) or 0))),
+            "norm": names[1],
+            "key": base + (seen[base],),
+        }
+
+    def refresh(self):
+        """
+        Backend'i yeniden tarar. Dönüş: (eklenen, çıkarılan) cihaz kayıtları;
+        id'si değişen ya da açılabilir hale gelen cihaz eklenmiş sayılır.
+        """
+        with self._lock:
+            old = self._index
+            seen = {}
+            devices = []
+            for info in self.p.scan_devices():
+                dev = self.describe(info, seen)
+                prev = old.by_key.get(dev["key"])
+                devices.append(prev if prev == dev else dev)
+            keys = {d["key"] for d in devices}
+            added = [d for d in devices if old.by_key.get(d["key"]) is not d]
+            removed = [d for d in old.devices if d["key"] not in keys]
+            if added or removed or not self.version:
+                self._index = DeviceIndex(devices, self.role_keywords)
+                self.version += 1
+            return added, removed
+
+    # ---------------- Arka plan izleme ----------------
+    def start_watch(self, interval=WATCH_INTERVAL, on_change=None, paused=None):
+        """
+        Cihaz değişikliği işareti değişince ya da en geç interval saniyede
+        bir refresh(); değişiklikte on_change(eklenen, çıkarılan).
+        paused: doğru döndürdükçe (ör. stream'ler açıkken) tarama ertelenir.
+        """
+        if self._watcher is not None:
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            token = device_change_token()
+            poll = min(TOKEN_INTERVAL, interval) if token is not None else interval
+            last_scan = time.monotonic()
+            pending = deferred = False
+            while not self._watch_stop.wait(poll):
+                if token is not None:
+                    fresh = device_change_token()
+                    if fresh != token:
+                        token, pending = fresh, True
+                if time.monotonic() - last_scan >= interval:
+                    pending = True
+                if not pending:
+                    continue
+                if paused is not None and paused():
+                    if token is not None and not deferred:
+                        print("[INFO] Cihaz değişikliği algılandı; yayın sürerken taranmıyor "
+                              "(🔄 Cihazları Yenile ile taranabilir)")
+                    deferred = True
+                    continue
+                pending = deferred = False
+                last_scan = time.monotonic()
+                try:
+                    added, removed = self.refresh()
+                except Exception as e:
+                    print(f"[Cihaz HATASI]: {e}")
+                    continue
+                for d in added:
+                    print(f'[INFO] Cihaz takıldı: {d["id"]} - {d["name"]}')
+                for d in removed:
+                    print(f'[INFO] Cihaz çıkarıldı: {d["id"]} - {d["name"]}')
+                if (added or removed) and on_change is not None:
+                    on_change(added, removed)
+
+        self._watcher = threading.Thread(target=watch, daemon=True)
+        self._watcher.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2.0)
+            self._watcher = None
@@ -0,0 +1,2377 @@
+"""
+EBS Intercom ses motoru: routing matrisi, kontrol durumu, mix bus ve
+stream sağlığı. Tkinter/ttkbootstrap içe aktarmaz; GUI olmadan da
+(rack makinelerinde) çalışır:
+
+    python -m ebs_intercom_engine --config show.json
+    python -m ebs_intercom_engine --list-devices
+"""
+import argparse
+import json
+import threading
+import time
+import numpy as np
+
+from ebs_intercom_devices import DeviceRegistry, fix_turkish
+from ebs_intercom_metering import MeterFeed, Metering
+from ebs_intercom_presets import PRESET_FADE_MS, PresetLibrary
+from ebs_intercom_recorder import ShowRecorder
+from ebs_intercom_resample import DeviceClock, DriftController, to_int16
+from ebs_intercom_scenes import Scene, SceneScheduler, SceneStore
+from ebs_intercom_backend import (
+    paContinue, paInputOverflow, paOutputUnderflow, paOutputUnderflowed,
+    PyAudioBackend, SimBackend,
+)
+
+RATE = 48000
+CHUNK = 1024
+CHANNELS = 1  # kişi başına kanal; cihazlar tüm kanallarıyla açılır (int16)
+MAX_PEOPLE = 32  # canlı ekleme üst sınırı
+METER_HISTORY = 60.0  # saniye; ölçüm geçmişi (kanal başına)
+METER_INTERVAL = 0.02  # saniye; blocking modunda ölçüm thread'inin yoklama aralığı
+
+# Buffer boyutu profilleri (frame). 128 @ 48kHz ≈ 2.7 ms / buffer
+LATENCY_PROFILES = {
+    "Ultra Düşük (128)": 128,
+    "Düşük (256)": 256,
+    "Normal (512)": 512,
+    "Güvenli (1024)": 1024,
+}
+
+
+
+def rms_level(int16_audio: np.ndarray):
+    if int16_audio.size == 0:
+        return 0.0
+    rms = np.sqrt(np.mean(int16_audio.astype(np.float32) ** 2))
+    level = (rms / 32768.0) * 100.0
+    return float(np.clip(level, 0, 100))
+
+
+# ---------------- Cihaz + kanal adresleme ----------------
+def endpoint(ref):
+    """
+    Cihaz adresi -> (cihaz id, kanal), kanal 0'dan sayılır.
+    (3, 1) -> (3, 1); "3:2" -> (3, 1) (metinde kanal 1'den sayılır).
+    Kanalsız adres (3, "3") -> (3, None): cihaz eskisi gibi tek kanallı
+    açılır (stereo kulaklıkta sürücü iki kulağa da verir); aynı cihazda
+    kanallı adres de varsa kanal 1 kullanılır.
+    """
+    if isinstance(ref, (tuple, list)):
+        return int(ref[0]), (None if ref[1] is None else int(ref[1]))
+    if isinstance(ref, str):
+        dev, _, ch = ref.strip().partition(":")
+        return int(dev), (int(ch) - 1 if ch else None)
+    return int(ref), None
+
+
+def endpoint_label(device_id, channel, channels=1):
+    """Tek kanallı cihazda "3", çok kanallıda "3:2" (kanal 1'den)."""
+    return f"{device_id}" if channels == 1 else f"{device_id}:{channel + 1}"
+
+
+def device_channels(p, device_id, want_input, channel=0):
+    """
+    Cihazın tüm kanal sayısı (stream tek seferde bununla açılır); kanalsız
+    adreste 1. İstenen kanal cihazda yoksa ValueError.
+    """
+    if channel is None:
+        return CHANNELS
+    info = p.get_device_info_by_index(device_id)
+    key = "maxInputChannels" if want_input else "maxOutputChannels"
+    channels = max(1, int(info.get(key, 1)))
+    if channel >= channels:
+        raise ValueError(f"Cihaz {device_id} {channels} kanallı; kanal {channel + 1} yok")
+    return channels
+
+
+def negotiate_rate(p, device_id, want_input, channels):
+    """
+    Cihazın açılacağı örnekleme hızı: RATE destekleniyorsa o, değilse
+    cihazın varsayılan hızı (aradaki dönüşümü DeviceClock yapar).
+    """
+    if p.is_format_supported(RATE, device_id, channels, want_input):
+        return RATE
+    info = p.get_device_info_by_index(device_id)
+    return int(round(float(info.get("defaultSampleRate", RATE))))
+
+
+def impulse_template(rate=RATE):
+    """Algılaması kolay kısa, pencereli 2 kHz burst (≈1.5 ms)."""
+    n = int(rate * 0.0015)
+    t = np.arange(n, dtype=np.float32) / rate
+    return (np.sin(2 * np.pi * 2000 * t) * np.hanning(n) * 24000).astype(np.float32)
+
+
+def measure_loopback_latency(p, mic_id, out_id, chunk=CHUNK, rate=RATE, duration=1.0):
+    """
+    out_id çıkışına bir impuls çalar ve mic_id mikrofonunda geri dönüşünü
+    arar (kulaklık mikrofona tutulmalı ya da loopback kablosu takılmalı).
+    Dönüş: çıkış+giriş cihaz gecikmesi (ms) ya da algılanamadıysa None.
+    """
+    mic_id, mic_ch = endpoint(mic_id)
+    out_id, out_ch = endpoint(out_id)
+    in_channels = device_channels(p, mic_id, True, mic_ch)
+    out_channels = device_channels(p, out_id, False, out_ch)
+    mic_ch, out_ch = mic_ch or 0, out_ch or 0
+    out_s = p.open(channels=out_channels, rate=rate, output=True,
+                   frames_per_buffer=chunk, output_device_index=out_id)
+    in_s = p.open(channels=in_channels, rate=rate, input=True,
+                  frames_per_buffer=chunk, input_device_index=mic_id)
+    try:
+        template = impulse_template(rate)
+        blocks = int(duration * rate / chunk) + 1
+        preroll = max(2, int(0.1 * rate / chunk))  # streamler otursun
+
+        # İmpuls yalnızca ölçülen çıkış kanalına
+        silence = np.zeros((chunk, out_channels), dtype=np.int16)
+        impulse = silence.copy()
+        impulse[:len(template), out_ch] = template[:chunk].astype(np.int16)
+        captured = np.zeros(blocks * chunk, dtype=np.int16)
+
+        # Yazma/okuma aynı thread'de sırayla: örnek sayıları ortak zaman ekseni
+        for k in range(blocks):
+            out_s.write((impulse if k == preroll else silence).tobytes())
+            data = in_s.read(chunk, exception_on_overflow=False)
+            captured[k * chunk:(k + 1) * chunk] = \
+                np.frombuffer(data, dtype=np.int16).reshape(-1, in_channels)[:, mic_ch]
+    finally:
+        for st in (out_s, in_s):
+            try:
+                st.stop_stream()
+                st.close()
+            except:
+                pass
+
+    sent_at = preroll * chunk
+    search = captured[sent_at:].astype(np.float32)
+    if search.size < len(template):
+        return None
+    corr = np.abs(np.correlate(search, template, mode="valid"))
+    peak = int(np.argmax(corr))
+    noise = float(np.median(corr)) + 1e-9
+    if corr[peak] < noise * 8:
+        return None
+    return peak * 1000.0 / rate
+
+
+class AudioRing:
+    """
+    Önceden ayrılmış int16 halka buffer (tek yazar, çok okuyucu).
+    Yazar yalnızca write_pos'u ilerletir; her okuyucu kendi okuma
+    konumunu tutar, böylece hiçbir tarafta kilit gerekmez.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = np.zeros(capacity, dtype=np.int16)
+        self.write_pos = 0  # toplam yazılan örnek sayısı (monoton)
+
+    def push(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        pos = self.write_pos % self.capacity
+        first = min(n, self.capacity - pos)
+        self.buf[pos:pos + first] = samples[:first]
+        if first < n:
+            self.buf[:n - first] = samples[first:]
+        # Veri yazıldıktan sonra yayınla (okuyucular yarım blok görmez)
+        self.write_pos += n
+
+    def read_into(self, read_pos, out, max_lag):
+        """
+        read_pos'tan len(out) örnek kopyalar, yeni okuma konumunu döndürür.
+        Yeterli veri yoksa sessizlik yazar; okuyucu max_lag'den fazla
+        geride kalırsa en yeni veriye atlar (gecikme birikmez).
+        """
+        n = len(out)
+        write_pos = self.write_pos
+        available = write_pos - read_pos
+        if available < n:
+            out[:] = 0
+            return read_pos
+        if available > max_lag:
+            read_pos = write_pos - n
+
+        pos = read_pos % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self.buf[pos:pos + first]
+        if first < n:
+            out[first:] = self.buf[:n - first]
+        return read_pos + n
+
+    def latest(self, n):
+        """VU için son n örneğin kopyası."""
+        out = np.zeros(n, dtype=np.int16)
+        if self.write_pos >= n:
+            self.read_into(self.write_pos - n, out, self.capacity)
+        return out
+
+
+# Çapraz nokta seviyesi (dB) sınırları
+LEVEL_MIN_DB = -40.0
+LEVEL_MAX_DB = 6.0
+
+
+def db_to_gain(db):
+    return float(10.0 ** (db / 20.0))
+
+
+def gain_to_db(gain):
+    if gain <= 0:
+        return LEVEL_MIN_DB
+    return float(np.clip(20.0 * np.log10(gain), LEVEL_MIN_DB, LEVEL_MAX_DB))
+
+
+class RoutingMatrix:
+    """
+    NxN float32 routing matrisi: [konuşan, dinleyen] -> kazanç (0 = kapalı).
+    Yazarlar kopyala-değiştir-yayınla yapar ve (sürüm, matris) çiftini tek
+    referans olarak değiştirir; okuyucular hiç kilit almaz ve matrisi
+    sürüm değişene kadar önbellekte tutabilir.
+
+    load(..., fade_ms) eski matristen yenisine zamanla geçer (canlı preset
+    değişimi): geçiş boyunca snapshot() ara matrisi FADE_STEPS adımda
+    verir, her adım MixDsp rampasıyla buffer içinde yumuşatılır.
+    """
+    FADE_STEPS = 32
+
+    def __init__(self, n):
+        self._write_lock = threading.Lock()  # yalnızca yazarlar arasında
+        self.current = (0, self._freeze(np.zeros((n, n), dtype=np.float32)))
+        # Kapalı çapraz noktalar da seviyesini hatırlar (aç/kapa korur)
+        self.levels_db = np.zeros((n, n), dtype=np.float32)
+        self.fade = None        # (eski matris, başlangıç, süre sn) ya da None
+        self._fade_step = None  # ((sürüm, adım), ara matris) önbelleği
+
+    @staticmethod
+    def _freeze(matrix):
+        matrix.flags.writeable = False
+        return matrix
+
+    def snapshot(self, now=None):
+        """
+        (version, matrix) — matris salt-okunurdur. Geçiş sürüyorsa sürüm
+        (version, adım) olur ve matris eski/yeni karışımıdır. now: geçiş
+        saati (varsayılan time.monotonic(); offline render kendi saatini verir).
+        """
+        fade = self.fade
+        if fade is None:
+            return self.current
+        version, target = self.current
+        old, start, seconds = fade
+        if now is None:
+            now = time.monotonic()
+        step = int((now - start) / seconds * self.FADE_STEPS)
+        if step >= self.FADE_STEPS or old.shape != target.shape:
+            # Geçiş bitti (ya da bu arada kişi eklendi/çıkarıldı)
+            if self.fade is fade:
+                self.fade = None
+            return self.current
+        key = (version, max(step, 0))
+        cached = self._fade_step
+        if cached is None or cached[0] != key:
+            t = np.float32((key[1] + 1) / self.FADE_STEPS)
+            cached = self._fade_step = (key, self._freeze(old + (target - old) * t))
+        return cached
+
+    @property
+    def version(self):
+        return self.current[0]
+
+    @property
+    def matrix(self):
+        return self.current[1]
+
+    @property
+    def size(self):
+        return self.current[1].shape[0]
+
+    def get(self, i, j):
+        return float(self.current[1][i, j])
+
+    def level_db(self, i, j):
+        return float(self.levels_db[i, j])
+
+    def load(self, matrix, fade_ms=0.0, now=None):
+        """
+        Tüm matrisi yayınla (preset yükleme vb.). fade_ms > 0: ses yolu o
+        anki matristen yenisine bu sürede geçer (now: snapshot ile aynı saat).
+        """
+        matrix = np.array(matrix, dtype=np.float32)
+        np.fill_diagonal(matrix, 0.0)  # kimse kendini duymaz
+        with self._write_lock:
+            on = matrix > 0
+            self.levels_db[on] = [gain_to_db(g) for g in matrix[on]]
+            fade = None
+            if fade_ms > 0:
+                # Süren bir geçişin ortasından başlanır (sıçrama olmaz)
+                old = self.snapshot(now)[1]
+                if old.shape == matrix.shape:
+                    start = time.monotonic() if now is None else now
+                    fade = (old, start, fade_ms / 1000.0)
+            self.fade = fade
+            self.current = (self.current[0] + 1, self._freeze(matrix))
+
+    def set(self, i, j, value):
+        if i == j:
+            return
+        with self._write_lock:
+            version, matrix = self.current
+            matrix = matrix.copy()
+            matrix[i, j] = value
+            self.current = (version + 1, self._freeze(matrix))
+
+    def apply_cells(self, rows, cols, values):
+        """Yalnızca verilen çapraz noktaları değiştirip tek seferde yayınlar (sahne geri çağırma)."""
+        with self._write_lock:
+            version, matrix = self.current
+            matrix = matrix.copy()
+            matrix[rows, cols] = values
+            np.fill_diagonal(matrix, 0.0)
+            on = matrix[rows, cols] > 0
+            self.levels_db[np.asarray(rows)[on], np.asarray(cols)[on]] = [
+                gain_to_db(g) for g in matrix[rows, cols][on]]
+            self.current = (version + 1, self._freeze(matrix))
+
+    def set_level_db(self, i, j, db):
+        """Seviyeyi (dB) değiştirir; çapraz nokta açıksa hemen yayınlar."""
+        db = float(np.clip(db, LEVEL_MIN_DB, LEVEL_MAX_DB))
+        self.levels_db[i, j] = db
+        if self.get(i, j):
+            self.set(i, j, db_to_gain(db))
+        return db
+
+    def toggle(self, i, j):
+        """Çapraz noktayı aç/kapa (son seviyesiyle), yeni değeri döndürür."""
+        value = 0.0 if self.get(i, j) else db_to_gain(self.levels_db[i, j])
+        self.set(i, j, value)
+        return value
+
+    def add_person(self, sends=None, hears=None):
+        """
+        Matrisi bir kişi büyütür ve yayınlar. sends: yeni kişiyi duyacak
+        dinleyenler (uzunluk N), hears: yeni kişinin duyacağı konuşanlar;
+        verilmezse herkes birbirini duyar.
+        """
+        with self._write_lock:
+            version, matrix = self.current
+            n = matrix.shape[0]
+            grown = np.zeros((n + 1, n + 1), dtype=np.float32)
+            grown[:n, :n] = matrix
+            grown[n, :n] = 1.0 if sends is None else sends
+            grown[:n, n] = 1.0 if hears is None else hears
+            levels = np.zeros((n + 1, n + 1), dtype=np.float32)
+            levels[:n, :n] = self.levels_db
+            self.levels_db = levels
+            self.current = (version + 1, self._freeze(grown))
+
+    def remove_person(self, i):
+        """i. kişinin satır ve sütununu çıkarıp yayınlar."""
+        with self._write_lock:
+            version, matrix = self.current
+            keep = [k for k in range(matrix.shape[0]) if k != i]
+            self.levels_db = self.levels_db[np.ix_(keep, keep)]
+            self.current = (version + 1, self._freeze(matrix[np.ix_(keep, keep)]))
+
+
+class ControlState:
+    """
+    Kişi başına kontrol durumu (gain, mute, PTT modu, PTT basılı,
+    gürültü kapısı açık/kapalı, öncelik/ducking).
+    GUI thread'i her değişiklikte yeni, salt-okunur bir dizi yayınlar
+    (referans değişimi); ses thread'leri yalnızca self.state'i okur,
+    Tkinter/Tcl değişkenlerine hiç dokunmaz.
+    """
+    GAIN, MUTE, PTT_ENABLED, PTT_PRESSED, GATE, PRIORITY = range(6)
+
+    def __init__(self, n):
+        state = np.zeros((n, 6), dtype=np.float32)
+        state[:, self.GAIN] = 1.0
+        self.version = 0
+        self._swap(state)
+
+    def _swap(self, state):
+        # Önce dizi, sonra sürüm: sürümü önce okuyan okuyucu en kötü
+        # ihtimalle bir kez fazladan yeniden hesaplar
+        state.flags.writeable = False
+        self.state = state
+        self.version += 1
+
+    @property
+    def size(self):
+        return self.state.shape[0]
+
+    def publish(self, i, gain, mute, ptt_enabled, ptt_pressed, gate=False, priority=False):
+        state = self.state.copy()
+        state[i] = (gain, mute, ptt_enabled, ptt_pressed, gate, priority)
+        self._swap(state)
+
+    def update(self, rows, columns, values):
+        """Birden çok kişinin seçili alanlarını tek yayında değiştirir (values: rows x columns)."""
+        state = self.state.copy()
+        state[np.ix_(rows, columns)] = values
+        self._swap(state)
+
+    def add(self, gain=1.0, mute=False, ptt_enabled=False, ptt_pressed=False, gate=False,
+            priority=False):
+        """Sona yeni kişi ekler."""
+        row = np.array([[gain, mute, ptt_enabled, ptt_pressed, gate, priority]], dtype=np.float32)
+        self._swap(np.vstack([self.state, row]))
+
+    def remove(self, i):
+        self._swap(np.delete(self.state, i, axis=0))
+
+    def gains(self, state=None):
+        """Mute/PTT/Gain durumundan kişi başına efektif kazanç vektörü."""
+        s = self.state if state is None else state
+        open_ = (s[:, self.MUTE] == 0) & ((s[:, self.PTT_ENABLED] == 0) | (s[:, self.PTT_PRESSED] != 0))
+        return s[:, self.GAIN] * open_
+
+    def gate_mask(self, state=None):
+        s = self.state if state is None else state
+        return s[:, self.GATE] != 0
+
+    def priority_mask(self, state=None):
+        s = self.state if state is None else state
+        return s[:, self.PRIORITY] != 0
+
+
+class NoiseGate:
+    """
+    Giriş başına ses etkinliği algılama / gürültü kapısı, N giriş için tek
+    seferde. Buffer enerjisi eşiği aşıyorsa ve sıfır geçiş oranı
+    konuşmaya uygunsa (hışırtı/fan gürültüsü yüksek ZCR verir) ya da enerji
+    eşiğin 10 dB üstündeyse kapı açılır. attack/hold/release ile kapı
+    kazancı buffer başına değişir; MixDsp rampası bu değişimi buffer
+    içinde klik olmadan uygular. Ek gecikme yoktur: karar o buffer'ın
+    kendi verisiyle verilir.
+    """
+    def __init__(self, n, threshold_db=-45.0, zcr_max=0.25, attack_ms=5.0,
+                 hold_ms=250.0, release_ms=150.0, rate=RATE):
+        self.threshold = (10.0 ** (threshold_db / 10.0)) * 32768.0 ** 2  # int16 ölçeğinde ortalama kare
+        self.loud = self.threshold * 10.0
+        self.zcr_max = zcr_max
+        self.attack_ms = attack_ms
+        self.hold_ms = hold_ms
+        self.release_ms = release_ms
+        self.rate = rate
+
+        self.gain = np.zeros(n, dtype=np.float32)
+        self.hold_left = np.zeros(n, dtype=np.float32)
+        self.is_open = np.zeros(n, dtype=bool)
+
+    def process(self, frames):
+        """frames: N x M float32 (int16 ölçeği). Dönüş: kapı kazancı (N, 0..1)."""
+        m = frames.shape[1]
+        buffer_ms = m * 1000.0 / self.rate
+        ms = np.einsum("ij,ij->i", frames, frames) / m
+        sign = np.signbit(frames)
+        zcr = np.count_nonzero(sign[:, 1:] != sign[:, :-1], axis=1) / m
+
+        voiced = (ms > self.threshold) & ((zcr < self.zcr_max) | (ms > self.loud))
+        self.hold_left = np.where(voiced, self.hold_ms,
+                                  np.maximum(self.hold_left - buffer_ms, 0)).astype(np.float32)
+        self.is_open = voiced | (self.hold_left > 0)
+
+        up = min(1.0, buffer_ms / self.attack_ms) if self.attack_ms > 0 else 1.0
+        down = min(1.0, buffer_ms / self.release_ms) if self.release_ms > 0 else 1.0
+        self.gain = np.where(self.is_open, np.minimum(self.gain + up, 1.0),
+                             np.maximum(self.gain - down, 0.0)).astype(np.float32)
+        return self.gain
+
+
+class Ducker:
+    """
+    Öncelikli giriş (Reji/IFB) konuşurken dinleyen başına diğer kaynakları
+    depth_db kadar kısar. Karar o buffer'ın kendi NoiseGate etkinliğiyle
+    verilir (ek gecikme yok); çıkış başına duck kazancı attack/release ile
+    buffer başına adım adım değişir, MixDsp rampası bunu buffer içinde
+    yumuşatır. Yalnızca öncelikli kaynağı gerçekten duyan dinleyenin
+    karışımı kısılır; öncelikli girişlerin kendisi kısılmaz.
+    """
+    def __init__(self, n_outputs, depth_db=-15.0, attack_ms=10.0, release_ms=400.0, rate=RATE):
+        self.floor = db_to_gain(depth_db)
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+        self.rate = rate
+        self.gain = np.ones(n_outputs, dtype=np.float32)
+
+    @property
+    def engaged(self):
+        return bool((self.gain < 1.0).any())
+
+    def remap(self, old_keys, new_keys):
+        """Çıkış sütunları değişince duck kazancını uç kimliğiyle taşır; yeni sütunlar 1."""
+        old = dict(zip(old_keys, self.gain.tolist()))
+        self.gain = np.array([old.get(k, 1.0) for k in new_keys], dtype=np.float32)
+
+    def process(self, weights, priority, talking, frame_count):
+        """
+        weights: N x D, priority/talking: N bool. Dönüş: öncelikli
+        olmayan satırları çıkış başına duck kazancıyla ölçeklenmiş ağırlıklar.
+        """
+        buffer_ms = frame_count * 1000.0 / self.rate
+        ducked = (weights[priority & talking] > 0).any(axis=0)
+        span = 1.0 - self.floor
+        down = span * min(1.0, buffer_ms / self.attack_ms) if self.attack_ms > 0 else span
+        up = span * min(1.0, buffer_ms / self.release_ms) if self.release_ms > 0 else span
+        self.gain = np.where(ducked, np.maximum(self.gain - down, self.floor),
+                             np.minimum(self.gain + up, 1.0)).astype(np.float32)
+        if not self.engaged:
+            return weights
+        return weights * np.where(priority[:, None], np.float32(1.0), self.gain[None, :])
+
+
+class MixDsp:
+    """
+    Önceden ayrılmış buffer'larla çalışan DSP aşaması. Giriş yükleme,
+    rampalı karışım, clip, int16 dönüşümü ve RMS ölçümü yerinde (out=)
+    yapılır; buffer başına yeni NumPy dizisi ayrılmaz.
+    """
+    def __init__(self, n_inputs, n_outputs, chunk):
+        self.chunk = chunk
+        self.frames = np.zeros((n_inputs, chunk), dtype=np.float32)
+        self.ramp = np.arange(1, chunk + 1, dtype=np.float32) / chunk
+
+        self.mix_buf = np.zeros((n_outputs, chunk), dtype=np.float32)
+        self.out = np.zeros((n_outputs, chunk), dtype=np.int16)
+
+        self._ramped = np.zeros_like(self.frames)
+        self._delta = np.zeros((n_inputs, n_outputs), dtype=np.float32)
+        self._tmp = np.zeros_like(self.mix_buf)
+        self._levels = np.zeros(n_inputs, dtype=np.float32)
+        # Atlanan girişler varken etkin satırlar buraya toplanır (np.take out=)
+        self._active_frames = np.zeros_like(self.frames)
+        self._active_prev = np.zeros_like(self._delta)
+        self._active_weights = np.zeros_like(self._delta)
+
+    def load_input(self, i, data):
+        """PyAudio bytes -> frames[i]; frombuffer kopyasız görünümdür."""
+        self.frames[i] = np.frombuffer(data, dtype=np.int16)
+
+    def load_device(self, rows, data, channels):
+        """
+        Çok kanallı iç içe bytes -> kişi satırları. rows: (satır, kanal)
+        çiftleri; her kanal strided görünümle doğrudan frames[satır]'a yazılır.
+        """
+        x = np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+        for i, ch in rows:
+            self.frames[i] = x[:, ch]
+
+    def levels(self):
+        """Giriş başına RMS seviyesi (0..100, rms_level ile aynı ölçek)."""
+        lv = self._levels
+        np.einsum("ij,ij->i", self.frames, self.frames, out=lv)
+        np.multiply(lv, 1.0 / self.chunk, out=lv)
+        np.sqrt(lv, out=lv)
+        np.multiply(lv, 100.0 / 32768.0, out=lv)
+        np.clip(lv, 0, 100, out=lv)
+        return lv
+
+    def mix(self, prev, weights, active=None):
+        """
+        prev/weights: N x D (mix_weights). prev != weights ise geçiş buffer
+        boyunca doğrusal rampa ile yapılır (gain/routing/mute değişiminde
+        klik olmaz). active: karışıma giren satırlar (sessiz/kapalı girişler
+        atlanır); verilmezse hepsi. Dönüş: self.out (D x CHUNK int16, bir
+        sonraki çağrıda üzerine yazılır).
+        """
+        frames = self.frames
+        ramped = self._ramped
+        delta = self._delta
+        if active is not None and len(active) < len(frames):
+            # mode="clip": indeksler geçerli; "raise" out'u ara kopyayla doldurur
+            k = len(active)
+            frames = np.take(frames, active, axis=0, out=self._active_frames[:k], mode="clip")
+            prev = np.take(prev, active, axis=0, out=self._active_prev[:k], mode="clip")
+            weights = np.take(weights, active, axis=0, out=self._active_weights[:k], mode="clip")
+            ramped = ramped[:k]
+            delta = delta[:k]
+        np.matmul(prev.T, frames, out=self.mix_buf)
+        if prev is not weights and not np.array_equal(prev, weights):
+            np.multiply(frames, self.ramp, out=ramped)
+            np.subtract(weights, prev, out=delta)
+            np.matmul(delta.T, ramped, out=self._tmp)
+            np.add(self.mix_buf, self._tmp, out=self.mix_buf)
+        np.clip(self.mix_buf, -32768, 32767, out=self.mix_buf)
+        np.copyto(self.out, self.mix_buf, casting="unsafe")
+        return self.out
+
+
+def gate_weights(gate, ducker, frames, weights, gate_mask, priority):
+    """
+    Kapısı etkin girişlerin ağırlıklarını kapı kazancıyla ölçekler,
+    öncelikli giriş konuşuyorsa diğerlerini duck eder. VAD yalnızca
+    ikisinden biri kullanılıyorsa çalışır. frames: N x M (bu buffer).
+    """
+    ducking = priority.any() or ducker.engaged
+    if not (gate_mask.any() or ducking):
+        return weights
+    g = gate.process(frames)
+    if gate_mask.any():
+        weights = weights * np.where(gate_mask, g, 1.0).astype(np.float32)[:, None]
+    if ducking:
+        weights = ducker.process(weights, priority, gate.is_open, frames.shape[1])
+    return weights
+
+
+def active_rows(prev, weights):
+    """Önceki ya da yeni ağırlığı sıfırdan farklı satırlar: yalnızca bunlar karışıma girer."""
+    return np.flatnonzero(prev.any(axis=1) | weights.any(axis=1))
+
+
+class StreamHealth:
+    """
+    Tek bir stream'in sağlık sayaçları (overflow, underrun, hata, yazma
+    süresi) ve başarısız stream için üstel geri çekilmeli yeniden açma
+    zamanlaması. Yalnızca sorunlu stream yeniden açılır.
+    """
+    ERROR_LIMIT = 3            # art arda hata -> stream başarısız
+    XRUN_LIMIT = 20            # XRUN_WINDOW içinde bu kadar xrun -> başarısız
+    XRUN_WINDOW = 5.0          # saniye
+    BACKOFF_MIN = 0.5
+    BACKOFF_MAX = 30.0
+    STABLE_AFTER = 30.0        # bu kadar sorunsuz çalışınca geri çekilme sıfırlanır
+
+    def __init__(self, name):
+        self.name = name
+        self.overflows = 0
+        self.underruns = 0
+        self.errors = 0
+        self.reopens = 0
+        self.write_ms = 0.0        # üstel ortalama
+        self.max_write_ms = 0.0
+        self.last_error = ""
+
+        self.failed = False
+        self.consecutive_errors = 0
+        self.backoff = self.BACKOFF_MIN
+        self.next_retry = 0.0
+        self.failed_at = 0.0
+        self._xrun_times = []
+
+    def record_xrun(self, now, overflow):
+        if overflow:
+            self.overflows += 1
+        else:
+            self.underruns += 1
+        self._xrun_times.append(now)
+        while self._xrun_times and now - self._xrun_times[0] > self.XRUN_WINDOW:
+            self._xrun_times.pop(0)
+        if len(self._xrun_times) >= self.XRUN_LIMIT:
+            self._xrun_times = []
+            self.mark_failed(now, "xrun fırtınası")
+
+    def record_write(self, ms):
+        self.write_ms = self.write_ms * 0.95 + ms * 0.05
+        self.max_write_ms = max(self.max_write_ms, ms)
+
+    def record_error(self, now, e):
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.last_error = str(e)
+        if self.consecutive_errors >= self.ERROR_LIMIT:
+            self.mark_failed(now, e)
+
+    def record_ok(self, now):
+        self.consecutive_errors = 0
+        if self.backoff > self.BACKOFF_MIN and now - self.failed_at > self.STABLE_AFTER:
+            self.backoff = self.BACKOFF_MIN
+
+    def mark_failed(self, now, reason):
+        if self.failed:
+            return
+        print(f"[Sağlık] {self.name} başarısız: {reason}")
+        self.failed = True
+        self.failed_at = now
+        self.next_retry = now + self.backoff
+        # Açılıp hemen yeniden düşen stream her seferinde daha geç denenir
+        self.backoff = min(self.backoff * 2, self.BACKOFF_MAX)
+
+    def due_for_reopen(self, now):
+        return self.failed and now >= self.next_retry
+
+    def reopened(self, ok, now):
+        """Yeniden açma sonucu: başarısızsa geri çekilme süresi ikiye katlanır."""
+        if ok:
+            self.reopens += 1
+            self.failed = False
+            self.consecutive_errors = 0
+        else:
+            self.backoff = min(self.backoff * 2, self.BACKOFF_MAX)
+            self.next_retry = now + self.backoff
+
+    def summary(self):
+        return {
+            "stream": self.name,
+            "durum": "HATA" if self.failed else "OK",
+            "overflow": self.overflows,
+            "underrun": self.underruns,
+            "hata": self.errors,
+            "yeniden_acma": self.reopens,
+            "yazma_ms": round(self.write_ms, 2),
+            "max_yazma_ms": round(self.max_write_ms, 2),
+        }
+
+
+class LoopProfile:
+    """
+    Buffer başına işlem süreleri (saniye), önceden ayrılmış halka dizide.
+    Benchmark ve teşhis için; sim backend'in hızlı modunda okuma/yazma
+    beklemesi olmadığından saf işlem süresini verir.
+    """
+    def __init__(self, capacity=200000):
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def record(self, seconds):
+        self.times[self.count % len(self.times)] = seconds
+        self.count += 1
+
+    def values(self):
+        return self.times[:min(self.count, len(self.times))]
+
+
+class InputDevice:
+    """
+    Fiziksel giriş cihazı: tüm kanallarıyla tek stream ve sağlık sayaçları.
+    Aynı cihazın farklı kanallarındaki kişiler bu stream'i paylaşır.
+    """
+    def __init__(self, device_id, channels=1):
+        self.device_id = device_id
+        self.channels = channels
+        self.stream = None
+        self.health = StreamHealth(f"mic (cihaz {device_id})")
+        self.rate = RATE        # açılışta anlaşılan örnekleme hızı
+        self.chunk = None       # cihaz hızında buffer boyutu
+        self.clock = None       # DeviceClock: hız farkı / drift telafisi
+        self.push_time = 0.0    # callback modu: son buffer'ın halkaya yazıldığı an
+        # Canlı eklenen stream ilk buffer'ı dolana kadar okunmaz (blocking
+        # modunda ilk read tüm döngüyü bekletip diğer girişleri geride bırakır)
+        self.primed = True
+
+
+class InputSlot:
+    """Bir kişinin mikrofonu: cihaz + kanal, halka buffer ve kapı durumu."""
+    def __init__(self, device, channel, chunk, vu_callback=None):
+        self.device = device
+        self.channel = channel
+        self.vu_callback = vu_callback
+        self.name = f"mic (cihaz {endpoint_label(device.device_id, channel, device.channels)})"
+        # Callback modu; ölçüm 50 ms'de bir okuduğundan en az 200 ms tutar
+        self.ring = AudioRing(max(chunk * 8, RATE // 5))
+        self.gate = None  # callback modu: kendi NoiseGate'i (MixBus kurar)
+        self.read_pos = None  # blocking modu: saatli cihazın halka okuma konumu
+
+    @property
+    def mic_id(self):
+        return (self.device.device_id, self.channel)
+
+
+class OutputSlot:
+    """
+    Bir çıkış cihazı: tüm kanallarıyla tek stream ve sağlık sayaçları.
+    Callback modunda cihazın kendi DSP aşaması (kullanılan kanal başına bir
+    karışım), giriş slotu başına okuma konumu ve rampa için önceki ağırlık
+    sütunları burada tutulur.
+    """
+    def __init__(self, device_id, chunk, channels=1):
+        self.device_id = device_id
+        self.channels = channels
+        self.stream = None
+        self.health = StreamHealth(f"çıkış (cihaz {device_id})")
+        self.rate = RATE
+        self.chunk = None
+        self.clock = None
+        self.queue_capacity = 0     # blocking modu: görülen en büyük boş yer (frame)
+        self.dsp = None
+        # Callback modu: ölçüm için kanal başına karışım
+        self.taps = [AudioRing(max(chunk * 8, RATE // 5)) for _ in range(channels)]
+        self.read_pos = {}          # InputSlot -> halka okuma konumu
+        self.read_time = 0.0        # halkalardan son okuma anı (doluluk ara değeri için)
+        self.layout = None          # prev_weights'in ait olduğu düzen
+        self.prev_weights = None
+        self.ducker = None          # callback modu: bu cihazın kanallarının ducking durumu
+        self.cols = []              # callback modu: bu cihaza düşen karışım sütunları
+        self.out_columns = []       # (dsp çıkış satırı, kanal) çiftleri
+        self._frame = None          # çok kanallı iç içe yazma buffer'ı (M x C)
+        self._frame_columns = None
+        # Callback modu, saatli cihaz: cihaz hızında kanal başına bekleyen örnekler
+        self.fifo = np.zeros((channels, 0), dtype=np.float32)
+        self.fifo_fill = 0
+        self.fifo_columns = []      # (fifo satırı, kanal) = kullanılan kanallar
+
+    def interleave(self, out, columns):
+        """
+        out (D x M) karışımının bu cihaza düşen satırlarını M x C iç içe
+        buffer'ın kanal sütunlarına (strided görünüm) yazar. Tek kanallı
+        cihazda satırın kendisi döner, kopya yapılmaz. M buffer'dan
+        buffer'a değişebilir (yeniden örneklenen cihaz).
+        """
+        if self.channels == 1:
+            return out[columns[0][0]]
+        m = out.shape[1]
+        frame = self._frame
+        if frame is None or frame.shape[0] < m or self._frame_columns != columns:
+            # Kullanılmayan kanallar sessiz kalır
+            frame = self._frame = np.zeros((m + 16, self.channels), dtype=np.int16)
+            self._frame_columns = list(columns)
+        frame = frame[:m]
+        for d, ch in columns:
+            frame[:, ch] = out[d]
+        return frame
+
+    def fifo_push(self, samples, channels):
+        """Yeniden örneklenmiş karışımı (k x M) kanallarının FIFO satırlarına ekler."""
+        m = samples.shape[1]
+        if self.fifo_fill + m > self.fifo.shape[1]:
+            grown = np.zeros((self.channels, 2 * (self.fifo_fill + m)), dtype=np.float32)
+            grown[:, :self.fifo_fill] = self.fifo[:, :self.fifo_fill]
+            self.fifo = grown
+        self.fifo[channels, self.fifo_fill:self.fifo_fill + m] = samples
+        self.fifo_fill += m
+
+    def fifo_pop(self, n):
+        """İlk n frame (C x n int16); kalan başa kaydırılır."""
+        out = to_int16(self.fifo[:, :n])
+        rest = self.fifo_fill - n
+        self.fifo[:, :rest] = self.fifo[:, n:self.fifo_fill]
+        self.fifo_fill = rest
+        return out
+
+
+class BusLayout:
+    """
+    Değiştirilemez kişi düzeni: kişi sırasıyla giriş slotları, kişi başına
+    çıkış (cihaz, kanal) uçları, benzersiz çıkış sütunları, cihaz başına
+    kanal eşlemeleri ve D matrisi. Kişi eklenip çıkarıldığında yenisi
+    kurulur ve tek referansla yayınlanır.
+    """
+    def __init__(self, inputs, person_outputs):
+        self.inputs = tuple(inputs)
+        self.person_outputs = tuple(person_outputs)  # (OutputSlot, kanal)
+
+        # Giriş cihazı başına o cihazın kanallarındaki kişiler
+        self.device_inputs = {}
+        for slot in self.inputs:
+            self.device_inputs.setdefault(slot.device, []).append(slot)
+        self.input_devices = tuple(self.device_inputs)
+        self.device_rows = {dev: [(self.inputs.index(slot), slot.channel) for slot in slots]
+                            for dev, slots in self.device_inputs.items()}
+
+        # Aynı (cihaz, kanal) ucunu paylaşan dinleyenler tek sütuna toplanır
+        outputs = []
+        for key in self.person_outputs:
+            if key not in outputs:
+                outputs.append(key)
+        self.outputs = tuple(outputs)
+        self.output_index = {key: d for d, key in enumerate(self.outputs)}
+        self.output_names = [
+            f"çıkış (cihaz {endpoint_label(slot.device_id, ch, slot.channels)})"
+            for slot, ch in self.outputs
+        ]
+
+        # Çıkış cihazı başına (sütun, kanal) çiftleri: her cihaza tek yazma
+        self.device_columns = {}
+        for d, (slot, ch) in enumerate(self.outputs):
+            self.device_columns.setdefault(slot, []).append((d, ch))
+        self.output_devices = tuple(self.device_columns)
+
+        # D[d, j] = 1 -> j. kişinin kulaklığı d. çıkış sütununda
+        self.device_matrix = np.zeros((len(self.outputs), len(self.inputs)), dtype=np.float32)
+        for j, key in enumerate(self.person_outputs):
+            self.device_matrix[self.output_index[key], j] = 1.0
+
+    @property
+    def size(self):
+        return len(self.inputs)
+
+    @property
+    def devices(self):
+        """Stream sahibi tüm cihazlar (sağlık, açma/kapama)."""
+        return self.input_devices + self.output_devices
+
+    def remap_rows(self, old_layout, old_values):
+        """Kişi başına (satır) durumu slot kimliğiyle bu düzene taşır; yeni kişiler 0."""
+        return self.remap(old_layout, old_values[:, None], columns=[None], old_columns=[None])[:, 0]
+
+    def remap(self, old_layout, old_weights, columns=None, old_columns=None):
+        """
+        Eski düzenin ağırlıklarını slot kimliğiyle bu düzene taşır. Yeni
+        kişilerin satırları 0'dan başlar; ilk buffer'da rampa ile açılır.
+        columns/old_columns: sütun anahtarları (varsayılan: tüm çıkış
+        sütunları; callback modunda tek cihazın sütunları).
+        """
+        columns = self.outputs if columns is None else columns
+        old_columns = old_layout.outputs if old_columns is None else old_columns
+        weights = np.zeros((self.size, len(columns)), dtype=np.float32)
+        old_rows = {slot: i for i, slot in enumerate(old_layout.inputs)}
+        pairs = [(i, old_rows[slot]) for i, slot in enumerate(self.inputs) if slot in old_rows]
+        if not pairs:
+            return weights
+        rows, src_rows = zip(*pairs)
+        old_cols = {key: d for d, key in enumerate(old_columns)}
+        pairs = [(d, old_cols[key]) for d, key in enumerate(columns) if key in old_cols]
+        if not pairs:
+            return weights
+        cols, src_cols = zip(*pairs)
+        weights[np.ix_(rows, cols)] = old_weights[np.ix_(src_rows, src_cols)]
+        return weights
+
+
+class MixBus(threading.Thread):
+    """
+    Merkezi mix bus: tüm mikrofonları okur, her dinleyenin karışımını
+    routing matrisi ile tek bir NumPy çarpımında hesaplar ve her çıkış
+    cihazına tek bir stream üzerinden yazar.
+
+    mode="blocking": tek thread read/write döngüsü.
+    mode="callback": PyAudio callback streamleri; mikrofon callback'leri
+    halka buffer'a yazar, çıkış callback'leri karışımı buradan çeker.
+
+    Kişiler çalışırken add_person/remove_person ile eklenip çıkarılabilir;
+    ses yolu (düzen, ağırlıklar) çiftini tek referanstan okur ve diğer
+    route'lar kesintisiz devam eder.
+
+    Her cihaz kendi hızıyla (RATE desteklenmiyorsa varsayılanıyla) açılır.
+    drift=True: bağımsız cihazların saat kayması telafi edilir. Ana saat
+    blocking modunda döngüyü bekleten ilk giriş, callback modunda karışımı
+    çeken ilk çıkıştır; diğer cihazlar halka / kuyruk doluluğuna göre
+    ayarlanan oranla yeniden örneklenir.
+    """
+    def __init__(self, p, mic_ids, out_ids_by_person,
+                 routing, controls, vu_callbacks, stop_event, mode="blocking", chunk=CHUNK,
+                 on_error=None, profile=None, levels=None, gate=None, ducking=None, drift=False):
+        super().__init__(daemon=True)
+        self.p = p
+        self.routing = routing                      # RoutingMatrix
+        self.controls = controls                    # ControlState
+        self.stop_event = stop_event
+        self.mode = mode
+        self.chunk = chunk
+        self.on_error = on_error                    # callable(title, message)
+        self.profile = profile                      # LoopProfile (isteğe bağlı)
+        # Kişi başına son VU seviyesi (0..100), düzen sırasıyla. GUI kendi
+        # zamanlayıcısıyla okur; ses thread'i yalnızca eleman yazar.
+        # Verilmezse düzen kurulunca kişi sayısına göre ayrılır
+        self.levels = levels
+        # NoiseGate ayarları (threshold_db, zcr_max, attack_ms, hold_ms,
+        # release_ms); kişi başına açma/kapama ControlState.GATE'te
+        self.gate_params = dict(gate or {})
+        # Ducker ayarları (depth_db, attack_ms, release_ms); öncelikli
+        # kişiler ControlState.PRIORITY'de
+        self.duck_params = dict(ducking or {})
+        # Saat kayması telafisi: saatli girişlerin halkasında hedeflenen
+        # doluluk (frame): okuyucunun ve yazarın birer buffer'ı + yarım
+        # buffer titreşim payı
+        self.drift = drift
+        self.fill_target = chunk * 5 // 2
+        self.max_lag = chunk * (6 if drift else 3)
+
+        self._slot_lock = threading.Lock()          # yalnızca add/remove arasında
+        self.streams_open = False
+
+        # Her fiziksel cihaz bir kez açılır: kanallı adreslenen cihaz tüm
+        # kanallarıyla, kişiler (cihaz, kanal) uçlarıyla adreslenir
+        in_eps = self.endpoints(mic_ids)
+        out_eps = self.endpoints(out_ids_by_person)
+        inputs, in_devices = [], []
+        for (dev_id, ch), cb in zip(in_eps, vu_callbacks):
+            dev = self.input_device(dev_id, ch, in_devices)
+            if dev not in in_devices:
+                in_devices.append(dev)
+            inputs.append(self.make_input_slot(dev, ch or 0, cb))
+        person_outputs, out_devices = [], []
+        for dev_id, ch in out_eps:
+            dev = self.output_device(dev_id, ch, out_devices)
+            if dev not in out_devices:
+                out_devices.append(dev)
+            person_outputs.append((dev, ch or 0))
+        self.layout = BusLayout(inputs, person_outputs)
+        if self.levels is None:
+            self.levels = np.zeros(max(MAX_PEOPLE, self.layout.size), dtype=np.float32)
+
+        # Ses yolunun gördüğü tutarlı dörtlü (düzen, ağırlıklar, kapı maskesi,
+        # öncelik maskesi); yalnızca routing, kontrol ve düzen boyutları
+        # uyuştuğunda değişir
+        # (anahtar, dörtlü) tek referansla yayınlanır: callback'ler de
+        # current_mix_state() çağırabilir, yarış yalnızca fazladan hesap yapar
+        self._mix = (None, (self.layout,
+                            np.zeros((self.layout.size, len(self.layout.outputs)), dtype=np.float32),
+                            np.zeros(self.layout.size, dtype=bool),
+                            np.zeros(self.layout.size, dtype=bool)))
+
+        # Blocking modu: tüm çıkışlar için tek DSP aşaması, vektörel kapı ve ducker
+        self.dsp = MixDsp(self.layout.size, len(self.layout.outputs), chunk)
+        self.gate = NoiseGate(self.layout.size, **self.gate_params)
+        self.ducker = Ducker(len(self.layout.outputs), **self.duck_params)
+        self.prev_layout, self.prev_weights = self._mix[1][:2]
+
+        # Giriş + çıkış bus ölçümü; düzen değişince yeniden kurulur
+        self.metering = self.make_metering(self.layout)
+        self.meter_feed = MeterFeed(self.metering)  # blocking modu: ses yolu -> ölçüm thread'i
+        self._meter_pos = {}  # callback modu: halka -> ölçüm okuma konumu
+
+        # Yayın kaydı: ölçüme giden blok kopyalanır (start_recording)
+        self.recorder = None
+
+        # Ses / kontrol döngüsünde yakalanan istisna sayısı (benchmark, test)
+        self.loop_errors = 0
+
+    @property
+    def mic_ids(self):
+        return [slot.mic_id for slot in self.layout.inputs]
+
+    @property
+    def out_devices(self):
+        return [slot.device_id for slot in self.layout.output_devices]
+
+    # ---------------- Cihazlar / stream'ler ----------------
+    @staticmethod
+    def endpoints(refs):
+        """Kanalsız adres, aynı cihazın kanallı adresi de varsa kanal 1 olur."""
+        eps = [endpoint(ref) for ref in refs]
+        multi = {dev for dev, ch in eps if ch is not None}
+        return [(dev, 0 if ch is None and dev in multi else ch) for dev, ch in eps]
+
+    @staticmethod
+    def _find_device(devices, device_id, channel):
+        for dev in devices:
+            if dev.device_id == device_id:
+                if (channel or 0) >= dev.channels:
+                    raise ValueError(f"Cihaz {device_id} {dev.channels} kanalla açık; "
+                                     f"kanal {channel + 1} kullanılamaz")
+                return dev
+        return None
+
+    def input_device(self, device_id, channel, devices=()):
+        """
+        Cihaz zaten açıksa (başka kanalı kullanılıyorsa) aynı nesne; stream
+        paylaşılır. Tek kanallı açılmış cihazın diğer kanalları için ValueError.
+        """
+        dev = self._find_device(devices, device_id, channel)
+        if dev is None:
+            dev = InputDevice(device_id, device_channels(self.p, device_id, True, channel))
+        return dev
+
+    def output_device(self, device_id, channel, devices=()):
+        dev = self._find_device(devices, device_id, channel)
+        if dev is None:
+            dev = OutputSlot(device_id, self.chunk, device_channels(self.p, device_id, False, channel))
+            dev.ducker = Ducker(0, **self.duck_params)
+        return dev
+
+    def make_input_slot(self, device, channel, vu_callback=None):
+        slot = InputSlot(device, channel, self.chunk, vu_callback)
+        slot.gate = NoiseGate(1, **self.gate_params)
+        return slot
+
+    def make_clock(self, dev, want_input):
+        """
+        Cihaz hızını anlaşır ve gerekiyorsa DeviceClock kurar: hız farklıysa
+        sabit oranlı dönüşüm, drift açıksa doluluğa göre ayarlanan oran.
+
+        Hedef doluluk: blocking girişte okumadan önceki halka doluluğu;
+        callback girişte okuyucunun son okumasından sonraki (bir buffer
+        az); callback çıkışta halka + FIFO (FIFO için bir buffer fazla);
+        blocking çıkışta sürücü kuyruğu (kapasite ilk yazmada ölçülür).
+        """
+        dev.rate = negotiate_rate(self.p, dev.device_id, want_input, dev.channels)
+        dev.chunk = max(1, round(self.chunk * dev.rate / RATE))
+        if dev.rate == RATE and not self.drift:
+            dev.clock = None
+            return
+        controller = None
+        if self.drift:
+            if self.mode != "callback":
+                controller = (DriftController(RATE, self.fill_target) if want_input
+                              else DriftController(dev.rate))
+                dev.queue_capacity = 0
+            elif want_input:
+                controller = DriftController(RATE, self.fill_target - self.chunk)
+            else:
+                controller = DriftController(RATE, self.fill_target + self.chunk)
+        dev.clock = DeviceClock(dev.rate, RATE, dev.channels, want_input, controller)
+
+    def master_device(self, layout):
+        """
+        Ana saat: blocking modunda döngüyü bekleten ilk giriş, callback
+        modunda karışımı çeken ilk çıkış.
+        """
+        devices = layout.output_devices if self.mode == "callback" else layout.input_devices
+        return devices[0] if devices else None
+
+    def clock_of(self, dev, master):
+        """Motor hızındaki ana saat cihazı doğrudan yoldan geçer (dönüşüm yok)."""
+        if dev is master and dev.rate == RATE:
+            return None
+        return dev.clock
+
+    def open_input(self, dev):
+        callback = self.mode == "callback"
+        self.make_clock(dev, True)
+        return self.p.open(
+            channels=dev.channels,
+            rate=dev.rate,
+            input=True,
+            frames_per_buffer=dev.chunk,
+            input_device_index=dev.device_id,
+            stream_callback=self.make_input_callback(dev) if callback else None
+        )
+
+    def open_output(self, slot):
+        callback = self.mode == "callback"
+        self.make_clock(slot, False)
+        return self.p.open(
+            channels=slot.channels,
+            rate=slot.rate,
+            output=True,
+            frames_per_buffer=slot.chunk,
+            output_device_index=slot.device_id,
+            stream_callback=self.make_output_callback(slot) if callback else None
+        )
+
+    def open_streams(self):
+        # Her fiziksel cihaz için yalnızca bir stream (tüm kanallar)
+        for dev in self.layout.input_devices:
+            dev.stream = self.open_input(dev)
+        for slot in self.layout.output_devices:
+            slot.stream = self.open_output(slot)
+        self.streams_open = True
+
+    @staticmethod
+    def close_stream(s):
+        if s is None:
+            return
+        try:
+            s.stop_stream()
+            s.close()
+        except:
+            pass
+
+    def close_streams(self):
+        with self._slot_lock:
+            self.streams_open = False
+            for dev in self.layout.devices:
+                self.close_stream(dev.stream)
+                dev.stream = None
+
+    # ---------------- Canlı kişi ekleme / çıkarma ----------------
+    def add_person(self, mic_id, out_id, vu_callback=None, sends=None, hears=None,
+                   gain=1.0, mute=False, ptt_enabled=False, gate=False, priority=False):
+        """
+        Çalışırken sona yeni kişi ekler. mic_id/out_id: cihaz id'si ya da
+        (cihaz, kanal). Yalnızca cihaz henüz açık değilse stream açılır
+        (aynı arabirimin başka kanalı zaten kullanılıyorsa açılmaz); routing
+        ve kontrol dizileri büyütülür, yeni düzen yayınlanır. Dönüş: geçen
+        süre (ms).
+        """
+        t0 = time.perf_counter()
+        with self._slot_lock:
+            layout = self.layout
+            if layout.size >= MAX_PEOPLE:
+                raise ValueError(f"En fazla {MAX_PEOPLE} kişi eklenebilir.")
+
+            mic_dev, mic_ch = endpoint(mic_id)
+            out_dev, out_ch = endpoint(out_id)
+            dev = self.input_device(mic_dev, mic_ch, layout.input_devices)
+            new_in = dev not in layout.device_inputs
+            if new_in:
+                dev.primed = False
+            out = self.output_device(out_dev, out_ch, layout.output_devices)
+            new_out = out not in layout.device_columns
+            mic_ch, out_ch = mic_ch or 0, out_ch or 0
+            inp = self.make_input_slot(dev, mic_ch, vu_callback)
+
+            self.open_live([dev] * new_in + [out] * new_out)
+
+            self.controls.add(gain, mute, ptt_enabled, False, gate, priority)
+            self.routing.add_person(sends, hears)
+            self.layout = BusLayout(layout.inputs + (inp,), layout.person_outputs + ((out, out_ch),))
+
+        ms = (time.perf_counter() - t0) * 1000.0
+        print(f"[INFO] Kişi eklendi (N={layout.size + 1}): {ms:.1f} ms")
+        return ms
+
+    def open_live(self, devices):
+        """
+        Çalışırken düzene girecek cihazların stream'leri; ses thread'inin
+        dışında açılır, hata olursa açılanlar kapatılır ve hiçbir şey
+        değişmemiş olur.
+        """
+        if not self.streams_open:
+            return
+        opened = []
+        try:
+            for d in devices:
+                d.stream = self.open_input(d) if isinstance(d, InputDevice) else self.open_output(d)
+                opened.append(d)
+            if self.mode == "callback":
+                for d in opened:
+                    d.stream.start_stream()
+        except:
+            for d in opened:
+                self.close_stream(d.stream)
+                d.stream = None
+            raise
+
+    def close_unused(self, layout, devices):
+        """Yeni düzende artık kimsenin kullanmadığı cihazların stream'leri kapanır."""
+        for d in devices:
+            if d not in layout.device_inputs and d not in layout.device_columns:
+                self.close_stream(d.stream)
+                d.stream = None
+
+    def remove_person(self, i):
+        """
+        i. kişiyi çıkarır: önce yeni düzen yayınlanır, ses yolu ona
+        geçtikten sonra yalnızca artık kimsenin kullanmadığı giriş/çıkış
+        cihazlarının stream'leri kapatılır. Dönüş: geçen süre (ms).
+        """
+        t0 = time.perf_counter()
+        with self._slot_lock:
+            layout = self.layout
+            dev = layout.inputs[i].device
+            out = layout.person_outputs[i][0]
+            new_layout = BusLayout(layout.inputs[:i] + layout.inputs[i + 1:],
+                                   layout.person_outputs[:i] + layout.person_outputs[i + 1:])
+            self.layout = new_layout
+            self.routing.remove_person(i)
+            self.controls.remove(i)
+
+            if self.streams_open:
+                self.wait_for_layout(new_layout)
+            # Boşalan sıraların VU'su son değerde kalmasın (ses yolu artık yazmıyor)
+            self.levels[new_layout.size:layout.size] = 0.0
+            self.close_unused(new_layout, (dev, out))
+
+        ms = (time.perf_counter() - t0) * 1000.0
+        print(f"[INFO] Kişi çıkarıldı (N={new_layout.size}): {ms:.1f} ms")
+        return ms
+
+    def swap_device(self, i, mic_id=None, out_id=None):
+        """
+        Çalışırken i. kişinin mikrofonunu ve/veya çıkışını değiştirir
+        (None: aynı kalır). Yeni cihaz henüz açık değilse yalnızca onun
+        stream'i açılır; kişinin sırası, routing'i ve kontrolleri aynı
+        kalır, yeni uç ilk buffer'da rampa ile açılır. Eski cihazı artık
+        kimse kullanmıyorsa kapatılır. Dönüş: geçen süre (ms).
+        """
+        ms = self.swap_devices({i: (mic_id, out_id)})
+        print(f"[INFO] Kişi {i + 1} cihazı değişti: {ms:.1f} ms")
+        return ms
+
+    def swap_devices(self, changes):
+        """
+        changes: {kişi: (mic, çıkış)} (None: aynı kalır). Tüm değişiklikler
+        tek düzende yayınlanır: yeni cihazlar bir kez açılır, boşa çıkanlar
+        bir kez kapanır, etkilenmeyen stream'lere dokunulmaz. Dönüş: ms.
+        """
+        t0 = time.perf_counter()
+        with self._slot_lock:
+            layout = self.layout
+            inputs, person_outputs = list(layout.inputs), list(layout.person_outputs)
+            in_devices, out_devices = list(layout.input_devices), list(layout.output_devices)
+            opening, released = [], []
+            for i, (mic_id, out_id) in changes.items():
+                if mic_id is not None:
+                    old_in = inputs[i]
+                    mic_dev, mic_ch = endpoint(mic_id)
+                    dev = self.input_device(mic_dev, mic_ch, in_devices)
+                    if dev not in in_devices:
+                        dev.primed = False
+                        in_devices.append(dev)
+                        opening.append(dev)
+                    inputs[i] = self.make_input_slot(dev, mic_ch or 0, old_in.vu_callback)
+                    released.append(old_in.device)
+                if out_id is not None:
+                    dev_id, ch = endpoint(out_id)
+                    out = self.output_device(dev_id, ch, out_devices)
+                    if out not in out_devices:
+                        out_devices.append(out)
+                        opening.append(out)
+                    released.append(person_outputs[i][0])
+                    person_outputs[i] = (out, ch or 0)
+            self.open_live(opening)
+
+            new_layout = BusLayout(inputs, person_outputs)
+            self.layout = new_layout
+
+            if self.streams_open:
+                self.wait_for_layout(new_layout)
+            self.close_unused(new_layout, released)
+
+        return (time.perf_counter() - t0) * 1000.0
+
+    def wait_for_layout(self, layout, timeout=1.0):
+        """Ses yolu (ya da kontrol thread'i) yeni düzeni kullanmaya başlayana kadar bekle."""
+        deadline = time.monotonic() + timeout
+        while self.prev_layout is not layout and self.is_alive():
+            if time.monotonic() > deadline:
+                print("[UYARI] Yeni düzen zaman aşımında benimsenmedi")
+                return False
+            time.sleep(0.002)
+        return True
+
+    # ---------------- Ölçüm ----------------
+    def make_metering(self, layout):
+        channels = [slot.name for slot in layout.inputs] + layout.output_names
+        self.record_channels = self.track_names(layout)
+        return Metering(channels, self.chunk, RATE, METER_HISTORY)
+
+    @staticmethod
+    def track_names(layout):
+        """Kayıt kanalları: kişi sırasıyla mikrofonlar, sonra kimin dinlediğiyle çıkış busları."""
+        listeners = {}
+        for j, key in enumerate(layout.person_outputs):
+            listeners.setdefault(key, []).append(str(j + 1))
+        return tuple(
+            [f"Kişi {i + 1} {slot.name}" for i, slot in enumerate(layout.inputs)] +
+            [f"{name} -> Kişi {', '.join(listeners[key])}"
+             for key, name in zip(layout.outputs, layout.output_names)]
+        )
+
+    # ---------------- Kayıt ----------------
+    def start_recording(self, directory, name=None):
+        """
+        Tüm girişleri ve dinleyen karışımlarını directory'deki çok kanallı
+        WAV'a kaydetmeye başlar (disk G/Ç'si ayrı thread'de). Dönüş: ShowRecorder.
+        """
+        self.stop_recording()
+        self.recorder = ShowRecorder(directory, RATE, len(self.record_channels), name)
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+            print(f"[INFO] Kayıt durdu: {recorder.status()}")
+        return recorder
+
+    def meter_snapshot(self):
+        """Kanal başına peak/RMS dBFS ve LUFS benzeri yükseklik."""
+        return self.metering.snapshot()
+
+    def meter_rings(self, layout):
+        """
+        Callback modu: girişlerin halkalarından ve çıkışların tap'lerinden
+        son ölçümden beri gelen tam hop'ları tek seferde ölçer (ve kayda
+        verir). Halkalar farklı anlarda, farklı parçalarla yazıldığından
+        hepsi en yavaşı kadar ilerler; durmuş (yarım halka geride kalan)
+        stream beklenmez, sessiz okunur.
+        """
+        rings = ([slot.ring for slot in layout.inputs] +
+                 [slot.taps[ch] for slot, ch in layout.outputs])
+        hop = self.chunk
+        pos = {ring: self._meter_pos.get(ring, ring.write_pos) for ring in rings}
+        self._meter_pos = pos
+
+        capacity = min(ring.capacity for ring in rings)
+        available = [ring.write_pos - pos[ring] for ring in rings]
+        ahead = max(available)
+        live = [a for a in available if ahead - a < capacity // 2]
+        k = min(min(live), capacity - hop) // hop
+        if k <= 0:
+            return
+        block = np.zeros((len(rings), k * hop), dtype=np.int16)
+        for c, ring in enumerate(rings):
+            pos[ring] = ring.read_into(pos[ring], block[c], ring.capacity - hop)
+        self.metering.process(block)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(self.record_channels, block)
+
+    # ---------------- Stream sağlığı ----------------
+    def reopen_failed(self, now):
+        """
+        Yalnızca başarısız işaretlenen ve geri çekilme süresi dolan
+        stream'leri kapatıp yeniden açar; sağlıklı stream'ler çalışmaya
+        devam eder.
+        """
+        layout = self.layout
+        groups = ((layout.input_devices, self.open_input), (layout.output_devices, self.open_output))
+        for slots, opener in groups:
+            for slot in slots:
+                health = slot.health
+                if not health.due_for_reopen(now):
+                    continue
+                self.close_stream(slot.stream)
+                slot.stream = None
+                try:
+                    st = opener(slot)
+                    if self.mode == "callback":
+                        st.start_stream()
+                    slot.stream = st
+                    health.reopened(True, now)
+                    print(f"[Sağlık] {health.name} yeniden açıldı")
+                except Exception as e:
+                    health.reopened(False, now)
+                    print(f"[Sağlık] {health.name} açılamadı ({e}), "
+                          f"{health.backoff:.1f} sn sonra tekrar")
+
+    def health_report(self):
+        layout = self.layout
+        master = self.master_device(layout)
+        return [dict(dev.health.summary(), hiz_hz=dev.rate, drift_ppm=self.drift_label(dev, master))
+                for dev in layout.devices]
+
+    @staticmethod
+    def drift_label(dev, master):
+        """Ölçülen saat kayması: ana saat "ref", telafi yoksa "-"."""
+        if dev is master:
+            return "ref"
+        ppm = dev.clock.ppm if dev.clock is not None else None
+        return "-" if ppm is None else round(ppm, 1)
+
+    def log_health(self):
+        master = self.master_device(self.layout)
+        for dev in self.layout.devices:
+            h = dev.health
+            if h.overflows or h.underruns or h.errors or h.failed:
+                print("[Sağlık]", h.summary())
+            if dev.clock is not None and dev is not master:
+                print(f"[Saat] {h.name}: {dev.rate} Hz, drift {self.drift_label(dev, master)} ppm")
+
+    @property
+    def mix_state(self):
+        return self._mix[1]
+
+    def current_mix_state(self):
+        """
+        (düzen, ağırlıklar, kapı maskesi, öncelik maskesi) dörtlüsünü yalnızca düzen, routing sürümü ya da
+        kontrol durumu değiştiğinde (preset geçişinde her adımda) yeniden
+        hesaplar. Kişi ekleme/çıkarma sırasında boyutlar bir an uyuşmazsa
+        önceki dörtlü kullanılmaya devam eder. W[i, d]: i. konuşanın d.
+        çıkış cihazındaki ağırlığı (N x D).
+        """
+        layout = self.layout
+        controls_version = self.controls.version
+        version, routing = self.routing.snapshot()
+        state = self.controls.state
+        key = (layout, version, controls_version)
+        cached_key, mix = self._mix
+        if key != cached_key:
+            n = layout.size
+            if routing.shape[0] == n and state.shape[0] == n:
+                gains = self.controls.gains(state)
+                weights = (routing * gains[:, None]) @ layout.device_matrix.T
+                mix = (layout, weights.astype(np.float32, copy=False),
+                       self.controls.gate_mask(state),
+                       self.controls.priority_mask(state))
+                self._mix = (key, mix)
+        return mix
+
+    # ---------------- Saat kayması ----------------
+    def push_resampled(self, dev, slots, data, positions, now):
+        """
+        Saatli giriş cihazı: kullanılan kanallar motor hızına çevrilip kişi
+        halkalarına yazılır. positions (InputSlot -> okuma konumu) verilirse
+        halkaların ana saate göre ortalama doluluğu oranı düzeltir.
+        Dönüş: motor hızındaki örnekler (k x M float).
+        """
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, dev.channels)
+        chans = [slot.channel for slot in slots]
+        y = dev.clock.process(frames[:, chans].T, chans)
+        fills = []
+        for slot, samples in zip(slots, y):
+            slot.ring.push(to_int16(samples))
+            pos = positions(slot) if positions is not None else None
+            if pos is not None:
+                fills.append(slot.ring.write_pos - pos)
+        if fills:
+            dev.clock.update(sum(fills) / len(fills), now)
+        return y
+
+    # ---------------- Callback modu ----------------
+    def make_input_callback(self, dev):
+        health = dev.health
+        channels = dev.channels
+
+        def callback(in_data, frame_count, time_info, status):
+            if status & paInputOverflow:
+                health.record_xrun(time.monotonic(), overflow=True)
+            layout = self.layout
+            slots = layout.device_inputs.get(dev, ())
+            if dev.clock is not None and slots:
+                # Ana saate (karışımı çeken çıkış) göre doluluk; okuyucunun
+                # son callback'inden beri tükettiği ara değerle eklenir
+                # (callback fazları arasındaki yavaş vuruşu drift sanmamak için)
+                now = time.monotonic()
+                master = self.master_device(layout)
+                positions = master.read_pos if master is not None else {}
+                consumed = (now - master.read_time) * RATE if master is not None else 0.0
+
+                def position(slot):
+                    pos = positions.get(slot)
+                    return None if pos is None else pos + min(consumed, self.max_lag)
+
+                y = self.push_resampled(dev, slots, in_data, position, now)
+                dev.push_time = now
+                for slot, samples in zip(slots, y):
+                    slot.gate.process(samples[None, :])
+                return (None, paContinue)
+            # Kanallar iç içe: kişi başına strided görünüm (ara kopya yok)
+            frames = np.frombuffer(in_data, dtype=np.int16).reshape(-1, channels)
+            for slot in slots:
+                samples = frames[:, slot.channel]
+                slot.ring.push(samples)
+                # Kapı kararı bu buffer'ın kendi verisiyle (ek gecikme yok)
+                slot.gate.process(samples.astype(np.float32)[None, :])
+            dev.push_time = time.monotonic()
+            return (None, paContinue)
+        return callback
+
+    def mix_device(self, slot, layout, weights, gate_mask, priority, n, extra_lag=0):
+        """
+        Callback modu: çıkış cihazının sütunlarının n frame'lik karışımı
+        (cols x n int16); ölçüm için tap'lere de yazılır. extra_lag: saatli
+        girişlerin okuyucusunun fill_target'a ek başlangıç payı (FIFO'lu cihaz).
+        """
+        dsp = slot.dsp
+        if (dsp is None or dsp.chunk != n or dsp.frames.shape[0] != layout.size
+                or dsp.out.shape[0] != len(slot.cols)):
+            # Kişi/kanal sayısı ya da sürücü buffer boyutu değişince bir kez yeniden ayrılır
+            dsp = slot.dsp = MixDsp(layout.size, len(slot.cols), n)
+
+        w = weights[:, slot.cols]
+        if gate_mask.any():
+            g = np.fromiter((inp.gate.gain[0] for inp in layout.inputs), np.float32, layout.size)
+            w = w * np.where(gate_mask, g, 1.0)[:, None]
+        ducker = slot.ducker
+        if priority.any() or ducker.engaged:
+            # Öncelikli girişin konuşması kendi callback'indeki VAD'den
+            talking = np.fromiter((inp.gate.is_open[0] for inp in layout.inputs), bool, layout.size)
+            w = ducker.process(w, priority, talking, n)
+        if slot.prev_weights is None:
+            slot.prev_weights = w
+
+        # Halka buffer'dan doğrudan DSP giriş satırlarına kopyala; saatli
+        # girişte okuyucu halkada hedef doluluk birikince, o kadar geriden başlar
+        positions = slot.read_pos
+        for i, inp in enumerate(layout.inputs):
+            ring = inp.ring
+            pos = positions.get(inp)
+            if pos is None:
+                lag = n if inp.device.clock is None else self.fill_target + extra_lag
+                if ring.write_pos < lag:
+                    dsp.frames[i] = 0
+                    continue
+                pos = ring.write_pos - lag
+            positions[inp] = ring.read_into(pos, dsp.frames[i], self.max_lag)
+        slot.read_time = time.monotonic()
+
+        out = dsp.mix(slot.prev_weights, w, active_rows(slot.prev_weights, w))
+        slot.prev_weights = w
+        for k, ch in slot.out_columns:
+            slot.taps[ch].push(out[k])
+        return out
+
+    def make_output_callback(self, slot):
+        health = slot.health
+
+        def callback(in_data, frame_count, time_info, status):
+            t_start = time.perf_counter()
+            if status & paOutputUnderflow:
+                health.record_xrun(time.monotonic(), overflow=False)
+
+            # Routing/kontrol değişikliği bir sonraki buffer'da görülür
+            # (değişmediyse önbellekten, yalnızca sürüm karşılaştırması)
+            layout, weights, gate_mask, priority = self.current_mix_state()
+            columns = layout.device_columns.get(slot)
+            if columns is None:
+                # Cihaz düzenden çıkarıldı, stream kapanana kadar sessizlik
+                return (bytes(frame_count * 2 * slot.channels), paContinue)
+
+            if slot.layout is not layout:
+                # Bu cihazın sütunları: rampa ve duck durumu uç kimliğiyle taşınır
+                keys = [layout.outputs[d] for d, _ in columns]
+                old_keys = [slot.layout.outputs[d] for d in slot.cols] if slot.layout else []
+                if slot.layout is not None:
+                    slot.prev_weights = layout.remap(slot.layout, slot.prev_weights,
+                                                     columns=keys, old_columns=old_keys)
+                slot.ducker.remap(old_keys, keys)
+                slot.cols = [d for d, _ in columns]
+                slot.out_columns = [(k, ch) for k, (_, ch) in enumerate(columns)]
+                # Kullanılmayan kanalların bekleyen örnekleri atılır
+                slot.fifo_columns = [(ch, ch) for _, ch in columns]
+                unused = sorted(set(range(slot.channels)) - {ch for _, ch in columns})
+                slot.fifo[unused] = 0
+                # Çıkan kişilerin okuma konumlarını bırak
+                slot.read_pos = {inp: slot.read_pos[inp] for inp in layout.inputs
+                                 if inp in slot.read_pos}
+                slot.layout = layout
+
+            master = self.master_device(layout)
+            clock = self.clock_of(slot, master)
+            if clock is None:
+                out = self.mix_device(slot, layout, weights, gate_mask, priority, frame_count)
+                data = slot.interleave(out, slot.out_columns)
+            else:
+                # Farklı hız / ana saat dışı cihaz: motor hızında buffer buffer
+                # karıştırılır, cihaz hızına çevrilip FIFO'dan verilir (ilk
+                # callback iki buffer karıştırıp bir buffer FIFO'da tuttuğundan
+                # okuyucu iki buffer daha geriden başlar)
+                if slot is not master and slot.read_pos:
+                    # Yazarın son callback'inden beri ürettiği ara değerle doluluk
+                    now = time.monotonic()
+                    fill = sum(inp.ring.write_pos - pos +
+                               min((now - inp.device.push_time) * RATE, self.chunk)
+                               for inp, pos in slot.read_pos.items())
+                    fill = fill / len(slot.read_pos) + slot.fifo_fill * clock.resampler.nominal
+                    clock.update(fill, now)
+                chans = [ch for _, ch in slot.out_columns]
+                while slot.fifo_fill < frame_count:
+                    out = self.mix_device(slot, layout, weights, gate_mask, priority,
+                                          self.chunk, 2 * self.chunk)
+                    slot.fifo_push(clock.process(out, chans), chans)
+                data = slot.interleave(slot.fifo_pop(frame_count), slot.fifo_columns)
+
+            if self.profile is not None:
+                self.profile.record(time.perf_counter() - t_start)
+            # PyAudio callback dönüşü bytes olmak zorunda (kanallar iç içe)
+            return (data.tobytes(), paContinue)
+        return callback
+
+    def run_callback(self):
+        """
+        Ses yolu tamamen callback'lerde; bu thread yalnızca kontrol
+        durumunu (gain/mute/PTT/routing) ve kişi düzenini ağırlık
+        matrisine çevirip yayınlar, VU metreleri günceller ve durmuş
+        stream'leri izler.
+        """
+        self.current_mix_state()
+        for dev in self.layout.devices:
+            dev.stream.start_stream()
+
+        last_log = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            try:
+                layout = self.current_mix_state()[0]
+                # Callback'ler mix_state'i her çağrıda okur: yayınlandığı
+                # anda benimsenmiş sayılır
+                if layout is not self.prev_layout:
+                    self.metering = self.make_metering(layout)
+                self.prev_layout = layout
+                self.meter_rings(layout)
+
+                for i, slot in enumerate(layout.inputs):
+                    level = rms_level(slot.ring.latest(self.chunk))
+                    if i < len(self.levels):
+                        self.levels[i] = level
+                    if slot.vu_callback:
+                        slot.vu_callback(level)
+
+                # Callback'i duran (cihaz koptu vb.) stream'i işaretle
+                for dev in layout.devices:
+                    st, health = dev.stream, dev.health
+                    if st is not None and not health.failed and not st.is_active():
+                        health.mark_failed(now, "stream durdu")
+
+                self.reopen_failed(now)
+            except Exception as e:
+                self.loop_errors += 1
+                print("[Kontrol HATASI]:", e)
+
+            if now - last_log > 60:
+                self.log_health()
+                last_log = now
+
+            self.stop_event.wait(0.05)
+
+    # ---------------- Blocking modu ----------------
+    def read_inputs(self, layout, now):
+        """
+        Her giriş cihazından tek okuma; kanallar kişi satırlarına ayrılır.
+        Başarısız stream'in satırları sessiz kalır.
+        """
+        frames = self.dsp.frames
+        master = self.master_device(layout)
+        for dev, rows in layout.device_rows.items():
+            s, health = dev.stream, dev.health
+            if s is None or health.failed:
+                for i, _ in rows:
+                    frames[i] = 0
+                continue
+            try:
+                if self.clock_of(dev, master) is not None:
+                    self.read_clocked(layout, dev, rows, dev is master, now)
+                    health.record_ok(now)
+                    continue
+                if not dev.primed:
+                    if s.get_read_available() < self.chunk:
+                        for i, _ in rows:
+                            frames[i] = 0
+                        continue
+                    dev.primed = True
+                # Okunmayı bekleyen birikme: sürücü buffer'ı taşmak üzere
+                if s.get_read_available() > self.chunk * 4:
+                    health.record_xrun(now, overflow=True)
+                self.dsp.load_device(rows, s.read(self.chunk, exception_on_overflow=False), dev.channels)
+                health.record_ok(now)
+            except Exception as e:
+                for i, _ in rows:
+                    frames[i] = 0
+                health.record_error(now, e)
+
+    def read_clocked(self, layout, dev, rows, is_master, now):
+        """
+        Saatli giriş: cihaz hızındaki veri motor hızına çevrilip halkaya
+        yazılır, kişi satırları halkadan okunur. Ana saat (hızı farklı ilk
+        giriş) buffer dolana kadar bekletilerek okunur; diğerleri
+        beklemeden, birikeni alır ve halka doluluğu oranı düzeltir.
+        """
+        s = dev.stream
+        slots = layout.device_inputs[dev]
+        if is_master:
+            for slot in slots:
+                if slot.read_pos is None:
+                    slot.read_pos = slot.ring.write_pos
+            ring, pos = slots[0].ring, slots[0].read_pos
+            while ring.write_pos - pos < self.chunk:
+                n = int(np.ceil((self.chunk - (ring.write_pos - pos)) * dev.clock.resampler.step)) + 1
+                self.push_resampled(dev, slots, s.read(n, exception_on_overflow=False), None, now)
+        else:
+            available = s.get_read_available()
+            if available > dev.chunk * 4:
+                dev.health.record_xrun(now, overflow=True)
+            if available:
+                data = s.read(available, exception_on_overflow=False)
+                self.push_resampled(dev, slots, data, lambda slot: slot.read_pos, now)
+        for (i, _), slot in zip(rows, slots):
+            if slot.read_pos is None:
+                if slot.ring.write_pos < self.fill_target:
+                    self.dsp.frames[i] = 0
+                    continue
+                slot.read_pos = slot.ring.write_pos - self.fill_target
+            slot.read_pos = slot.ring.read_into(slot.read_pos, self.dsp.frames[i], self.max_lag)
+
+    def queue_output(self, slot, y, now):
+        """
+        Blocking modu, saatli çıkış: sürücü kuyruğunu hedefte tutar. Kuyruk
+        tamamen boşalmışsa (açılış, underflow) sessizlikle hedefe doldurulur,
+        çok dolmuşsa bu buffer atılır; kısa takılmalardaki düşüşü girişteki
+        birikim kendiliğinden kapatır. Kalan küçük fark drift denetleyicisine
+        gider. Dönüş: yazılacak örnekler ya da None.
+        """
+        s, clock = slot.stream, slot.clock
+        free = s.get_write_available()
+        slot.queue_capacity = max(slot.queue_capacity, free)
+        queued = slot.queue_capacity - free
+        m = y.shape[1]
+        controller = clock.controller
+        if controller is None:
+            return y if free >= m else None
+        if controller.target is None:
+            # Hedef: fill_target kadar, kapasite izin verdiğince (yazma beklemesin)
+            target = min(self.fill_target * slot.rate // RATE, slot.queue_capacity - 2 * slot.chunk)
+            controller.target = max(slot.chunk, target)
+        target = controller.target
+        if queued <= 0:
+            pad = int(target - queued)
+            y = np.concatenate([np.zeros((y.shape[0], pad), dtype=y.dtype), y], axis=1)
+        elif queued > target + 2 * slot.chunk or free < m:
+            clock.update(queued - m, now)
+            return None
+        clock.update(queued + y.shape[1] - m, now)
+        return y
+
+    def write_outputs(self, layout, out, now):
+        """
+        Her çıkış cihazına tek yazma (kanallar iç içe); süre ve underrun
+        sayılır. Saatli çıkış cihaz hızına çevrilir ve kuyruğu hedefte
+        tutulur (queue_output); döngüyü bekletmez.
+        """
+        for slot, columns in layout.device_columns.items():
+            s, health = slot.stream, slot.health
+            if s is None or health.failed:
+                continue
+            clock = slot.clock
+            if clock is None:
+                data = slot.interleave(out, columns)
+            else:
+                chans = [ch for _, ch in columns]
+                y = self.queue_output(slot, clock.process(out[[d for d, _ in columns]], chans), now)
+                if y is None:
+                    continue
+                data = slot.interleave(to_int16(y), [(k, ch) for k, ch in enumerate(chans)])
+            # (PyAudio write yalnızca bytes kabul eder; tek kopya burada)
+            data = data.tobytes()
+            t0 = time.perf_counter()
+            try:
+                s.write(data, exception_on_underflow=True)
+                health.record_ok(now)
+            except IOError as e:
+                # Underflow'da veri yine de yazılmıştır
+                if getattr(e, "errno", None) == paOutputUnderflowed:
+                    health.record_xrun(now, overflow=False)
+                else:
+                    health.record_error(now, e)
+            except Exception as e:
+                health.record_error(now, e)
+            health.record_write((time.perf_counter() - t0) * 1000.0)
+
+    def apply_gate(self, weights, gate_mask, priority):
+        """Blocking modu: kapı ve ducking (bkz. gate_weights)."""
+        return gate_weights(self.gate, self.ducker, self.dsp.frames, weights, gate_mask, priority)
+
+    def adopt_layout(self, layout):
+        """Blocking modu: yeni düzende DSP'yi yeniden ayır, rampayı ve kapı durumunu slot kimliğiyle taşı."""
+        gate = NoiseGate(layout.size, **self.gate_params)
+        gate.gain = layout.remap_rows(self.prev_layout, self.gate.gain)
+        gate.hold_left = layout.remap_rows(self.prev_layout, self.gate.hold_left)
+        self.gate = gate
+        self.ducker.remap(self.prev_layout.outputs, layout.outputs)
+        self.prev_weights = layout.remap(self.prev_layout, self.prev_weights)
+        self.dsp = MixDsp(layout.size, len(layout.outputs), self.chunk)
+        self.metering = self.make_metering(layout)
+        self.meter_feed = MeterFeed(self.metering)
+        self.prev_layout = layout
+
+    def run_metering(self, done):
+        """
+        Blocking modu: ses döngüsünün MeterFeed'e bıraktığı hop'ları ölçer
+        (FFT ve geçici diziler ses yolunun deadline'ına girmez). Düzen
+        değişince yeni feed'e geçilir; eskisinde kalan hop'lar ölçülmez.
+        done: ses döngüsü bitince kurulur; son hop'lar da ölçülüp çıkılır.
+        """
+        while True:
+            stopped = done.wait(METER_INTERVAL)
+            try:
+                self.meter_feed.drain()
+            except Exception as e:
+                print("[Ölçüm HATASI]:", e)
+            if stopped:
+                break
+
+    def run_blocking(self):
+        # -----------------------------------------
+        # 🔥 VU limit ve sağlık log zamanlayıcıları
+        # -----------------------------------------
+        self.last_vu_update = 0
+        last_log = time.monotonic()
+
+        while not self.stop_event.is_set():
+            try:
+                now = time.monotonic()
+                t_start = time.perf_counter()
+
+                # ==========================================================
+                # 🔥 1) Mute / PTT / Gain + routing + kişi düzeni ->
+                #       ağırlıklar (kilitsiz, değişmediyse önbellekten)
+                # ==========================================================
+                layout, weights, gate_mask, priority = self.current_mix_state()
+                if layout is not self.prev_layout:
+                    self.adopt_layout(layout)
+
+                # ==========================================================
+                # 🔥 2) Yalnızca başarısız stream'leri (geri çekilmeyle) aç
+                # ==========================================================
+                self.reopen_failed(now)
+                if now - last_log > 60:
+                    self.log_health()
+                    last_log = now
+
+                # ==========================================================
+                # 🔥 3) Tüm mikrofonlardan veri oku (N x CHUNK)
+                # ==========================================================
+                self.read_inputs(layout, now)
+
+                # ==========================================================
+                # 🔥 4) VU Meter: seviyeler paylaşılan diziye her buffer'da,
+                #       callback'ler 50ms'den hızlı çağrılmaz
+                # ==========================================================
+                levels = self.dsp.levels()
+                # Dışarıdan verilen dizi (GUI / paylaşılan bellek) kişi
+                # sayısından kısa olabilir: sığan kadarı yazılır
+                k = min(len(levels), len(self.levels))
+                self.levels[:k] = levels[:k]
+                if (now - self.last_vu_update) > 0.05:
+                    for i, slot in enumerate(layout.inputs):
+                        if slot.vu_callback:
+                            slot.vu_callback(float(levels[i]))
+                    self.last_vu_update = now
+
+                # ==========================================================
+                # 🔥 5) Gürültü kapısı (VAD): kapalı girişlerin ağırlığı
+                #       rampayla sıfıra iner; sessiz satırlar karışıma girmez.
+                #       Öncelikli giriş konuşuyorsa diğerleri duck edilir
+                # ==========================================================
+                weights = self.apply_gate(weights, gate_mask, priority)
+
+                # ==========================================================
+                # 🔥 6) Tüm dinleyenlerin karışımı tek matris çarpımında
+                # ==========================================================
+                out = self.dsp.mix(self.prev_weights, weights, active_rows(self.prev_weights, weights))
+                self.prev_weights = weights
+                self.meter_feed.push(self.dsp.frames, self.dsp.mix_buf)
+                recorder = self.recorder
+                if recorder is not None:
+                    recorder.write(self.record_channels, self.dsp.frames, out)
+
+                # ==========================================================
+                # 🔥 7) Her çıkış cihazına tek yazma
+                # ==========================================================
+                self.write_outputs(layout, out, now)
+
+                if self.profile is not None:
+                    self.profile.record(time.perf_counter() - t_start)
+
+                # Tüm stream'ler başarısızsa boş döngüye girme
+                if all(dev.health.failed for dev in layout.devices):
+                    time.sleep(0.05)
+                elif self.drift:
+                    # Saatli cihazlar beklemez: döngüyü bekleten ana giriş
+                    # yoksa buffer süresi kadar bekle
+                    master = self.master_device(layout)
+                    if master is None or master.stream is None or master.health.failed:
+                        time.sleep(self.chunk / RATE)
+
+            except Exception as e:
+                self.loop_errors += 1
+                print("[Thread HATASI]:", e)
+                time.sleep(0.05)
+                continue
+
+    def run(self):
+        try:
+            self.open_streams()
+        except Exception as e:
+            print("[Audio Stream Hatası]:", e)
+            if self.on_error:
+                self.on_error("Audio Stream Hatası", str(e))
+            self.stop_event.set()
+            self.close_streams()
+            return
+
+        if self.mode == "callback":
+            self.run_callback()
+        else:
+            loop_done = threading.Event()
+            meter = threading.Thread(target=self.run_metering, args=(loop_done,), daemon=True)
+            meter.start()
+            self.run_blocking()
+            loop_done.set()
+            meter.join(timeout=1.0)
+
+        # ==========================================================
+        # 🔥 8) Stop etkin → tüm streamleri kapat
+        # ==========================================================
+        self.log_health()
+        self.close_streams()
+        self.stop_recording()
+        self.levels[:] = 0
+
+# ---------------- Devices / Presets ----------------
+def get_devices(p):
+    devs = []
+    for i in range(p.get_device_count()):
+        info = p.get_device_info_by_index(i)
+
+        fixed_name = fix_turkish(info["name"])
+
+        devs.append({
+            "id": i,
+            "name": fixed_name,
+            "maxInput": info.get("maxInputChannels", 0),
+            "maxOutput": info.get("maxOutputChannels", 0)
+        })
+    return devs
+
+
+def build_controls(people):
+    """Config'teki kişi ayarları (gain, mute, ptt, gate, priority) -> ControlState."""
+    controls = ControlState(len(people))
+    for i, person in enumerate(people):
+        controls.publish(
+            i,
+            float(person.get("gain", 1.0)),
+            bool(person.get("mute", False)),
+            bool(person.get("ptt", False)),
+            False,
+            bool(person.get("gate", False)),
+            bool(person.get("priority", False))
+        )
+    return controls
+
+
+def resolve_device(devices, ref, want_input):
+    """Config'teki cihaz: id (int) ya da isim parçası (str). devices: liste ya da DeviceRegistry."""
+    if isinstance(devices, DeviceRegistry):
+        return devices.find(ref, want_input)
+    key = "maxInput" if want_input else "maxOutput"
+    if isinstance(ref, int):
+        return ref
+    ref_low = str(ref).lower()
+    for d in devices:
+        if d[key] >= 1 and ref_low in d["name"].lower():
+            return d["id"]
+    raise ValueError(f"Cihaz bulunamadı: {ref!r}")
+
+
+def resolve_endpoint(devices, ref, want_input):
+    """
+    Config'teki uç -> (cihaz id, kanal). Kanal config'te 1'den sayılır:
+        3, "reji"                      -> kanalsız (tek kanallı stream)
+        "3:2", "Focusrite:5"           -> cihaz + kanal
+        [3, 2], {"device": "Focusrite", "channel": 5}
+    """
+    if isinstance(ref, dict):
+        ref = [ref["device"], ref.get("channel", 1)]
+    if isinstance(ref, (list, tuple)):
+        return resolve_device(devices, ref[0], want_input), int(ref[1]) - 1
+    if isinstance(ref, str):
+        name, sep, ch = ref.rpartition(":")
+        if sep and ch.strip().isdigit():
+            dev = int(name) if name.strip().isdigit() else name
+            return resolve_device(devices, dev, want_input), int(ch) - 1
+    return resolve_device(devices, ref, want_input), None
+
+
+# ---------------- Sahneler ----------------
+# Scene.controls sütunları (ebs_intercom_scenes.CONTROL_FIELDS sırasıyla)
+SCENE_CONTROLS = [ControlState.GAIN, ControlState.MUTE, ControlState.PTT_ENABLED,
+                  ControlState.GATE, ControlState.PRIORITY]
+
+
+def scene_endpoint(devices, ep):
+    """(id, kanal) -> sahnede saklanan uç; id değişirse cihaz adıyla bulunur."""
+    dev_id, ch = ep
+    d = devices.get(dev_id)
+    return {"id": dev_id, "device": d["name"] if d else None,
+            "channel": None if ch is None else ch + 1}
+
+
+def resolve_scene_endpoint(devices, ref, want_input):
+    """Sahnedeki uç -> (id, kanal): aynı id'de aynı isimli cihaz varsa o, yoksa isimle."""
+    dev_id, name = ref["id"], ref.get("device")
+    ch = None if ref.get("channel") is None else int(ref["channel"]) - 1
+    d = devices.get(dev_id)
+    if d is not None and (name is None or d["name"] == name):
+        return dev_id, ch
+    if name is None:
+        raise ValueError(f"Cihaz bulunamadı: {dev_id!r}")
+    return resolve_device(devices, name, want_input), ch
+
+
+def capture_scene(name, names, routing, controls, mics, outs, devices, note=""):
+    """Anlık durumdan sahne; devices: DeviceRegistry (cihaz adları için)."""
+    return Scene(name, names, routing.matrix.copy(), controls.state[:, SCENE_CONTROLS],
+                 [scene_endpoint(devices, ep) for ep in mics],
+                 [scene_endpoint(devices, ep) for ep in outs], note=note)
+
+
+def recall_scene(scene, routing, controls, mics, outs, devices, bus=None, chunk=CHUNK):
+    """
+    Sahneyi mevcut durumla karşılaştırıp yalnızca farkı uygular:
+      1) değişen çapraz noktalar tek yayında (RoutingMatrix.apply_cells)
+      2) değişen kişilerin kontrolleri tek yayında (PTT basılı durumu korunur)
+      3) uç değişen kişilerin cihazları tek düzende (MixBus.swap_devices);
+         etkilenmeyen stream'ler yeniden açılmaz
+    1 ve 2 ses yolunda bir sonraki buffer'da duyulur; süreleri ayrı ölçülür.
+    Kişi sayısı aynı olmalıdır. Dönüş: rapor (yeni uçlar "mics"/"outs").
+    """
+    n = routing.size
+    if scene.size != n or controls.size != n:
+        raise ValueError(f"Sahne {scene.size} kişilik, şu an {n} kişi var")
+    new_mics = [resolve_scene_endpoint(devices, ref, True) for ref in scene.mics]
+    new_outs = [resolve_scene_endpoint(devices, ref, False) for ref in scene.outs]
+
+    t0 = time.perf_counter()
+    rows, cols = np.nonzero(routing.matrix != scene.routing)
+    if len(rows):
+        routing.apply_cells(rows, cols, scene.routing[rows, cols])
+    people = np.flatnonzero((controls.state[:, SCENE_CONTROLS] != scene.controls).any(axis=1))
+    if len(people):
+        controls.update(people, SCENE_CONTROLS, scene.controls[people])
+    apply_ms = (time.perf_counter() - t0) * 1000.0
+
+    changes = {}
+    for i in range(n):
+        mic = new_mics[i] if new_mics[i] != tuple(mics[i]) else None
+        out = new_outs[i] if new_outs[i] != tuple(outs[i]) else None
+        if mic is not None or out is not None:
+            changes[i] = (mic, out)
+    device_ms = 0.0
+    if changes and bus is not None and bus.is_alive():
+        device_ms = bus.swap_devices(changes)
+
+    buffer_ms = chunk * 1000.0 / RATE
+    print(f"[Sahne] '{scene.name}' v{scene.version}: {len(rows)} nokta, {len(people)} kişi, "
+          f"{len(changes)} cihaz değişti; uygulama {apply_ms:.3f} ms "
+          f"(buffer {buffer_ms:.1f} ms), cihazlar {device_ms:.1f} ms")
+    if apply_ms > buffer_ms:
+        print(f"[UYARI] Sahne uygulaması bir buffer'dan uzun sürdü ({apply_ms:.1f} ms)")
+    return {
+        "sahne": scene.name,
+        "surum": scene.version,
+        "nokta": len(rows),
+        "kisi": len(people),
+        "cihaz": len(changes),
+        "uygulama_ms": apply_ms,
+        "cihaz_ms": device_ms,
+        "buffer_ms": buffer_ms,
+        "mics": new_mics,
+        "outs": new_outs,
+    }
+
+
+def make_backend(config):
+    """
+    Config'teki "backend" alanından ses backend'i:
+        "pyaudio" (varsayılan) -> gerçek ses kartları
+        {"type": "sim", "realtime": false} -> SimBackend; kişi başına
+        "source" ("sine:440", "noise", "wav:konuk.wav") sanal mikrofon olur
+        ve her kişiye bir sanal çıkış açılır. Çok kanallı sanal arabirim
+        için "inputs" (cihaz başına kaynak listesi) ve "outputs" (cihaz
+        başına kanal sayısı) doğrudan verilebilir; cihaz tanımı yerine
+        {"source": ..., "rate": 44100, "ppm": 120} sözlüğü farklı hızlı /
+        kayan saatli cihaz kurar.
+    """
+    spec = config.get("backend", "pyaudio")
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    kind = spec.get("type", "pyaudio")
+
+    if kind == "pyaudio":
+        return PyAudioBackend()
+    if kind == "sim":
+        people = config.get("people", [])
+        sources = [person.get("source", f"sine:{220 * (i + 1)}") for i, person in enumerate(people)]
+        return SimBackend(
+            inputs=spec.get("inputs", sources),
+            outputs=spec.get("outputs", len(people)),
+            rate=RATE,
+            realtime=bool(spec.get("realtime", True)),
+            capture_seconds=float(spec.get("capture_seconds", 10.0))
+        )
+    raise ValueError(f"Bilinmeyen backend: {kind!r}")
+
+
+# ---------------- Headless ----------------
+class HeadlessEngine:
+    """
+    GUI'siz motor: show config'inden cihazları, routing preset'ini ve
+    kişi ayarlarını yükleyip MixBus'ı çalıştırır.
+
+    Config (JSON):
+        {
+          "buffer": 256,                      # frame (LATENCY_PROFILES)
+          "mode": "callback",                 # "blocking" | "callback"
+          "preset": "presets/tv_yayin.json",  # isteğe bağlı (yol ya da "presets" etiketi)
+          "presets": {"tv": "presets/tv_yayin.json"},  # canlı geçiş için (switch_preset)
+          "backend": "pyaudio",               # ya da {"type": "sim", ...}
+          "gate": {"threshold_db": -45},      # isteğe bağlı NoiseGate ayarları
+          "ducking": {"depth_db": -15},       # isteğe bağlı Ducker ayarları
+          "drift": false,                     # ayrı kristalli cihazlar için saat kayması telafisi
+          "record": {"dir": "kayitlar"},      # isteğe bağlı çok kanallı yayın kaydı
+          "scenes": {"dir": "sahneler",       # isteğe bağlı sahne deposu
+                     "cues": ["Açılış", "Haber"],
+                     "schedule": [{"scene": "Kapanış", "at": "21:00"},
+                                  {"scene": "Haber", "after": 30}]},
+          "people": [
+            {"name": "Reji", "mic": 3, "out": "reji", "gain": 1.0,
+             "mute": false, "ptt": false, "gate": true, "priority": true},
+            {"name": "Kamera 1", "mic": "Focusrite:3", "out": "Focusrite:3"}
+          ]
+        }
+
+    "mic"/"out": cihaz id'si, isim parçası ya da "cihaz:kanal" (kanal 1'den).
+    Aynı arabirimin kanallarındaki kişiler tek stream'i paylaşır. 48 kHz
+    desteklemeyen cihaz kendi hızıyla açılır ve yeniden örneklenir.
+    """
+    def __init__(self, config, p=None):
+        self.config = config
+        self.p = p or make_backend(config)
+        self.devices = DeviceRegistry(self.p)
+        self.stop_event = threading.Event()
+        self.bus = None
+
+        people = config.get("people", [])
+        if not people:
+            raise ValueError("Config'te 'people' listesi boş.")
+
+        self.names = [person.get("name", f"Kişi {i + 1}") for i, person in enumerate(people)]
+        if isinstance(self.p, SimBackend):
+            # Sanal cihazlar kişi sırasıyla eşleşir (config'te verilmediyse)
+            mic_refs = [person["mic"] if "mic" in person else self.p.input_ids[i]
+                        for i, person in enumerate(people)]
+            out_refs = [person["out"] if "out" in person else self.p.output_ids[i]
+                        for i, person in enumerate(people)]
+        else:
+            mic_refs = [person["mic"] for person in people]
+            out_refs = [person["out"] for person in people]
+        self.mics = [resolve_endpoint(self.devices, ref, True) for ref in mic_refs]
+        self.outs = [resolve_endpoint(self.devices, ref, False) for ref in out_refs]
+
+        self.controls = build_controls(people)
+        # Preset'ler derlenip önbellekte tutulur; config'teki "presets"
+        # (etiket -> yol) canlı geçiş için açılışta derlenir
+        self.presets = PresetLibrary(config.get("presets"))
+        self.routing = RoutingMatrix(len(people))
+        self.routing.load(self.preset_matrix(config.get("preset")))
+
+        # Sahneler açılışta önbelleğe alınır; zamanlayıcı start() ile başlar
+        scenes = config.get("scenes")
+        scenes = {"dir": scenes} if isinstance(scenes, str) else (scenes or {})
+        self.scenes = SceneStore(scenes["dir"]) if scenes.get("dir") else None
+        self.scheduler = None
+        if self.scenes is not None:
+            self.scenes.preload()
+            self.scheduler = SceneScheduler(self.recall_scene, scenes.get("cues", ()))
+            for item in scenes.get("schedule", ()):
+                self.scheduler.schedule(item["scene"], after=item.get("after"), at=item.get("at"))
+
+    def preset_matrix(self, ref):
+        """Preset (etiket ya da yol; None = herkes herkesi duyar) -> routing matrisi; sorunlar yazdırılır."""
+        if not ref:
+            n = len(self.names)
+            return np.ones((n, n), dtype=np.float32)
+        preset = self.presets.get(ref)
+        for issue in preset.check(self.names):
+            print(f"[Preset UYARISI] {self.presets.path(ref)}: {issue}")
+        return preset.matrix(self.names)
+
+    def capture_scene(self, name, note=""):
+        """Anlık durumu sahne deposuna yeni sürüm olarak kaydeder. Dönüş: sürüm."""
+        scene = capture_scene(name, self.names, self.routing, self.controls,
+                              self.mics, self.outs, self.devices, note)
+        return self.scenes.save(scene)
+
+    def recall_scene(self, name, version=None):
+        """Sahneyi diff'leyerek uygular (bkz. recall_scene). Dönüş: rapor."""
+        scene = self.scenes.load(name, version)
+        bus = self.bus if self.bus is not None and self.bus.is_alive() else None
+        report = recall_scene(scene, self.routing, self.controls, self.mics, self.outs,
+                              self.devices, bus, int(self.config.get("buffer", CHUNK)))
+        self.names = list(scene.names)
+        self.mics, self.outs = report["mics"], report["outs"]
+        return report
+
+    def switch_preset(self, ref, fade_ms=PRESET_FADE_MS):
+        """Çalışırken preset değiştirir; ses yolu fade_ms içinde yeni matrise geçer."""
+        self.routing.load(self.preset_matrix(ref), fade_ms=fade_ms)
+
+    def start(self):
+        self.stop_event.clear()
+        self.bus = MixBus(
+            self.p,
+            self.mics,
+            self.outs,
+            self.routing,
+            self.controls,
+            [None] * len(self.mics),
+            self.stop_event,
+            mode=self.config.get("mode", "blocking"),
+            chunk=int(self.config.get("buffer", CHUNK)),
+            gate=self.config.get("gate"),
+            ducking=self.config.get("ducking"),
+            drift=bool(self.config.get("drift", False))
+        )
+        record = self.config.get("record")
+        if record:
+            record = {"dir": record} if isinstance(record, str) else record
+            self.bus.start_recording(record.get("dir", "kayitlar"), record.get("name"))
+        self.bus.start()
+        if self.scheduler is not None:
+            self.scheduler.start()
+
+    def swap_device(self, i, mic=None, out=None):
+        """
+        Çalışırken i. kişinin cihazını değiştirir; mic/out config'teki gibi
+        (id, isim parçası, "cihaz:kanal"). Cihaz listesi önce yenilenir.
+        """
+        self.devices.refresh()
+        mic_ep = None if mic is None else resolve_endpoint(self.devices, mic, True)
+        out_ep = None if out is None else resolve_endpoint(self.devices, out, False)
+        ms = 0.0
+        if self.bus is not None and self.bus.is_alive():
+            ms = self.bus.swap_device(i, mic_ep, out_ep)
+        if mic_ep is not None:
+            self.mics[i] = mic_ep
+        if out_ep is not None:
+            self.outs[i] = out_ep
+        return ms
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.stop_event.set()
+        if self.bus:
+            self.bus.join(timeout=2.0)
+
+    def close(self):
+        self.stop()
+        try:
+            self.p.terminate()
+        except:
+            pass
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m ebs_intercom_engine",
+        description="EBS Intercom ses motorunu GUI olmadan çalıştırır."
+    )
+    ap.add_argument("--config", help="show config JSON dosyası")
+    ap.add_argument("--list-devices", action="store_true", help="ses cihazlarını listele")
+    ap.add_argument("--duration", type=float, default=0, help="saniye (0 = Ctrl+C'ye kadar)")
+    ap.add_argument("--monitor", type=float, default=0,
+                    help="her N saniyede kanal ölçümlerini (peak/RMS/LUFS) yazdır")
+    ap.add_argument("--record", metavar="KLASÖR",
+                    help="tüm girişleri ve dinleyen karışımlarını çok kanallı WAV'a kaydet")
+    args = ap.parse_args(argv)
+
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if args.record:
+        config["record"] = {"dir": args.record}
+
+    if args.list_devices:
+        p = make_backend(config)
+        try:
+            for d in get_devices(p):
+                print(f'{d["id"]:3d}  in={d["maxInput"]:<2} out={d["maxOutput"]:<2} {d["name"]}')
+        finally:
+            p.terminate()
+        return 0
+
+    if not args.config:
+        ap.error("--config ya da --list-devices gerekli")
+
+    engine = HeadlessEngine(config)
+    engine.start()
+    print(f"[INFO] Motor çalışıyor: {len(engine.names)} kişi, "
+          f"buffer={engine.bus.chunk}, mod={engine.bus.mode}")
+
+    started = time.monotonic()
+    last_monitor = started
+    try:
+        while engine.bus.is_alive():
+            now = time.monotonic()
+            if args.duration and now - started >= args.duration:
+                break
+            if args.monitor and now - last_monitor >= args.monitor:
+                for row in engine.bus.meter_snapshot():
+                    print(f'[Ölçüm] {row["kanal"]:<22} peak={row["peak_dbfs"]:>6.1f} dBFS '
+                          f'rms={row["rms_dbfs"]:>6.1f} dBFS LUFS-M={row["lufs_m"]:>6.1f} '
+                          f'LUFS-S={row["lufs_s"]:>6.1f}')
+                for row in engine.bus.health_report():
+                    print(f'[Saat] {row["stream"]:<22} {row["hiz_hz"]:>6} Hz  drift={row["drift_ppm"]} ppm')
+                if engine.bus.recorder is not None:
+                    print(f"[Kayıt] {engine.bus.recorder.status()}")
+                last_monitor = now
+            engine.stop_event.wait(min(0.5, args.monitor or 0.5))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,281 @@
+"""
+Routing matrisi görünümü: tüm çapraz noktalar tek bir Canvas üzerinde.
+Tıklama/tekerlek/hover koordinattan hücreye çevrilir (hit-test), yalnızca
+değişen (kirli) hücreler yeniden çizilir ve tüm animasyonlar tek bir
+after() tikinde ilerler. Çizim öğeleri yalnızca görünen hücreler için
+oluşturulur; 32x32 matris de anında açılır.
+"""
+import time
+import tkinter as tk
+
+BG = "#0f111a"
+GLOW_ON = "#7dffb2"
+GLOW_OFF = "#ff7d7d"
+GLOW_LOCK = "#7d7d7d"
+HOVER = "#3d3d3d"
+HEADER_FG = "#9da5ff"
+
+TICK_MS = 33        # animasyon varken ~30 fps
+IDLE_MS = 200       # animasyon yokken yalnızca routing değişimi yoklanır
+PULSE_STEP = 0.04   # saniye; halo 7 adımda söner
+PULSE_STEPS = 7
+
+
+def cell_size_for(n):
+    if n <= 8:
+        return 64
+    if n <= 16:
+        return 44
+    return 32
+
+
+class MatrixCanvas:
+    """
+    routing_fn: geçerli RoutingMatrix'i döndürür (uygulama matrisi yeniden
+    oluşturabilir), names_fn: kişi isimleri. Routing sürümü ya da boyutu
+    dışarıdan değişirse (preset, canlı kişi ekleme) görünüm kendini eşitler.
+    """
+    def __init__(self, parent, routing_fn, names_fn):
+        self.routing_fn = routing_fn
+        self.names_fn = names_fn
+
+        self.frame = tk.Frame(parent, bg=BG)
+        self.cv = tk.Canvas(self.frame, bg=BG, highlightthickness=0)
+        xs = tk.Scrollbar(self.frame, orient="horizontal", command=self._xview)
+        ys = tk.Scrollbar(self.frame, orient="vertical", command=self._yview)
+        self.cv.configure(xscrollcommand=xs.set, yscrollcommand=ys.set)
+        self.cv.grid(row=0, column=0, sticky="nsew")
+        ys.grid(row=0, column=1, sticky="ns")
+        xs.grid(row=1, column=0, sticky="ew")
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        self.items = {}     # (i, j) -> (halo, circle, text) — yalnızca görünen hücreler
+        self.drawn = {}     # (i, j) -> son çizilen görünüm
+        self.dirty = set()
+        self.anims = {}     # (i, j) -> pulse başlangıcı
+        self.hover = None
+        self.version = None
+        self.n = -1
+        self._after = None
+
+        self.cv.bind("<Button-1>", self.on_click)
+        self.cv.bind("<Button-3>", self.on_reset)
+        self.cv.bind("<MouseWheel>", self.on_wheel)
+        self.cv.bind("<Button-4>", self.on_wheel)
+        self.cv.bind("<Button-5>", self.on_wheel)
+        self.cv.bind("<Motion>", self.on_motion)
+        self.cv.bind("<Leave>", lambda e: self.set_hover(None))
+        self.cv.bind("<Configure>", lambda e: self.refresh_view())
+
+        self.rebuild()
+        self._tick()
+
+    # ---------------- Yerleşim ----------------
+    def rebuild(self):
+        """Boyut değişince başlıkları ve kaydırma alanını baştan kurar."""
+        routing = self.routing_fn()
+        names = self.names_fn()
+        self.cv.delete("all")
+        self.items.clear()
+        self.drawn.clear()
+        self.dirty.clear()
+        self.anims.clear()
+        self.hover = None
+
+        n = self.n = routing.size
+        cell = self.cell = cell_size_for(n)
+        self.left = 160
+        self.top = 50 if n <= 8 else 110
+        small = cell < 44
+        self.font = ("Segoe UI", 7 if small else 9, "bold")
+
+        # Başlıklar ucuz (2N öğe); hücreler görünür alana göre oluşturulur
+        for j in range(n):
+            name = names[j] if j < len(names) else f"Kişi {j + 1}"
+            x = self.left + j * cell + cell / 2
+            if n <= 8:
+                self.cv.create_text(x, self.top / 2, text=f"🎧 {name}",
+                                    font=("Segoe UI", 12, "bold"), fill=HEADER_FG)
+            else:
+                self.cv.create_text(x, self.top - 6, text=f"🎧 {name}", angle=45, anchor="w",
+                                    font=("Segoe UI", 9, "bold"), fill=HEADER_FG)
+        for i in range(n):
+            name = names[i] if i < len(names) else f"Kişi {i + 1}"
+            self.cv.create_text(self.left - 10, self.top + i * cell + cell / 2, anchor="e",
+                                text=f"🎙 {name}", font=("Segoe UI", 12 if n <= 8 else 9, "bold"),
+                                fill=HEADER_FG)
+
+        self.cv.configure(scrollregion=(0, 0, self.left + n * cell + 10, self.top + n * cell + 10))
+        self.version = None
+        self.refresh_view()
+
+    def visible_range(self):
+        cell = self.cell
+        w = max(self.cv.winfo_width(), 1)
+        h = max(self.cv.winfo_height(), 1)
+        x0, x1 = self.cv.canvasx(0) - self.left, self.cv.canvasx(w) - self.left
+        y0, y1 = self.cv.canvasy(0) - self.top, self.cv.canvasy(h) - self.top
+        cols = range(max(0, int(x0 // cell)), min(self.n, int(x1 // cell) + 1))
+        rows = range(max(0, int(y0 // cell)), min(self.n, int(y1 // cell) + 1))
+        return rows, cols
+
+    def refresh_view(self):
+        """Görünür hücrelerin öğelerini oluşturur, dışarıda kalanları siler."""
+        rows, cols = self.visible_range()
+        visible = {(i, j) for i in rows for j in cols}
+
+        for key in [k for k in self.items if k not in visible]:
+            for item in self.items.pop(key):
+                self.cv.delete(item)
+            self.drawn.pop(key, None)
+
+        cell = self.cell
+        pad = max(2, cell // 13)
+        for key in visible:
+            if key in self.items:
+                continue
+            i, j = key
+            x = self.left + j * cell
+            y = self.top + i * cell
+            halo = self.cv.create_oval(x + pad, y + pad, x + cell - pad, y + cell - pad,
+                                       outline="", fill="")
+            circle = self.cv.create_oval(x + 2 * pad, y + 2 * pad, x + cell - 2 * pad,
+                                         y + cell - 2 * pad, fill=BG, outline="")
+            text = self.cv.create_text(x + cell / 2, y + cell / 2, text="",
+                                       font=self.font, fill=BG)
+            self.items[key] = (halo, circle, text)
+            self.dirty.add(key)
+        self.redraw()
+
+    # ---------------- Çizim ----------------
+    def look(self, key, matrix, routing, now):
+        i, j = key
+        if i == j:
+            return (GLOW_LOCK, "", "")
+        on = matrix[i, j] > 0
+        db = routing.level_db(i, j)
+        text = f"{db:+.0f} dB" if self.cell >= 44 else f"{db:+.0f}"
+
+        halo = ""
+        start = self.anims.get(key)
+        if start is not None:
+            k = int((now - start) / PULSE_STEP)
+            if k < PULSE_STEPS:
+                # saydamlık yerine açıktan koyuya gri
+                v = 200 - k * 20
+                halo = f"#{v:02x}{v:02x}{v:02x}"
+        elif key == self.hover:
+            halo = HOVER
+        return (GLOW_ON if on else GLOW_OFF, text, halo)
+
+    def redraw(self):
+        """Yalnızca kirli hücreler; görünüm değişmediyse itemconfig yapılmaz."""
+        if not self.dirty:
+            return
+        routing = self.routing_fn()
+        matrix = routing.matrix
+        now = time.monotonic()
+        for key in self.dirty:
+            items = self.items.get(key)
+            if items is None:
+                continue
+            look = self.look(key, matrix, routing, now)
+            if self.drawn.get(key) == look:
+                continue
+            color, text, halo = look
+            self.cv.itemconfig(items[0], fill=halo)
+            self.cv.itemconfig(items[1], fill=color)
+            self.cv.itemconfig(items[2], text=text)
+            self.drawn[key] = look
+        self.dirty.clear()
+
+    def sync(self):
+        """Routing dışarıdan değiştiyse görünen hücreleri kirli işaretle."""
+        routing = self.routing_fn()
+        if routing.size != self.n:
+            self.rebuild()
+        elif routing.version != self.version:
+            self.dirty.update(self.items)
+        self.version = routing.version
+
+    def _tick(self):
+        """Tüm animasyonlar ve routing yoklaması için tek after() zinciri."""
+        if not self.cv.winfo_exists():
+            return
+        now = time.monotonic()
+        self.sync()
+        for key, start in list(self.anims.items()):
+            if now - start > PULSE_STEP * PULSE_STEPS:
+                del self.anims[key]
+            self.dirty.add(key)
+        self.redraw()
+        self._after = self.cv.after(TICK_MS if self.anims else IDLE_MS, self._tick)
+
+    def _kick(self):
+        """Yeni animasyon başladı: boşta bekleyen tiki hızlandır."""
+        if self._after is not None:
+            self.cv.after_cancel(self._after)
+        self._after = self.cv.after(TICK_MS, self._tick)
+
+    # ---------------- Olaylar ----------------
+    def hit(self, ev):
+        x = self.cv.canvasx(ev.x) - self.left
+        y = self.cv.canvasy(ev.y) - self.top
+        if x < 0 or y < 0:
+            return None
+        i, j = int(y // self.cell), int(x // self.cell)
+        if i >= self.n or j >= self.n:
+            return None
+        return (i, j)
+
+    def set_hover(self, key):
+        if key == self.hover:
+            return
+        if key is not None and key[0] == key[1]:
+            key = None
+        self.dirty.update(k for k in (self.hover, key) if k is not None)
+        self.hover = key
+        self.redraw()
+
+    def on_motion(self, ev):
+        self.set_hover(self.hit(ev))
+
+    def on_click(self, ev):
+        key = self.hit(ev)
+        if key is None or key[0] == key[1]:
+            return
+        # Yeni sürüm yayınlanır; ses yolu kilitsiz okur
+        self.routing_fn().toggle(*key)
+        self.anims[key] = time.monotonic()
+        self.dirty.add(key)
+        self.redraw()
+        self._kick()
+
+    def apply_level(self, key, db):
+        self.routing_fn().set_level_db(key[0], key[1], db)
+        self.dirty.add(key)
+        self.redraw()
+
+    def on_wheel(self, ev):
+        up = getattr(ev, "delta", 0) > 0 or getattr(ev, "num", 0) == 4
+        key = self.hit(ev)
+        if key is None or key[0] == key[1]:
+            # Hücre dışında tekerlek matrisi kaydırır
+            self._yview("scroll", -1 if up else 1, "units")
+            return
+        routing = self.routing_fn()
+        self.apply_level(key, routing.level_db(*key) + (1.0 if up else -1.0))
+
+    def on_reset(self, ev):
+        key = self.hit(ev)
+        if key is not None and key[0] != key[1]:
+            self.apply_level(key, 0.0)
+
+    def _xview(self, *args):
+        self.cv.xview(*args)
+        self.refresh_view()
+
+    def _yview(self, *args):
+        self.cv.yview(*args)
+        self.refresh_view()
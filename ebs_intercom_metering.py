@@ -0,0 +1,221 @@
+"""
+Yayın ölçümü: kanal başına (girişler + çıkış busları) peak dBFS,
+pencereli RMS dBFS ve kısa süreli yüksekliği (LUFS benzeri, K-ağırlıklı)
+tüm kanallar için tek seferde, vektörel hesaplar. Her hop'un değerleri
+halka buffer'lı geçmişe yazılır; GUI ve headless izleyici son N saniyeyi
+kopyalamadan sorgulayabilir. Ses yolu ölçümü beklemez: MeterFeed hop'ları
+önceden ayrılmış halkaya kopyalar, ölçüm ayrı thread'de yapılır.
+
+K-ağırlığı BS.1770 filtrelerinin genlik yanıtından, hop başına rfft
+üzerinde uygulanır (Parseval): zaman alanında IIR durumu tutulmaz, ölçüm
+hop'lar arasında bağımsızdır. Bu yüzden değer "LUFS benzeri"dir; gating
+uygulanmaz.
+"""
+import numpy as np
+
+FULL_SCALE = 32768.0
+FLOOR_DB = -120.0
+
+RMS_WINDOW = 0.3         # saniye
+MOMENTARY_WINDOW = 0.4   # saniye
+SHORT_TERM_WINDOW = 3.0  # saniye
+FEED_SECONDS = 0.25      # MeterFeed halkası; ölçüm thread'i bundan fazla geride kalırsa hop atlar
+
+
+def _biquad_response(b, a, w):
+    z = np.exp(-1j * w)
+    num = b[0] + b[1] * z + b[2] * z * z
+    den = a[0] + a[1] * z + a[2] * z * z
+    return num / den
+
+
+def k_weighting_power(rate, n_fft):
+    """rfft bin'leri için K-ağırlığı |H(f)|^2 (shelf + high-pass, BS.1770)."""
+    # Yüksek raf (~+4 dB, 1.68 kHz)
+    gain_db, q, fc = 3.99984385397, 0.7071752369554193, 1681.974450955533
+    k = np.tan(np.pi * fc / rate)
+    vh = 10.0 ** (gain_db / 20.0)
+    vb = vh ** 0.499666774155
+    a0 = 1.0 + k / q + k * k
+    shelf_b = [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+    shelf_a = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    # Yüksek geçiren (~38 Hz)
+    q, fc = 0.5003270373253953, 38.13547087613982
+    k = np.tan(np.pi * fc / rate)
+    a0 = 1.0 + k / q + k * k
+    hp_b = [1.0, -2.0, 1.0]
+    hp_a = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    w = 2.0 * np.pi * np.fft.rfftfreq(n_fft, 1.0 / rate) / rate
+    h = _biquad_response(shelf_b, shelf_a, w) * _biquad_response(hp_b, hp_a, w)
+    return (np.abs(h) ** 2).astype(np.float32)
+
+
+def to_db(power, floor=FLOOR_DB):
+    """Ortalama kare (tam ölçek = 1) -> dB."""
+    with np.errstate(divide="ignore"):
+        return np.maximum(10.0 * np.log10(power), floor)
+
+
+class Metering:
+    """
+    channels: kanal etiketleri (ör. "mic Reji", "çıkış 5"). hop: ölçüm
+    bloğu (frame), history_seconds: tutulacak geçmiş.
+
+    process(block): block (C, k*hop) int16 ölçeğinde float/int; k hop'un
+    tamamı tek seferde hesaplanır. Yazıcı tek thread'dir; okuyucular
+    kilitsiz okur (en kötü ihtimalle son hop bir sonraki sorguda görünür).
+    """
+    def __init__(self, channels, hop, rate, history_seconds=60.0):
+        self.channels = list(channels)
+        self.hop = hop
+        self.rate = rate
+        c = len(self.channels)
+        self.capacity = max(1, int(history_seconds * rate / hop))
+
+        self.peak = np.zeros((self.capacity, c), dtype=np.float32)   # tam ölçek oranı
+        self.ms = np.zeros((self.capacity, c), dtype=np.float32)     # ortalama kare
+        self.kms = np.zeros((self.capacity, c), dtype=np.float32)    # K-ağırlıklı ortalama kare
+        self.count = 0
+
+        # Parseval: sum(x^2) = (|X0|^2 + 2*sum|Xk|^2 + |X_N/2|^2) / N
+        parseval = np.full(hop // 2 + 1, 2.0, dtype=np.float32)
+        parseval[0] = 1.0
+        if hop % 2 == 0:
+            parseval[-1] = 1.0
+        self._kw = k_weighting_power(rate, hop) * parseval / (hop * hop * FULL_SCALE * FULL_SCALE)
+
+    @property
+    def size(self):
+        return len(self.channels)
+
+    def hops_for(self, seconds):
+        return int(min(self.count, self.capacity, max(1, round(seconds * self.rate / self.hop))))
+
+    # ---------------- Yazıcı ----------------
+    def process(self, block):
+        c = self.size
+        k = block.shape[1] // self.hop
+        if k == 0:
+            return
+        x = np.asarray(block[:, :k * self.hop], dtype=np.float32).reshape(c, k, self.hop)
+        self.process_hops(x.transpose(1, 0, 2))
+
+    def process_hops(self, x):
+        """x: (k, C, hop) hop'lar zaman sırasıyla; tek seferde ölçülür (MeterFeed)."""
+        k = x.shape[0]
+        if k == 0:
+            return
+        peak = np.abs(x).max(axis=2) / FULL_SCALE                       # k x C
+        ms = np.einsum("kch,kch->kc", x, x) / (self.hop * FULL_SCALE * FULL_SCALE)
+        spec = np.fft.rfft(x, axis=2)
+        power = spec.real ** 2 + spec.imag ** 2
+        kms = power @ self._kw                                           # k x C
+
+        rows = (self.count + np.arange(k)) % self.capacity
+        self.peak[rows] = peak
+        self.ms[rows] = ms
+        self.kms[rows] = kms
+        self.count += k
+
+    # ---------------- Okuyucular ----------------
+    def _last(self, arr, hops):
+        """Son hops satır, zaman sırasıyla (gerekirse iki parça birleştirilir)."""
+        end = self.count % self.capacity
+        start = end - hops
+        if start >= 0:
+            return arr[start:end]
+        return np.concatenate([arr[start:], arr[:end]])
+
+    def peak_dbfs(self, seconds=None):
+        hops = self.hops_for(seconds) if seconds else min(self.count, 1)
+        if hops == 0:
+            return np.full(self.size, FLOOR_DB, dtype=np.float32)
+        return 20.0 * np.log10(np.maximum(self._last(self.peak, hops).max(axis=0), 1e-6))
+
+    def rms_dbfs(self, seconds=RMS_WINDOW):
+        hops = self.hops_for(seconds)
+        if hops == 0:
+            return np.full(self.size, FLOOR_DB, dtype=np.float32)
+        return to_db(self._last(self.ms, hops).mean(axis=0))
+
+    def loudness(self, seconds=SHORT_TERM_WINDOW):
+        """K-ağırlıklı yükseklik (LUFS benzeri); varsayılan kısa süreli (3 sn)."""
+        hops = self.hops_for(seconds)
+        if hops == 0:
+            return np.full(self.size, FLOOR_DB, dtype=np.float32)
+        return np.maximum(-0.691 + to_db(self._last(self.kms, hops).mean(axis=0)), FLOOR_DB)
+
+    def history(self, seconds):
+        """Son N saniyenin hop başına değerleri (zaman x kanal), dB cinsinden."""
+        hops = self.hops_for(seconds)
+        return {
+            "channels": list(self.channels),
+            "hop_seconds": self.hop / self.rate,
+            "peak_dbfs": 20.0 * np.log10(np.maximum(self._last(self.peak, hops), 1e-6)),
+            "rms_dbfs": to_db(self._last(self.ms, hops)),
+            "loudness": np.maximum(-0.691 + to_db(self._last(self.kms, hops)), FLOOR_DB),
+        }
+
+    def snapshot(self):
+        """Kanal başına anlık özet (GUI tablosu / headless log)."""
+        peak = self.peak_dbfs(RMS_WINDOW)
+        rms = self.rms_dbfs()
+        mom = self.loudness(MOMENTARY_WINDOW)
+        short = self.loudness()
+        return [
+            {
+                "kanal": name,
+                "peak_dbfs": round(float(peak[c]), 1),
+                "rms_dbfs": round(float(rms[c]), 1),
+                "lufs_m": round(float(mom[c]), 1),
+                "lufs_s": round(float(short[c]), 1),
+            }
+            for c, name in enumerate(self.channels)
+        ]
+
+
+class MeterFeed:
+    """
+    Ses yolundan Metering'e hop aktarımı. push() ses thread'inde çalışır:
+    blokları önceden ayrılmış (hop x kanal x hop boyu) halkaya kopyalar,
+    ayırmaz. drain() ölçüm thread'inde biriken hop'ları ölçer. Tek yazar,
+    tek okuyucu; kilit yok. Okuyucu halkanın yarısından fazla geride
+    kalırsa en eski hop'lar atlanır (ölçümde boşluk olur, ses beklemez).
+    """
+    def __init__(self, metering, seconds=FEED_SECONDS):
+        self.metering = metering
+        hops = max(4, int(seconds * metering.rate / metering.hop))
+        self.buf = np.zeros((hops, metering.size, metering.hop), dtype=np.float32)
+        self.write_count = 0    # yazılan hop sayısı (monoton)
+        self.read_count = 0
+        self.skipped = 0
+
+    def push(self, *blocks):
+        """blocks: kanal sırasıyla alt alta gelen (satır x hop) parçalar (girişler, çıkışlar)."""
+        slot = self.buf[self.write_count % len(self.buf)]
+        row = 0
+        for block in blocks:
+            rows = block.shape[0]
+            slot[row:row + rows] = block[:, :slot.shape[1]]
+            row += rows
+        # Veri yazıldıktan sonra yayınla (okuyucu yarım hop görmez)
+        self.write_count += 1
+
+    def drain(self):
+        """Biriken hop'ları ölçer; dönüş: ölçülen hop sayısı."""
+        write_count = self.write_count
+        lag = write_count - self.read_count
+        if lag > len(self.buf) // 2:
+            self.skipped += lag - len(self.buf) // 2
+            self.read_count = write_count - len(self.buf) // 2
+        done = 0
+        while self.read_count < write_count:
+            # Halka sonuna kadar ardışık hop'lar tek çağrıda
+            start = self.read_count % len(self.buf)
+            n = min(write_count - self.read_count, len(self.buf) - start)
+            self.metering.process_hops(self.buf[start:start + n])
+            self.read_count += n
+            done += n
+        return done
@@ -0,0 +1,394 @@
+"""
+Offline render: kişi başına kaydedilmiş WAV'lar + routing preset'i +
+zaman çizelgesi (routing / gain / mute / PTT olayları) -> her dinleyenin
+duyacağı karışım, dinleyen başına bir WAV. Ses kartı ve gerçek zaman
+yoktur; CPU ne kadar hızlıysa o kadar hızlı çalışır.
+
+Canlı motorla aynı kod kullanılır: ControlState/RoutingMatrix'ten
+ağırlıklar, gate_weights (kapı + ducking) ve MixDsp (rampalı karışım,
+clip, int16). Olaylar canlıdaki gibi buffer sınırında uygulanır ve
+geçiş bir buffer boyunca rampalanır; ağırlıkların sabit olduğu ve
+VAD'nin kapalı olduğu bölümler BLOCK_FRAMES uzunluğunda tek matris
+çarpımıyla karıştırılır. Sonuç deterministiktir: --golden ile önceki
+bir render'la karşılaştırılarak mikser regresyon testi yapılır.
+
+    python -m ebs_intercom_offline --config render.json --out render/
+    python -m ebs_intercom_offline --config render.json --out render/ --golden golden/
+
+render.json örneği:
+    {
+      "buffer": 256,
+      "preset": "presets/tv_yayin.json",
+      "people": [
+        {"name": "Reji", "wav": "kayit/reji.wav", "priority": true},
+        {"name": "Konuk1", "wav": "kayit/konuk1.wav", "ptt": true}
+      ],
+      "timeline": [
+        {"t": 2.0, "ptt": {"Konuk1": true}},
+        {"t": 4.5, "route": ["Reji", "Konuk1", false], "gain": {"Reji": 0.7}},
+        {"t": 9.0, "preset": "presets/podcast.json"},
+        {"t": 12.0, "preset": {"path": "presets/tv_yayin.json", "fade_ms": 200}}
+      ]
+    }
+"""
+import argparse
+import json
+import os
+import time
+import wave
+
+import numpy as np
+
+from ebs_intercom_engine import (
+    CHUNK, RATE, ControlState, Ducker, MixDsp, NoiseGate, RoutingMatrix,
+    active_rows, build_controls, db_to_gain, gate_weights,
+)
+from ebs_intercom_presets import PRESET_FADE_MS, PresetLibrary
+from ebs_intercom_recorder import MappedWavFile
+from ebs_intercom_resample import TAPS, Resampler
+
+BLOCK_FRAMES = RATE        # sabit ağırlıklı bölüm başına karıştırılan frame
+READ_FRAMES = 65536        # WAV'dan tek seferde okunan frame
+
+# Zaman çizelgesindeki kişi başına kontrol olayları -> ControlState alanı.
+# Config'teki "ptt" PTT modunu açar; olaylarda "ptt" tuşa basılı olmasıdır.
+CONTROL_EVENTS = {
+    "gain": ControlState.GAIN,
+    "mute": ControlState.MUTE,
+    "ptt_mode": ControlState.PTT_ENABLED,
+    "ptt": ControlState.PTT_PRESSED,
+    "gate": ControlState.GATE,
+    "priority": ControlState.PRIORITY,
+}
+
+
+class WavInput:
+    """
+    Bir kişinin WAV'ı: blok blok okunur, mono'ya indirgenir, RATE değilse
+    Resampler ile motor hızına çevrilir (filtre gecikmesi atılır). Dosya
+    bitince sessizlik verir.
+    """
+    def __init__(self, path, rate=RATE):
+        self.path = path
+        self.w = wave.open(path, "rb")
+        if self.w.getsampwidth() != 2:
+            self.w.close()
+            raise ValueError(f"{path}: yalnızca 16-bit PCM WAV destekleniyor")
+        self.channels = self.w.getnchannels()
+        src_rate = self.w.getframerate()
+        self.frames = int(round(self.w.getnframes() * rate / src_rate))
+        self.resampler = Resampler(1, src_rate / rate) if src_rate != rate else None
+        self.skip = int(round(TAPS // 2 * rate / src_rate)) if self.resampler else 0
+        self.buf = np.zeros(0, dtype=np.float32)
+        self.done = False
+        self.delivered = 0
+
+    def _pull(self, n):
+        while len(self.buf) < n and not self.done:
+            raw = self.w.readframes(READ_FRAMES)
+            if raw:
+                x = np.frombuffer(raw, dtype=np.int16).reshape(-1, self.channels)
+                x = (x[:, 0] if self.channels == 1 else x.mean(axis=1)).astype(np.float32)
+            else:
+                # Dosya bitti: filtrede kalan kuyruğu boşalt
+                self.done = True
+                if self.resampler is None:
+                    break
+                x = np.zeros(TAPS, dtype=np.float32)
+            if self.resampler is not None:
+                x = self.resampler.process(x[None, :])[0]
+                if self.skip:
+                    dropped = min(self.skip, len(x))
+                    x = x[dropped:]
+                    self.skip -= dropped
+            self.buf = np.concatenate([self.buf, x])
+
+    def read_into(self, out):
+        """out: float32 satır (int16 ölçeği); dosya bitince kalan kısım sıfır."""
+        n = len(out)
+        self._pull(n)
+        k = min(n, len(self.buf), self.frames - self.delivered)
+        k = max(k, 0)
+        out[:k] = self.buf[:k]
+        out[k:] = 0
+        self.buf = self.buf[k:]
+        self.delivered += k
+
+    def close(self):
+        self.w.close()
+
+
+def input_path(person):
+    """Kişinin kayıt dosyası: "wav" ya da simülasyon config'indeki "source": "wav:...". """
+    if "wav" in person:
+        return person["wav"]
+    source = str(person.get("source", ""))
+    if source.startswith("wav:"):
+        return source[4:]
+    raise ValueError(f'{person.get("name", "?")}: "wav" dosyası gerekli')
+
+
+def output_file(j, name):
+    """Dinleyen başına dosya adı; sıra numarası aynı isimli kişileri ayırır."""
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    return f"{j + 1:02d}_{safe}.wav"
+
+
+def parse_timeline(timeline, names, chunk):
+    """
+    Olay listesi -> buffer sınırına yuvarlanmış (frame, anahtar, değer)
+    üçlüleri, zamana göre (aynı zamanda yazılış sırasıyla).
+    """
+    events = []
+    for event in timeline:
+        frame = int(round(float(event["t"]) * RATE / chunk)) * chunk
+        for key, value in event.items():
+            if key == "t":
+                continue
+            if key in CONTROL_EVENTS:
+                who = list(value)
+            elif key in ("route", "level_db"):
+                who = list(value[:2])
+            elif key == "preset":
+                who = []
+            else:
+                raise ValueError(f"Bilinmeyen olay: {key!r}")
+            # İsim hataları render başlamadan yakalanır
+            missing = [name for name in who if name not in names]
+            if missing:
+                raise ValueError(f"Kişi bulunamadı: {missing[0]!r} (t={event['t']})")
+            events.append((frame, key, value))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def preset_spec(value):
+    """Preset olayı: "yol" ya da {"path": yol, "fade_ms": 50} -> (yol, fade_ms)."""
+    if isinstance(value, dict):
+        return value["path"], float(value.get("fade_ms", PRESET_FADE_MS))
+    return value, PRESET_FADE_MS
+
+
+def read_pcm(path):
+    """16-bit WAV -> (frame x kanal) int16; golden karşılaştırması için."""
+    with wave.open(path, "rb") as w:
+        data = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        return data.reshape(-1, w.getnchannels())
+
+
+def compare_golden(out_dir, golden_dir, files, tolerance=1):
+    """
+    Render çıktısını golden dosyalarla karşılaştırır. tolerance: izin
+    verilen en büyük örnek farkı (BLAS çekirdek farkları ±1 LSB verebilir).
+    Dönüş: dosya başına {"dosya", "durum", "max_fark", "ilk_fark_sn"}.
+    """
+    rows = []
+    for name in files:
+        golden = os.path.join(golden_dir, name)
+        row = {"dosya": name, "durum": "OK", "max_fark": 0, "ilk_fark_sn": None}
+        if not os.path.exists(golden):
+            row["durum"] = "golden yok"
+            rows.append(row)
+            continue
+        a = read_pcm(os.path.join(out_dir, name)).astype(np.int32)
+        b = read_pcm(golden).astype(np.int32)
+        if a.shape != b.shape:
+            row["durum"] = f"uzunluk farklı ({a.shape[0]} / {b.shape[0]} frame)"
+            rows.append(row)
+            continue
+        diff = np.abs(a - b).max(axis=1) if len(a) else np.zeros(0, dtype=np.int32)
+        row["max_fark"] = int(diff.max()) if len(diff) else 0
+        if row["max_fark"] > tolerance:
+            row["durum"] = "FARKLI"
+            row["ilk_fark_sn"] = round(int(np.argmax(diff > tolerance)) / RATE, 3)
+        rows.append(row)
+    return rows
+
+
+class OfflineRenderer:
+    """
+    config: render.json içeriği (HeadlessEngine config'iyle aynı kişi
+    alanları + kişi başına "wav", "timeline", isteğe bağlı "duration" sn;
+    verilmezse en uzun WAV). "gate"/"ducking" ayarları canlıdaki gibidir.
+    """
+    def __init__(self, config):
+        self.config = config
+        people = config.get("people", [])
+        if not people:
+            raise ValueError("Config'te 'people' listesi boş.")
+        self.names = [person.get("name", f"Kişi {i + 1}") for i, person in enumerate(people)]
+        self.paths = [input_path(person) for person in people]
+        self.chunk = int(config.get("buffer", CHUNK))
+
+        n = len(people)
+        self.controls = build_controls(people)
+        self.events = parse_timeline(config.get("timeline", []), self.names, self.chunk)
+        # Zaman çizelgesindeki preset'ler render'dan önce derlenip doğrulanır
+        self.presets = PresetLibrary()
+        self.issues = []
+        refs = [config.get("preset")] + [preset_spec(v)[0] for _, k, v in self.events if k == "preset"]
+        for ref in dict.fromkeys(r for r in refs if r):
+            self.issues += [f"{ref}: {issue}" for issue in self.presets.get(ref).check(self.names)]
+        self.now = 0.0  # render saati (sn); canlıdaki time.monotonic() yerine
+        self.routing = RoutingMatrix(n)
+        self.routing.load(self.preset_matrix(config.get("preset")))
+
+        self.gate = NoiseGate(n, **dict(config.get("gate") or {}))
+        self.ducker = Ducker(n, **dict(config.get("ducking") or {}))
+        self._weights_key = None
+        self._mix_state = None
+
+    def preset_matrix(self, ref):
+        if not ref:
+            n = len(self.names)
+            return np.ones((n, n), dtype=np.float32)
+        return self.presets.get(ref).matrix(self.names)
+
+    def person(self, name):
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise ValueError(f"Kişi bulunamadı: {name!r}") from None
+
+    def apply_event(self, key, value):
+        """Olayı canlıdaki GUI/uzaktan kontrolün yaptığı gibi yayınlar."""
+        if key in CONTROL_EVENTS:
+            field = CONTROL_EVENTS[key]
+            for name, v in value.items():
+                i = self.person(name)
+                row = self.controls.state[i].copy()
+                row[field] = float(v)
+                self.controls.publish(i, *row)
+        elif key == "route":
+            speaker, listener, v = value
+            i, j = self.person(speaker), self.person(listener)
+            if isinstance(v, bool):
+                # Aç/kapa: açılınca son seviyesiyle (mikserdeki gibi)
+                v = db_to_gain(self.routing.level_db(i, j)) if v else 0.0
+            self.routing.set(i, j, float(v))
+        elif key == "level_db":
+            speaker, listener, db = value
+            self.routing.set_level_db(self.person(speaker), self.person(listener), float(db))
+        elif key == "preset":
+            ref, fade_ms = preset_spec(value)
+            self.routing.load(self.preset_matrix(ref), fade_ms=fade_ms, now=self.now)
+
+    def mix_state(self):
+        """(ağırlıklar, kapı maskesi, öncelik maskesi); her kişi kendi çıkışında (D = birim)."""
+        version, routing = self.routing.snapshot(self.now)
+        key = (version, self.controls.version)
+        if key != self._weights_key:
+            state = self.controls.state
+            weights = routing * self.controls.gains(state)[:, None]
+            self._mix_state = (weights.astype(np.float32, copy=False),
+                               self.controls.gate_mask(state),
+                               self.controls.priority_mask(state))
+            self._weights_key = key
+        return self._mix_state
+
+    def render(self, out_dir):
+        """Tüm dinleyenlerin WAV'larını out_dir'e yazar. Dönüş: özet sözlüğü."""
+        os.makedirs(out_dir, exist_ok=True)
+        t0 = time.perf_counter()
+        n, chunk = len(self.names), self.chunk
+        inputs = [WavInput(path) for path in self.paths]
+        files = [output_file(j, name) for j, name in enumerate(self.names)]
+        writers = []
+        try:
+            if self.config.get("duration"):
+                total = int(float(self.config["duration"]) * RATE)
+            else:
+                total = max(inp.frames for inp in inputs)
+            writers = [MappedWavFile(os.path.join(out_dir, f), 1, RATE) for f in files]
+
+            # İki DSP aşaması: olay/VAD buffer'ları için canlıdaki buffer
+            # boyu, sabit bölümler için büyük blok
+            block = max(chunk, BLOCK_FRAMES // chunk * chunk)
+            dsp_chunk = MixDsp(n, n, chunk)
+            dsp_block = MixDsp(n, n, block) if block > chunk else dsp_chunk
+            # Canlıdaki gibi ilk buffer sıfırdan rampayla açılır
+            prev = np.zeros((n, n), dtype=np.float32)
+            events = self.events
+            e = 0
+            pos = 0
+            blocks = 0
+
+            while pos < total:
+                self.now = pos / RATE
+                while e < len(events) and events[e][0] <= pos:
+                    self.apply_event(events[e][1], events[e][2])
+                    e += 1
+                weights, gate_mask, priority = self.mix_state()
+                next_event = events[e][0] if e < len(events) else None
+                # Preset geçişi sürerken ağırlıklar buffer buffer değişir
+                steady = (not (gate_mask.any() or priority.any() or self.ducker.engaged)
+                          and self.routing.fade is None and np.array_equal(prev, weights))
+                if (steady and block > chunk and total - pos >= block
+                        and (next_event is None or next_event - pos >= block)):
+                    dsp = dsp_block
+                else:
+                    dsp = dsp_chunk
+                m = dsp.chunk
+
+                for i, inp in enumerate(inputs):
+                    inp.read_into(dsp.frames[i])
+                weights = gate_weights(self.gate, self.ducker, dsp.frames, weights, gate_mask, priority)
+                out = dsp.mix(prev, weights, active_rows(prev, weights))
+                prev = weights
+
+                k = min(m, total - pos)
+                for j, wf in enumerate(writers):
+                    wf.write(out[j:j + 1, :k])
+                pos += m
+                blocks += 1
+        finally:
+            for wf in writers:
+                wf.close()
+            for inp in inputs:
+                inp.close()
+
+        elapsed = time.perf_counter() - t0
+        seconds = total / RATE
+        return {
+            "kisi": n,
+            "sure_sn": round(seconds, 3),
+            "render_sn": round(elapsed, 3),
+            "hiz_x": round(seconds / elapsed, 1) if elapsed > 0 else None,
+            "blok": blocks,
+            "dosyalar": files,
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m ebs_intercom_offline",
+        description="Kayıtlı kişi WAV'larını routing preset'i ve zaman çizelgesiyle "
+                    "gerçek zamandan hızlı karıştırır; dinleyen başına WAV yazar."
+    )
+    ap.add_argument("--config", required=True, help="render config JSON dosyası")
+    ap.add_argument("--out", required=True, help="çıktı klasörü")
+    ap.add_argument("--golden", help="karşılaştırılacak golden klasörü (farkta çıkış kodu 1)")
+    ap.add_argument("--tolerance", type=int, default=1, help="izin verilen örnek farkı (LSB)")
+    args = ap.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    renderer = OfflineRenderer(config)
+    for issue in renderer.issues:
+        print(f"[Preset UYARISI] {issue}")
+    report = renderer.render(args.out)
+    print(f'[INFO] Render: {report["sure_sn"]} sn ses, {report["render_sn"]} sn\'de '
+          f'({report["hiz_x"]}x gerçek zamanlı), {report["kisi"]} dinleyen -> {args.out}')
+
+    if not args.golden:
+        return 0
+    rows = compare_golden(args.out, args.golden, report["dosyalar"], args.tolerance)
+    for row in rows:
+        extra = f' ilk fark {row["ilk_fark_sn"]} sn' if row["ilk_fark_sn"] is not None else ""
+        print(f'[Golden] {row["dosya"]:<28} {row["durum"]:<10} max_fark={row["max_fark"]}{extra}')
+    return 0 if all(row["durum"] == "OK" for row in rows) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+"""
+Routing preset'leri: JSON dosyası bir kez okunur, doğrulanır ve rol
+(normalleştirilmiş kişi adı) anahtarlı derlenmiş forma çevrilir.
+
+Preset biçimi (değişmedi):
+    {"Reji": {"hear": ["Moderatör", "Konuk1"]}, ...}
+preset[konuşan]["hear"]: bu konuşanı duyacak dinleyenler. Preset'te
+olmayan konuşanı herkes duyar; kimse kendini duymaz.
+
+Hatalar (eksik dosya, bozuk JSON, "hear" listesi olmayan kayıt, kendini
+duyan kişi, kişiler arasında olmayan isim) sessizce yutulmaz; issues
+listesinde toplanır ve çağıran tarafından gösterilir. Kişi isimleri için
+hesaplanan matris önbellekte tutulur: aynı kişi listesiyle tekrar
+geçiş dosya okumadan ve liste taraması yapmadan, anında yapılır.
+PresetLibrary dosyaları değişiklik zamanıyla (mtime) izler; yalnızca
+değişen dosya yeniden derlenir.
+"""
+import json
+import os
+
+import numpy as np
+
+from ebs_intercom_devices import normalize_name
+
+PRESET_FADE_MS = 50.0   # canlı preset geçişinde eski/yeni matris arası geçiş
+MATRIX_CACHE = 16       # preset başına önbellekte tutulan kişi listesi sayısı
+
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class CompiledPreset:
+    """
+    Doğrulanmış, değiştirilemez preset. hears: {konuşan rolü: dinleyen
+    rolleri (frozenset)}; roles: rol -> dosyadaki ilk yazılışı (mesajlar
+    için). issues: derleme sırasında bulunan sorunlar.
+    """
+    def __init__(self, path, mtime, hears, roles, issues):
+        self.path = path
+        self.mtime = mtime
+        self.hears = hears
+        self.roles = roles
+        self.issues = tuple(issues)
+        self._matrices = {}
+
+    def matrix(self, names):
+        """
+        Kişi isimleri -> NxN routing matrisi (float32, salt-okunur;
+        RoutingMatrix.load kopyalar). Aynı isimli birden fazla kişi aynı
+        rolü paylaşır.
+        """
+        key = tuple(names)
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            return matrix
+
+        n = len(names)
+        people = {}
+        for i, name in enumerate(names):
+            people.setdefault(normalize_name(name), []).append(i)
+        matrix = np.ones((n, n), dtype=np.float32)
+        for speaker, listeners in self.hears.items():
+            rows = people.get(speaker)
+            if not rows:
+                continue
+            cols = [j for role in listeners for j in people.get(role, ())]
+            matrix[rows] = 0.0
+            matrix[np.ix_(rows, cols)] = 1.0
+        np.fill_diagonal(matrix, 0.0)
+        matrix.flags.writeable = False
+
+        if len(self._matrices) >= MATRIX_CACHE:
+            self._matrices.clear()
+        self._matrices[key] = matrix
+        return matrix
+
+    def check(self, names):
+        """Derleme sorunları + preset'te geçip kişiler arasında olmayan isimler."""
+        present = {normalize_name(name) for name in names}
+        missing = [self.roles[role] for role in self.roles if role not in present]
+        issues = list(self.issues)
+        if missing:
+            issues.append("kişiler arasında olmayan isim(ler): " + ", ".join(missing))
+        return issues
+
+
+def compile_preset(path):
+    """
+    JSON preset -> CompiledPreset. Hiç istisna fırlatmaz: okunamayan
+    dosya boş preset (herkes herkesi duyar) ve bir sorun kaydı verir.
+    """
+    mtime = file_mtime(path)
+    issues, hears, roles = [], {}, {}
+
+    def role(name):
+        norm = normalize_name(str(name))
+        roles.setdefault(norm, str(name))
+        return norm
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return CompiledPreset(path, mtime, {}, {}, [f"dosya bulunamadı: {path}"])
+    except (OSError, ValueError) as e:
+        return CompiledPreset(path, mtime, {}, {}, [f"okunamadı: {e}"])
+
+    if not isinstance(data, dict):
+        return CompiledPreset(path, mtime, {}, {}, ["kök bir JSON nesnesi olmalı"])
+
+    for speaker, entry in data.items():
+        allowed = entry.get("hear") if isinstance(entry, dict) else None
+        if not isinstance(allowed, list):
+            issues.append(f"{speaker!r}: 'hear' listesi yok (yok sayıldı)")
+            continue
+        s = role(speaker)
+        if s in hears:
+            issues.append(f"{speaker!r} birden fazla kez tanımlı (sonuncusu geçerli)")
+        listeners = set()
+        for listener in allowed:
+            l = role(listener)
+            if l == s:
+                issues.append(f"{speaker!r} kendini duyuyor (yok sayıldı)")
+                continue
+            listeners.add(l)
+        hears[s] = frozenset(listeners)
+    return CompiledPreset(path, mtime, hears, roles, issues)
+
+
+class PresetLibrary:
+    """
+    paths: etiket -> dosya yolu (GUI'deki mod listesi). Tüm preset'ler
+    açılışta derlenir; get() her çağrıda yalnızca dosyanın mtime'ına
+    bakar ve değişmişse yeniden derler. Etiket yerine doğrudan yol da
+    verilebilir (headless config, offline zaman çizelgesi).
+    """
+    def __init__(self, paths=None):
+        self.paths = dict(paths or {})
+        self._cache = {}    # yol -> CompiledPreset
+        for label in self.paths:
+            self.get(label)
+
+    def path(self, ref):
+        return self.paths.get(ref, ref)
+
+    def get(self, ref):
+        path = self.path(ref)
+        preset = self._cache.get(path)
+        if preset is None or preset.mtime != file_mtime(path):
+            preset = self._cache[path] = compile_preset(path)
+        return preset
+
+    def issues(self):
+        """Etiket -> derleme sorunları (yalnızca sorunlu preset'ler)."""
+        return {label: list(self.get(label).issues) for label in self.paths
+                if self.get(label).issues}
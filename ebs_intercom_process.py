@@ -0,0 +1,522 @@
+"""
+Süreç ayrımlı ses motoru: MixBus ayrı bir Python sürecinde çalışır, GUI
+ile GIL paylaşmaz. Mikser animasyonları, pencere çizimi ya da takılan
+bir Tk olay döngüsü ses yolunu bekletemez; GUI süreci çökse bile ses
+son ayarlarla devam eder.
+
+İki düzlem vardır:
+
+  Veri düzlemi (SharedPlane, multiprocessing.shared_memory):
+      routing matrisi, kişi kontrolleri ve VU seviyeleri sabit boyutlu
+      (MAX_PEOPLE) dizilerde. Routing ve kontroller sıra sayaçlı
+      (seqlock) yazılır: tek yazar (GUI'deki PlaneWriter) sayacı önce
+      tek, yazınca çift yapar; okuyucu (motor) sayaç değişmemişse
+      kopyayı kabul eder. VU seviyelerini motor doğrudan yazar.
+
+  Komut düzlemi (multiprocessing.Queue):
+      stream açan/kapatan yapısal işlemler (kişi ekle/çıkar, cihaz
+      değiştir, kayıt, sağlık/ölçüm raporu) istek-yanıt olarak. Cihazlar
+      kimlik + adla gönderilir (scene_endpoint): motor süreci PortAudio'yu
+      kendisi başlattığından id'ler farklıysa cihaz adıyla bulunur.
+
+GUI tarafında EngineProcess, MixBus'ın arayüzünü taklit eder; uygulama
+ikisini aynı şekilde kullanır. Motor süreci yalnızca bu modülü içe
+aktarır: spawn'ın üst sürecin giriş betiğini (GUI: tkinter,
+ttkbootstrap) çocukta yeniden çalıştırması engellenir (hidden_main).
+"""
+import contextlib
+import multiprocessing as mp
+import pickle
+import queue
+import signal
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ebs_intercom_devices import DeviceRegistry
+from ebs_intercom_engine import (
+    CHUNK, MAX_PEOPLE, ControlState, MixBus, RoutingMatrix,
+    endpoint, make_backend, resolve_scene_endpoint, scene_endpoint,
+)
+
+SYNC_INTERVAL = 0.002   # sn; motorun düzlemi ve komutları yoklama aralığı
+REPLY_TIMEOUT = 10.0    # sn; komut yanıtı (stream açma dahil)
+START_TIMEOUT = 15.0    # sn; sürecin açılıp stream'leri başlatması
+
+# Başlık (int64) alanları
+ROUTING_SEQ, CONTROL_SEQ, ROUTING_N, CONTROL_N, FADE_US, STOP = range(6)
+HEADER = 8
+
+
+class SharedPlane:
+    """
+    Paylaşılan bellek bloğu:
+        header   int64[HEADER]
+        routing  float32[MAX_PEOPLE, MAX_PEOPLE]
+        controls float32[MAX_PEOPLE, 6]
+        levels   float32[MAX_PEOPLE]   (VU, MixBus.levels)
+    create() GUI sürecinde, attach(name) motor sürecinde çağrılır.
+    """
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        m = MAX_PEOPLE
+        offset = 0
+        self.header = np.ndarray((HEADER,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += HEADER * 8
+        self.routing = np.ndarray((m, m), dtype=np.float32, buffer=shm.buf, offset=offset)
+        offset += m * m * 4
+        self.controls = np.ndarray((m, 6), dtype=np.float32, buffer=shm.buf, offset=offset)
+        offset += m * 6 * 4
+        self.levels = np.ndarray((m,), dtype=np.float32, buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def nbytes():
+        return HEADER * 8 + (MAX_PEOPLE * MAX_PEOPLE + MAX_PEOPLE * 6 + MAX_PEOPLE) * 4
+
+    @classmethod
+    def create(cls):
+        shm = shared_memory.SharedMemory(create=True, size=cls.nbytes())
+        plane = cls(shm, owner=True)
+        plane.header[:] = 0
+        plane.levels[:] = 0
+        return plane
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---------------- Yazar (tek: PlaneWriter) ----------------
+    def _write(self, seq, size, target, data):
+        h = self.header
+        n, cols = data.shape
+        h[seq] += 1                 # tek: yazılıyor
+        target[:n, :cols] = data
+        h[size] = n
+        h[seq] += 1                 # çift: tutarlı
+
+    def write_routing(self, matrix, fade_ms=0.0):
+        self.header[FADE_US] = int(fade_ms * 1000)
+        self._write(ROUTING_SEQ, ROUTING_N, self.routing, matrix)
+
+    def write_controls(self, state):
+        self._write(CONTROL_SEQ, CONTROL_N, self.controls, state)
+
+    # ---------------- Okuyucu (motor) ----------------
+    def _read(self, seq, size, source, cols, since):
+        """Değiştiyse (sayaç, kopya), değişmediyse ya da yazılıyorsa None."""
+        h = self.header
+        s = int(h[seq])
+        if s == since or s & 1:
+            return None
+        n = int(h[size])
+        data = source[:n, :cols or n].copy()
+        return (s, data) if int(h[seq]) == s else None
+
+    def read_routing(self, since):
+        fade_us = int(self.header[FADE_US])
+        got = self._read(ROUTING_SEQ, ROUTING_N, self.routing, None, since)
+        return None if got is None else (got[0], got[1], fade_us / 1000.0)
+
+    def read_controls(self, since):
+        return self._read(CONTROL_SEQ, CONTROL_N, self.controls, 6, since)
+
+    def close(self):
+        self.header = self.routing = self.controls = self.levels = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # dışarıda görünüm kaldı (ör. GUI'nin VU dizisi); süreç çıkınca serbest kalır
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class PlaneWriter(threading.Thread):
+    """
+    GUI sürecinde RoutingMatrix ve ControlState'in yayınladığı referansları
+    izler; değişen dizi paylaşılan düzleme kopyalanır. Yayınlar tek
+    referans değişimi olduğundan kimlik karşılaştırması yeterlidir. Canlı
+    preset geçişi (routing.fade) süresiyle birlikte iletilir; geçişi motor
+    kendi saatiyle yapar.
+    """
+    def __init__(self, plane, routing, controls, interval=SYNC_INTERVAL):
+        super().__init__(daemon=True)
+        self.plane = plane
+        self.routing = routing
+        self.controls = controls
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+        self._current = self._fade = self._state = None
+
+    def flush(self):
+        """Bekleyen değişiklikleri hemen yaz (komut göndermeden önce)."""
+        with self._lock:
+            current, fade = self.routing.current, self.routing.fade
+            if current is not self._current:
+                fresh = fade is not None and fade is not self._fade
+                self.plane.write_routing(current[1], fade[2] * 1000.0 if fresh else 0.0)
+                self._current, self._fade = current, fade
+            state = self.controls.state
+            if state is not self._state:
+                self.plane.write_controls(state)
+                self._state = state
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self._halt.set()
+
+
+def remote_exception(e):
+    """Kuyruğa konabilecek istisna (pickle edilemiyorsa RuntimeError)."""
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+@contextlib.contextmanager
+def hidden_main():
+    """
+    spawn, çocuk süreçte üst sürecin __main__'ini (yolundan ya da modül
+    adından) yeniden içe aktarır. engine_main ve argümanları __main__'e
+    bağlı olmadığından süreç başlatılırken __main__'in yolu ve adı
+    gizlenir; motor süreci GUI kütüphanelerini yüklemez.
+    """
+    main = sys.modules.get("__main__")
+    if main is None:
+        yield
+        return
+    saved = {key: main.__dict__[key] for key in ("__file__", "__spec__") if key in main.__dict__}
+    main.__dict__.pop("__file__", None)
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        main.__dict__.pop("__spec__", None)
+        main.__dict__.update(saved)
+
+
+# ---------------- Motor süreci ----------------
+def engine_main(plane_name, commands, replies, events, spec):
+    """
+    Motor sürecinin girişi (spawn). Kendi backend'ini ve cihaz kaydını
+    açar, MixBus'ı düzlemden okunan routing/kontrollerle başlatır ve
+    komutları işler. Üst süreç kapanırsa ses son durumla sürer; SIGTERM /
+    Ctrl+C ya da düzlemdeki STOP bayrağı durdurur.
+    """
+    plane = SharedPlane.attach(plane_name)
+    stop_event = threading.Event()
+    parent = mp.parent_process()
+    orphan = False
+
+    def on_error(title, message):
+        if not orphan:
+            events.put(("error", title, message))
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop_event.set())
+
+    try:
+        p = make_backend(spec.get("config", {}))
+        devices = DeviceRegistry(p)
+        mics = [resolve(devices, ref, True) for ref in spec["mics"]]
+        outs = [resolve(devices, ref, False) for ref in spec["outs"]]
+    except Exception as e:
+        events.put(("error", "Audio Stream Hatası", str(e)))
+        events.put(("exit", None))
+        plane.close()
+        return
+
+    n = len(mics)
+    routing = RoutingMatrix(n)
+    controls = ControlState(n)
+    applied = [0, 0]    # uygulanan routing / kontrol sayaçları
+    sync_plane(plane, routing, controls, applied)
+
+    bus = MixBus(p, mics, outs, routing, controls, [None] * n, stop_event,
+                 mode=spec.get("mode", "blocking"), chunk=spec.get("chunk", CHUNK),
+                 on_error=on_error, levels=plane.levels, gate=spec.get("gate"),
+                 ducking=spec.get("ducking"), drift=spec.get("drift", False))
+    bus.start()
+    events.put(("started", None))
+
+    while not stop_event.is_set() and bus.is_alive() and not plane.header[STOP]:
+        try:
+            request = commands.get(timeout=SYNC_INTERVAL)
+        except queue.Empty:
+            request = None
+        if request is not None:
+            seq, name, args, kwargs = request
+            try:
+                result = run_command(bus, devices, name, args, kwargs)
+                replies.put((seq, True, result))
+            except Exception as e:
+                replies.put((seq, False, remote_exception(e)))
+        sync_plane(plane, routing, controls, applied)
+
+        if not orphan and parent is not None and not parent.is_alive():
+            orphan = True
+            print("[UYARI] Arayüz süreci kapandı; ses son ayarlarla devam ediyor "
+                  "(durdurmak için SIGTERM / Ctrl+C)")
+
+    stop_event.set()
+    bus.join(timeout=3.0)
+    try:
+        p.terminate()
+    except Exception:
+        pass
+    if not orphan:
+        events.put(("exit", None))
+    plane.close()
+
+
+def sync_plane(plane, routing, controls, applied):
+    """
+    Düzlemde yeni routing / kontrol varsa motorun kopyasına yayınlar.
+    Boyut motorla uyuşmuyorsa (kişi ekleme/çıkarma komutu henüz
+    işlenmedi) bekletilir; komut işlenince bir sonraki turda uygulanır.
+    """
+    got = plane.read_routing(applied[0])
+    if got is not None and got[1].shape[0] == routing.size:
+        seq, matrix, fade_ms = got
+        routing.load(matrix, fade_ms=fade_ms)
+        applied[0] = seq
+    got = plane.read_controls(applied[1])
+    if got is not None and got[1].shape[0] == controls.size:
+        seq, state = got
+        n = state.shape[0]
+        controls.update(np.arange(n), np.arange(6), state)
+        applied[1] = seq
+
+
+def resolve(devices, ref, want_input):
+    """GUI'den gelen uç -> (id, kanal); bulunamazsa cihaz listesi bir kez tazelenir."""
+    try:
+        return resolve_scene_endpoint(devices, ref, want_input)
+    except ValueError:
+        devices.refresh()
+        return resolve_scene_endpoint(devices, ref, want_input)
+
+
+def run_command(bus, devices, name, args, kwargs):
+    """Komut düzlemi: yalnızca aşağıdaki MixBus işlemleri çağrılabilir."""
+    if name == "add_person":
+        mic, out = args
+        return bus.add_person(resolve(devices, mic, True), resolve(devices, out, False), **kwargs)
+    if name == "remove_person":
+        return bus.remove_person(*args)
+    if name == "swap_devices":
+        changes = {
+            i: (None if mic is None else resolve(devices, mic, True),
+                None if out is None else resolve(devices, out, False))
+            for i, (mic, out) in args[0].items()
+        }
+        return bus.swap_devices(changes)
+    if name == "start_recording":
+        return bus.start_recording(*args).status()
+    if name == "stop_recording":
+        recorder = bus.stop_recording()
+        return None if recorder is None else recorder.status()
+    if name == "health_report":
+        return bus.health_report()
+    if name == "meter_snapshot":
+        return bus.meter_snapshot()
+    raise ValueError(f"Bilinmeyen komut: {name!r}")
+
+
+# ---------------- GUI tarafı ----------------
+class EngineProcess:
+    """
+    MixBus'ın süreç ayrımlı karşılığı. routing / controls GUI sürecindeki
+    nesnelerdir; PlaneWriter değişikliklerini düzleme yazar. Yapısal
+    işlemler komut olarak gönderilip yanıtı beklenir; yerel routing ve
+    kontrol dizileri MixBus'takiyle aynı şekilde güncellenir.
+
+    devices: GUI'nin DeviceRegistry'si (uçlar motor sürecine adıyla gider).
+    backend: motor sürecinde make_backend'e verilecek config (varsayılan
+    PyAudio). stop_event kurulunca süreç durdurulur.
+    """
+    def __init__(self, plane, devices, mic_ids, out_ids_by_person, routing, controls, stop_event,
+                 mode="blocking", chunk=CHUNK, on_error=None, gate=None, ducking=None, drift=False,
+                 backend=None):
+        self.plane = plane
+        self.devices = devices
+        self.routing = routing
+        self.controls = controls
+        self.stop_event = stop_event
+        self.on_error = on_error
+        self.levels = plane.levels
+        self.recorder = None        # kayıt sürüyorsa son durum özeti
+        self.spec = {
+            "config": backend or {},
+            "mics": [self.ref(m) for m in mic_ids],
+            "outs": [self.ref(o) for o in out_ids_by_person],
+            "mode": mode,
+            "chunk": chunk,
+            "gate": gate,
+            "ducking": ducking,
+            "drift": drift,
+        }
+        ctx = mp.get_context("spawn")
+        self.commands = ctx.Queue()
+        self.replies = ctx.Queue()
+        self.events = ctx.Queue()
+        self.writer = PlaneWriter(plane, routing, controls)
+        self._call_lock = threading.Lock()
+        self._seq = 0
+        self._started = threading.Event()
+        # GUI çökse de ses sürsün: daemon değil (üst süreç çıkarken beklenir)
+        self.process = ctx.Process(
+            target=engine_main, name="ebs-intercom-engine", daemon=False,
+            args=(plane.name, self.commands, self.replies, self.events, self.spec)
+        )
+        self._watcher = threading.Thread(target=self.watch, daemon=True)
+
+    def ref(self, ep):
+        return scene_endpoint(self.devices, endpoint(ep))
+
+    # ---------------- Yaşam döngüsü ----------------
+    def start(self):
+        self.plane.header[STOP] = 0
+        self.writer.flush()
+        self.writer.start()
+        with hidden_main():
+            self.process.start()
+        self._watcher.start()
+
+    def wait_started(self, timeout=START_TIMEOUT):
+        return self._started.wait(timeout)
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def watch(self):
+        """Motor olaylarını (hata, çıkış) iletir; stop_event kurulunca süreci durdurur."""
+        while True:
+            try:
+                event = self.events.get(timeout=0.05)
+            except queue.Empty:
+                event = None
+            if event is not None:
+                kind = event[0]
+                if kind == "started":
+                    self._started.set()
+                elif kind == "error" and self.on_error:
+                    self.on_error(event[1], event[2])
+                elif kind == "exit":
+                    break
+            if self.stop_event.is_set():
+                break
+            if not self.process.is_alive():
+                if self.on_error:
+                    self.on_error("Ses Motoru",
+                                  f"Ses motoru süreci beklenmedik şekilde kapandı (kod {self.process.exitcode})")
+                break
+        self.stop_event.set()
+        self.shutdown()
+
+    def shutdown(self, timeout=5.0):
+        self.writer.stop()
+        if self.plane.header is not None:
+            self.plane.header[STOP] = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print("[UYARI] Ses motoru süreci durmadı, sonlandırılıyor")
+            self.process.terminate()
+            self.process.join(1.0)
+        self.recorder = None
+
+    def join(self, timeout=None):
+        if self._watcher.is_alive():
+            self._watcher.join(timeout)
+
+    # ---------------- Komutlar ----------------
+    def call(self, name, *args, timeout=REPLY_TIMEOUT, **kwargs):
+        if not self.process.is_alive():
+            raise RuntimeError("Ses motoru süreci çalışmıyor")
+        with self._call_lock:
+            # Komuttan önce GUI'deki son routing/kontroller düzlemde olsun
+            self.writer.flush()
+            self._seq += 1
+            seq = self._seq
+            self.commands.put((seq, name, args, kwargs))
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    got, ok, result = self.replies.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise TimeoutError(f"Ses motoru yanıt vermedi: {name}")
+                if got == seq:
+                    break       # zaman aşımına uğramış eski yanıtlar atlanır
+        if not ok:
+            raise result
+        return result
+
+    def add_person(self, mic_id, out_id, vu_callback=None, sends=None, hears=None,
+                   gain=1.0, mute=False, ptt_enabled=False, gate=False, priority=False):
+        # Yerel diziler önce büyür; motor, kişiyi ekleyene kadar yeni boyutu bekletir
+        self.controls.add(gain, mute, ptt_enabled, False, gate, priority)
+        self.routing.add_person(sends, hears)
+        try:
+            return self.call("add_person", self.ref(mic_id), self.ref(out_id),
+                             sends=sends, hears=hears, gain=gain, mute=mute,
+                             ptt_enabled=ptt_enabled, gate=gate, priority=priority)
+        except Exception:
+            n = self.controls.size - 1
+            self.controls.remove(n)
+            self.routing.remove_person(n)
+            raise
+
+    def remove_person(self, i):
+        ms = self.call("remove_person", i)
+        self.routing.remove_person(i)
+        self.controls.remove(i)
+        return ms
+
+    def swap_device(self, i, mic_id=None, out_id=None):
+        ms = self.swap_devices({i: (mic_id, out_id)})
+        print(f"[INFO] Kişi {i + 1} cihazı değişti: {ms:.1f} ms")
+        return ms
+
+    def swap_devices(self, changes):
+        changes = {i: (None if mic is None else self.ref(mic), None if out is None else self.ref(out))
+                   for i, (mic, out) in changes.items()}
+        return self.call("swap_devices", changes)
+
+    def start_recording(self, directory, name=None):
+        self.recorder = self.call("start_recording", directory, name)
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        return self.call("stop_recording")
+
+    def report(self, name):
+        """GUI pencereleri için rapor; motor meşgulse ya da durduysa boş liste."""
+        try:
+            return self.call(name, timeout=1.0)
+        except (RuntimeError, TimeoutError):
+            return []
+
+    def health_report(self):
+        return self.report("health_report")
+
+    def meter_snapshot(self):
+        return self.report("meter_snapshot")
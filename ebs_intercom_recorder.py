@@ -0,0 +1,331 @@
+"""
+Yayın kaydı: her mikrofon ve her dinleyen karışımı (çıkış bus'ı) tek
+çok kanallı WAV dosyasına, ses yolunu hiç bekletmeden yazılır.
+
+Ses yolu (blocking döngüsü ya da callback modunun kontrol thread'i)
+yalnızca ölçüme giden bloğu önceden ayrılmış bir hazırlık buffer'ına
+kopyalar; dolan buffer sınırlı kuyruğa girer ve diskteki dosyaya arka
+plan yazıcı thread'i aktarır. Buffer havuzu sabittir: disk yetişemezse
+bellek büyümez, veri atılır ve dosyaya aynı uzunlukta sessizlik yazılır
+(zaman çizelgesi kaymaz, atılan süre sayılır).
+
+Dosya parça parça önceden büyütülür ve yalnızca yazılan bölgesi bellek
+eşlemelidir (mmap penceresi); 8+ saatlik, 64 kanallı kayıtta da bellek
+sabit kalır. Başlık periyodik güncellenir (çökmede dosya okunabilir);
+4 GiB'ı aşan kayıt kapanışta RF64 (EBU Tech 3306) olarak işaretlenir.
+Kişi düzeni değişince (kanal listesi) yeni dosya (take) açılır; her
+take'in yanında kanal isimlerini ve zamanı tutan bir JSON dosyası vardır.
+"""
+import collections
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+SAMPLE_BYTES = 2              # int16 PCM
+BLOCK_SECONDS = 0.1           # hazırlık buffer'ı süresi
+QUEUE_SECONDS = 10.0          # disk takılırsa tamponlanabilecek süre
+GROW_SECONDS = 60.0           # dosya her seferinde bu kadar büyütülür
+HEADER_INTERVAL = 5.0         # başlık güncelleme aralığı (sn)
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_KSDATAFORMAT_SUBTYPE_PCM = bytes.fromhex("0100000000001000800000aa00389b71")
+
+
+def wav_header(channels, rate, data_bytes):
+    """
+    WAV başlığı; ds64 için ayrılmış JUNK chunk'ı içerir. data_bytes
+    4 GiB'ı aşarsa RF64 başlığı (JUNK -> ds64, boyutlar 0xFFFFFFFF).
+    """
+    block_align = channels * SAMPLE_BYTES
+    if channels > 2:
+        fmt = struct.pack("<HHIIHHHHI16s", _WAVE_FORMAT_EXTENSIBLE, channels, rate,
+                          rate * block_align, block_align, 16, 22, 16, 0,
+                          _KSDATAFORMAT_SUBTYPE_PCM)
+    else:
+        fmt = struct.pack("<HHIIHH", _WAVE_FORMAT_PCM, channels, rate,
+                          rate * block_align, block_align, 16)
+    header_bytes = 12 + 36 + 8 + len(fmt) + 8
+    riff_size = header_bytes - 8 + data_bytes
+    if riff_size <= 0xFFFFFFFF:
+        head = b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        junk = b"JUNK" + struct.pack("<I", 28) + bytes(28)
+        data = b"data" + struct.pack("<I", data_bytes)
+    else:
+        head = b"RF64" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        junk = b"ds64" + struct.pack("<IQQQI", 28, riff_size, data_bytes,
+                                     data_bytes // block_align, 0)
+        data = b"data" + struct.pack("<I", 0xFFFFFFFF)
+    return head + junk + b"fmt " + struct.pack("<I", len(fmt)) + fmt + data
+
+
+class MappedWavFile:
+    """
+    Önceden büyütülen, bellek eşlemeli çok kanallı int16 WAV/RF64 dosyası.
+    Yalnızca yazıcı thread'i kullanır. write() frame x kanal iç içe yazar.
+    """
+    def __init__(self, path, channels, rate, grow_seconds=GROW_SECONDS):
+        self.path = path
+        self.channels = channels
+        self.rate = rate
+        self.frame_bytes = channels * SAMPLE_BYTES
+        self.data_offset = len(wav_header(channels, rate, 0))
+        self.frames = 0
+        gran = mmap.ALLOCATIONGRANULARITY
+        grow = int(grow_seconds * rate) * self.frame_bytes
+        self.grow = max(gran, grow // gran * gran)
+
+        self.f = open(path, "w+b")
+        self.f.write(wav_header(channels, rate, 0))
+        self.size = 0
+        self.window = None
+        self.window_start = 0   # pencerenin dosyadaki başlangıcı (granül hizalı)
+        self._map(self.data_offset)
+
+    def _map(self, offset):
+        """offset'ten itibaren dosyayı büyütüp yeni pencereyi eşler; eskisi boşaltılır."""
+        if self.window is not None:
+            self.window.flush()
+            self.window.close()
+        start = offset // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+        end = start + self.grow
+        if end > self.size:
+            self.f.truncate(end)
+            self.size = end
+        self.window = mmap.mmap(self.f.fileno(), end - start, offset=start)
+        self.window_start = start
+
+    def write(self, block):
+        """block: kanal x k int16 (kanal sırasıyla); dosyaya iç içe yazılır."""
+        k = block.shape[1]
+        done = 0
+        while done < k:
+            pos = self.data_offset + self.frames * self.frame_bytes
+            room = (self.window_start + len(self.window) - pos) // self.frame_bytes
+            if room <= 0:
+                self._map(pos)
+                continue
+            n = min(room, k - done)
+            view = np.frombuffer(self.window, dtype=np.int16, count=n * self.channels,
+                                 offset=pos - self.window_start).reshape(n, self.channels)
+            view[:] = block[:, done:done + n].T
+            del view
+            done += n
+            self.frames += n
+
+    def write_silence(self, n):
+        if n > 0:
+            self.write(np.zeros((self.channels, n), dtype=np.int16))
+
+    def update_header(self):
+        """Şimdiye kadarki boyutlarla başlık (çökmede dosya okunabilir kalır)."""
+        self.window.flush()
+        self.f.seek(0)
+        self.f.write(wav_header(self.channels, self.rate, self.frames * self.frame_bytes))
+        self.f.flush()
+
+    def close(self):
+        if self.window is not None:
+            self.window.flush()
+            self.window.close()
+            self.window = None
+        self.f.truncate(self.data_offset + self.frames * self.frame_bytes)
+        self.f.seek(0)
+        self.f.write(wav_header(self.channels, self.rate, self.frames * self.frame_bytes))
+        self.f.close()
+
+    @property
+    def seconds(self):
+        return self.frames / self.rate
+
+    @property
+    def is_rf64(self):
+        return self.data_offset - 8 + self.frames * self.frame_bytes > 0xFFFFFFFF
+
+
+class ShowRecorder:
+    """
+    directory: kayıt klasörü, name: dosya öneki (varsayılan tarih-saat),
+    channels: buffer havuzunun önceden ayrılacağı kanal sayısı.
+    Üretici (ses yolu) tek thread'dir: write() ayırmasız çalışır (yalnızca
+    kanal sayısı büyüdüğünde buffer ayrılır); kilidi yalnızca close() ile
+    çekişir.
+    """
+    def __init__(self, directory, rate, channels=2, name=None, block_seconds=BLOCK_SECONDS,
+                 queue_seconds=QUEUE_SECONDS, grow_seconds=GROW_SECONDS):
+        self.directory = directory
+        self.rate = rate
+        self.name = name or time.strftime("kayit_%Y%m%d_%H%M%S")
+        self.block_frames = max(1, int(block_seconds * rate))
+        self.grow_seconds = grow_seconds
+        os.makedirs(directory, exist_ok=True)
+
+        blocks = max(2, int(queue_seconds / block_seconds))
+        self._queue = queue.Queue(maxsize=blocks + 1)
+        self._free = collections.deque()     # yazıcının geri verdiği buffer'lar
+        for _ in range(blocks):
+            self._free.append(np.zeros((channels, self.block_frames), dtype=np.int16))
+
+        # Üretici durumu
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stage = None
+        self._fill = 0
+        self._channels = None
+        self._gap = 0                         # atılan, dosyaya sessizlik olarak yazılacak frame
+
+        # İstatistik (GUI / log)
+        self.dropped_frames = 0
+        self.takes = []                       # yazılan dosyalar
+        self.error = None
+        self.frames = 0
+
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    # ---------------- Üretici (ses yolu) ----------------
+    def write(self, channels, *blocks):
+        """
+        channels: kanal isimleri (tuple; değişince yeni take başlar).
+        blocks: kanal sırasıyla alt alta gelen (satır x k) parçalar, int16
+        ya da int16 ölçeğinde float32 (ör. girişler, sonra çıkış busları).
+        """
+        with self._lock:
+            if self._closed or self.error is not None:
+                return
+            if channels is not self._channels and channels != self._channels:
+                self._flush()
+                self._channels = channels
+            c, k = len(channels), blocks[0].shape[1]
+            done = 0
+            while done < k:
+                if self._stage is None and not self._take_stage(c):
+                    # Havuz boş: disk yetişemiyor, bu kısım sessizlik olur
+                    self._gap += k - done
+                    self.dropped_frames += k - done
+                    return
+                n = min(k - done, self.block_frames - self._fill)
+                row = 0
+                for block in blocks:
+                    rows = min(block.shape[0], c - row)
+                    np.clip(block[:rows, done:done + n], -32768, 32767,
+                            out=self._stage[row:row + rows, self._fill:self._fill + n],
+                            casting="unsafe")
+                    row += rows
+                self._fill += n
+                done += n
+                if self._fill == self.block_frames:
+                    self._flush()
+
+    def _take_stage(self, c):
+        try:
+            stage = self._free.popleft()
+        except IndexError:
+            return False
+        if stage.shape[0] < c:
+            stage = np.zeros((c, self.block_frames), dtype=np.int16)
+        self._stage, self._fill = stage, 0
+        return True
+
+    def _flush(self):
+        if self._stage is None or self._fill == 0:
+            return
+        item = (self._stage, self._fill, self._channels, self._gap)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._free.append(self._stage)
+            self._gap += self._fill
+            self.dropped_frames += self._fill
+        else:
+            self._gap = 0
+        self._stage, self._fill = None, 0
+
+    def close(self):
+        """Kalan veriyi yazar ve dosyayı kapatır; ses yolu çalışırken de çağrılabilir."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+        self._queue.put(None)
+        self._writer.join(timeout=30.0)
+
+    # ---------------- Yazıcı thread'i ----------------
+    def _open_take(self, channels):
+        path = os.path.join(self.directory, f"{self.name}_{len(self.takes) + 1:03d}.wav")
+        wav = MappedWavFile(path, len(channels), self.rate, self.grow_seconds)
+        self.takes.append(path)
+        meta = {
+            "file": os.path.basename(path),
+            "rate": self.rate,
+            "channels": list(channels),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "started_unix": time.time(),
+        }
+        self._write_meta(path, meta)
+        print(f"[INFO] Kayıt: {path} ({len(channels)} kanal)")
+        return wav, meta
+
+    @staticmethod
+    def _write_meta(path, meta):
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    def _close_take(self, wav, meta, dropped):
+        wav.close()
+        meta.update(frames=wav.frames, seconds=round(wav.seconds, 3),
+                    dropped_frames=dropped, format="RF64" if wav.is_rf64 else "WAV")
+        self._write_meta(wav.path, meta)
+
+    def _run(self):
+        wav = meta = None
+        channels = None
+        dropped = 0
+        last_header = time.monotonic()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            stage, n, item_channels, gap = item
+            try:
+                if self.error is None:
+                    if item_channels != channels:
+                        if wav is not None:
+                            self._close_take(wav, meta, dropped)
+                        wav, meta = self._open_take(item_channels)
+                        channels, dropped = item_channels, 0
+                    wav.write_silence(gap)
+                    dropped += gap
+                    wav.write(stage[:len(channels), :n])
+                    self.frames += n
+                    now = time.monotonic()
+                    if now - last_header > HEADER_INTERVAL:
+                        wav.update_header()
+                        last_header = now
+            except Exception as e:
+                self.error = e
+                print(f"[Kayıt HATASI]: {e}")
+            finally:
+                self._free.append(stage)
+        if wav is not None:
+            try:
+                self._close_take(wav, meta, dropped)
+            except Exception as e:
+                print(f"[Kayıt HATASI]: {e}")
+
+    def status(self):
+        """GUI / log özeti."""
+        return {
+            "dosya": self.takes[-1] if self.takes else "-",
+            "sure_sn": round(self.frames / self.rate, 1),
+            "atilan_sn": round(self.dropped_frames / self.rate, 2),
+            "kuyruk": self._queue.qsize(),
+            "hata": str(self.error) if self.error else "",
+        }
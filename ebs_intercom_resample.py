@@ -0,0 +1,177 @@
+"""
+Cihazlar arası örnekleme hızı dönüşümü ve saat kayması (drift) telafisi.
+
+Resampler: çok kanallı, akış halinde (bloklar arası durum tutan)
+Kaiser pencereli sinc interpolasyonu. Faz tablosu önceden hesaplanır;
+her çıkış örneği TAPS girişin ağırlıklı toplamıdır ve tüm kanallar tek
+seferde, vektörel hesaplanır. step (çıkış örneği başına ilerlenen giriş
+örneği) her blokta değiştirilebilir; drift denetleyicisi bunu kullanır.
+
+DriftController: halka buffer / cihaz kuyruğu doluluğunu izler ve
+hedefte tutmak için oranı ppm mertebesinde iter (PI denetleyici).
+Düzeltme, cihazın ana saate (master çıkış) göre ölçülen kaymasıdır.
+"""
+import numpy as np
+
+TAPS = 16          # filtre uzunluğu (örnek)
+PHASES = 256       # kesirli konum çözünürlüğü
+KAISER_BETA = 8.0  # ~-80 dB yan lob
+
+
+def sinc_table(cutoff, taps=TAPS, phases=PHASES, beta=KAISER_BETA):
+    """
+    (phases + 1) x taps ağırlık tablosu. cutoff: Nyquist'e oranla kesim
+    (aşağı örneklemede < 1, aliasing önlenir). Her satırın toplamı 1.
+    """
+    half = taps // 2
+    frac = np.arange(phases + 1, dtype=np.float64)[:, None] / phases
+    k = np.arange(-half + 1, half + 1, dtype=np.float64)[None, :]
+    x = k - frac
+    window = np.kaiser(2 * half * 64 + 1, beta)
+    # Pencere x ∈ [-half, half] aralığında örneklenir
+    w = np.interp(x, np.linspace(-half, half, len(window)), window)
+    h = cutoff * np.sinc(cutoff * x) * w
+    h /= h.sum(axis=1, keepdims=True)
+    return h.astype(np.float32)
+
+
+class Resampler:
+    """
+    channels: kanal sayısı; step: nominal giriş/çıkış oranı (ör. 44100 ->
+    48000 için 0.91875). process() verilen bloğun tamamını tüketir ve
+    üretilebilen kadar çıkış döndürür (blok başına ±1 örnek oynar).
+    Gecikme TAPS/2 örnektir.
+    """
+    def __init__(self, channels, step=1.0):
+        self.channels = channels
+        self.nominal = float(step)
+        self.step = float(step)
+        self.table = sinc_table(min(1.0, 1.0 / self.nominal) * 0.97)
+        self.offsets = np.arange(-TAPS // 2 + 1, TAPS // 2 + 1)
+        self.hist = np.zeros((channels, TAPS - 1), dtype=np.float32)
+        self.pos = float(TAPS // 2 - 1)  # sonraki çıkışın (hist + blok) içindeki konumu
+
+    def set_correction(self, correction):
+        """Nominal orana göreli düzeltme (ör. 120 ppm -> 1.2e-4)."""
+        self.step = self.nominal * (1.0 + correction)
+
+    def process(self, x, rows=None):
+        """
+        x: (k, L) blok (int16 ya da float). rows: x'in hangi kanallara ait
+        olduğu (None = tümü); diğer kanalların geçmişi korunur. Dönüş:
+        (k, M) float32.
+        """
+        hist = self.hist if rows is None else self.hist[rows]
+        buf = np.concatenate([hist, np.asarray(x, dtype=np.float32)], axis=1)
+        n = buf.shape[1]
+        last = n - TAPS // 2 - 1          # floor(t) için son geçerli indeks
+        count = int(np.floor((last - self.pos) / self.step)) + 1 if self.pos <= last else 0
+
+        if count > 0:
+            t = self.pos + self.step * np.arange(count)
+            i = np.floor(t).astype(np.intp)
+            phase = np.rint((t - i) * PHASES).astype(np.intp)
+            idx = i[:, None] + self.offsets[None, :]
+            out = np.einsum("cmk,mk->cm", buf[:, idx], self.table[phase])
+            self.pos += self.step * count
+        else:
+            out = np.zeros((buf.shape[0], 0), dtype=np.float32)
+
+        # Konumu yeni geçmişe göre kaydır
+        self.pos -= n - (TAPS - 1)
+        if rows is None:
+            self.hist = buf[:, -(TAPS - 1):].copy()
+        else:
+            self.hist[rows] = buf[:, -(TAPS - 1):]
+        return out
+
+
+def to_int16(x):
+    return np.clip(x, -32768, 32767).astype(np.int16)
+
+
+class DriftController:
+    """
+    Doluluk (frame) -> oran düzeltmesi. Doluluk hedefin üstündeyse cihaz
+    ana saatten hızlıdır, düzeltme artar (daha hızlı tüketilir). target
+    None ise ilk saniyenin ortalaması hedef alınır (ör. cihaz kuyruğu
+    kapasitesi bilinmediğinde).
+
+    PI denetleyici: kp (1/s) anlık hatayı, ki (1/s^2) kalıcı kaymayı
+    karşılar; kritik sönüme yakın, ~15 sn'de oturur. Ölçülen kayma integral
+    terimidir (oturduğunda cihazın ana saate göre farkı); doluluk
+    titreşimini taşıyan oransal terim gösterime girmez.
+    """
+    def __init__(self, rate, target=None, kp=0.5, ki=0.06, limit_ppm=2000.0, smoothing=0.5):
+        self.rate = rate
+        self.target = target
+        self.kp = kp
+        self.ki = ki
+        self.limit = limit_ppm * 1e-6
+        self.tau = smoothing       # doluluk ortalamasının zaman sabiti (sn)
+        self.fill = None           # üstel ortalama doluluk
+        self.integral = 0.0
+        self.correction = 0.0
+        self._warmup = 0.0
+
+    @property
+    def ppm(self):
+        return self.ki * self.integral * 1e6
+
+    def update(self, fill, dt):
+        """fill: anlık doluluk (frame), dt: son güncellemeden beri geçen süre (sn)."""
+        if self.fill is None:
+            self.fill = float(fill)
+            return self.correction
+        self.fill += min(1.0, dt / self.tau) * (fill - self.fill)
+        if self.target is None:
+            # Ortalama oturana kadar hedef belirlenmez
+            self._warmup += dt
+            if self._warmup < 2 * self.tau:
+                return self.correction
+            self.target = self.fill
+
+        err = (self.fill - self.target) / self.rate      # saniye
+        integral = self.integral + err * dt
+        correction = self.kp * err + self.ki * integral
+        if abs(correction) < self.limit:
+            # Sınırdayken integral büyütülmez (açılıştaki büyük hata kaymaya yazılmasın)
+            self.integral = integral
+        self.correction = float(np.clip(correction, -self.limit, self.limit))
+        return self.correction
+
+
+class DeviceClock:
+    """
+    Bir cihazın motor saatine bağlanması: nominal oranlı Resampler ve
+    (drift telafisi açıksa) DriftController.
+
+    to_engine=True: giriş cihazı (cihaz hızı -> motor hızı); False: çıkış
+    (motor hızı -> cihaz hızı). Doluluk her iki yönde de "tüketilmeyi
+    bekleyen" veri olduğundan düzeltme işareti aynıdır; gösterilen ppm
+    cihazın ana saate göre ne kadar hızlı olduğudur.
+    """
+    def __init__(self, device_rate, engine_rate, channels, to_engine, controller=None):
+        self.rate = device_rate
+        self.to_engine = to_engine
+        step = device_rate / engine_rate if to_engine else engine_rate / device_rate
+        self.resampler = Resampler(channels, step)
+        self.controller = controller
+        self._last = None
+
+    def process(self, x, rows=None):
+        return self.resampler.process(x, rows)
+
+    def update(self, fill, now):
+        """Doluluk ölçümüyle oranı güncelle (drift telafisi kapalıysa etkisiz)."""
+        if self.controller is None:
+            return
+        dt = 0.0 if self._last is None else now - self._last
+        self._last = now
+        self.resampler.set_correction(self.controller.update(fill, dt))
+
+    @property
+    def ppm(self):
+        if self.controller is None:
+            return None
+        return self.controller.ppm if self.to_engine else -self.controller.ppm
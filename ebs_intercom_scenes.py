@@ -0,0 +1,292 @@
+"""
+Sahneler: routing matrisi, kişi başına gain / mute / PTT modu / kapı /
+öncelik ve cihaz atamalarının tam anlık görüntüsü.
+
+SceneStore sahneleri diskte sürümlü tutar:
+
+    sahneler/
+      index.json              # isim -> klasör + sürüm listesi
+      Acilis/v0001.json       # her kayıt yeni sürüm, eskiler silinmez
+      Acilis/v0002.json
+
+Kaydedilen ve yüklenen sahneler bellekte (isim, sürüm) ile önbelleklenir;
+preload() hepsini açılışta okur, böylece geri çağırma sırasında disk
+G/Ç'si ve JSON çözümleme olmaz. Geri çağırma (diff ve yalnızca değişen
+çapraz noktaların / kişilerin / cihazların uygulanması) motordadır:
+ebs_intercom_engine.recall_scene.
+
+SceneScheduler sahneleri belirli bir süre sonra, saatte ya da cue
+listesinde sırayla (go()) çağırır.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+# Scene.controls sütunları (motor: SCENE_CONTROLS). "ptt" PTT modudur;
+# tuşa basılı olması anlık durumdur, sahnede saklanmaz.
+CONTROL_FIELDS = ("gain", "mute", "ptt", "gate", "priority")
+
+
+class Scene:
+    """
+    names: kişi isimleri; routing: NxN; controls: N x CONTROL_FIELDS;
+    mics/outs: kişi başına saklanan uç ({"id", "device", "channel"}:
+    id değişmişse cihaz adıyla bulunur; channel 1'den, None = kanalsız).
+    """
+    def __init__(self, name, names, routing, controls, mics, outs, version=0, saved=None, note=""):
+        self.name = name
+        self.names = list(names)
+        self.routing = np.array(routing, dtype=np.float32)
+        self.controls = np.array(controls, dtype=np.float32).reshape(len(self.names), len(CONTROL_FIELDS))
+        self.mics = list(mics)
+        self.outs = list(outs)
+        self.version = version
+        self.saved = saved
+        self.note = note
+        self.routing.flags.writeable = False
+        self.controls.flags.writeable = False
+
+    @property
+    def size(self):
+        return len(self.names)
+
+    def to_json(self):
+        people = []
+        for i, name in enumerate(self.names):
+            person = {"name": name, "mic": self.mics[i], "out": self.outs[i]}
+            for field, value in zip(CONTROL_FIELDS, self.controls[i].tolist()):
+                person[field] = value if field == "gain" else bool(value)
+            people.append(person)
+        return {
+            "name": self.name,
+            "version": self.version,
+            "saved": self.saved,
+            "note": self.note,
+            "people": people,
+            "routing": self.routing.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        people = data["people"]
+        controls = [[float(person.get(field, 1.0 if field == "gain" else 0.0))
+                     for field in CONTROL_FIELDS] for person in people]
+        routing = np.array(data["routing"], dtype=np.float32)
+        if routing.shape != (len(people), len(people)):
+            raise ValueError(f"Sahne {data.get('name')!r}: routing {routing.shape}, {len(people)} kişi")
+        return cls(data["name"], [person["name"] for person in people], routing, controls,
+                   [person.get("mic") for person in people], [person.get("out") for person in people],
+                   data.get("version", 0), data.get("saved"), data.get("note", ""))
+
+
+def safe_name(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name) or "sahne"
+
+
+def write_json(path, data):
+    """Önce geçici dosyaya, sonra yerine koyarak (yarım dosya kalmaz)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+class SceneStore:
+    """
+    directory: sahne klasörü (yoksa oluşturulur). index.json yoksa ya da
+    bozuksa klasörlerdeki sürüm dosyalarından yeniden kurulur.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache = {}    # (isim, sürüm) -> Scene
+        self.index = self._read_index()
+
+    def _read_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if isinstance(index.get("scenes"), dict):
+                return index
+        except (OSError, ValueError):
+            pass
+        return self.reindex()
+
+    def reindex(self):
+        """Sürüm dosyalarını tarayıp index'i yeniden kurar."""
+        scenes = {}
+        for folder in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, folder)
+            if not os.path.isdir(path):
+                continue
+            for file in sorted(f for f in os.listdir(path) if f.startswith("v") and f.endswith(".json")):
+                try:
+                    with open(os.path.join(path, file), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"[Sahne HATASI] {folder}/{file}: {e}")
+                    continue
+                entry = scenes.setdefault(data["name"], {"dir": folder, "versions": []})
+                entry["versions"].append({"version": data.get("version", 0),
+                                          "saved": data.get("saved"), "note": data.get("note", "")})
+        index = {"scenes": scenes}
+        write_json(os.path.join(self.directory, INDEX_FILE), index)
+        return index
+
+    def names(self):
+        return list(self.index["scenes"])
+
+    def versions(self, name):
+        """Sahnenin sürümleri (eskiden yeniye): {"version", "saved", "note"}."""
+        return list(self.index["scenes"].get(name, {}).get("versions", ()))
+
+    def _path(self, entry, version):
+        return os.path.join(self.directory, entry["dir"], f"v{version:04d}.json")
+
+    def save(self, scene):
+        """Sahneyi yeni sürüm olarak yazar; scene.version/saved doldurulur. Dönüş: sürüm."""
+        with self._lock:
+            scenes = self.index["scenes"]
+            entry = scenes.get(scene.name)
+            if entry is None:
+                used = {e["dir"] for e in scenes.values()}
+                folder = base = safe_name(scene.name)
+                k = 2
+                while folder in used:
+                    folder = f"{base}_{k}"
+                    k += 1
+                entry = {"dir": folder, "versions": []}
+                os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+            version = entry["versions"][-1]["version"] + 1 if entry["versions"] else 1
+            scene.version = version
+            scene.saved = time.strftime("%Y-%m-%dT%H:%M:%S")
+            write_json(self._path(entry, version), scene.to_json())
+
+            entry["versions"].append({"version": version, "saved": scene.saved, "note": scene.note})
+            scenes[scene.name] = entry
+            write_json(os.path.join(self.directory, INDEX_FILE), self.index)
+            self._cache[(scene.name, version)] = scene
+        return version
+
+    def load(self, name, version=None):
+        """Sahne (varsayılan son sürüm); önbellekte yoksa diskten okunur."""
+        entry = self.index["scenes"].get(name)
+        if entry is None or not entry["versions"]:
+            raise KeyError(f"Sahne bulunamadı: {name!r}")
+        if version is None:
+            version = entry["versions"][-1]["version"]
+        scene = self._cache.get((name, version))
+        if scene is None:
+            with open(self._path(entry, version), "r", encoding="utf-8") as f:
+                scene = Scene.from_json(json.load(f))
+            self._cache[(name, version)] = scene
+        return scene
+
+    def preload(self):
+        """Tüm sahnelerin son sürümünü önbelleğe alır (geri çağırmada disk okunmaz)."""
+        for name in self.names():
+            try:
+                self.load(name)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[Sahne HATASI] {name}: {e}")
+
+
+def parse_clock(text, now=None):
+    """"20:00" / "20:00:30" (yerel saat) -> kalan saniye; geçtiyse yarın."""
+    parts = [int(p) for p in str(text).split(":")]
+    h, m, s = (parts + [0, 0])[:3]
+    now = time.time() if now is None else now
+    t = time.localtime(now)
+    target = time.mktime((t.tm_year, t.tm_mon, t.tm_mday, h, m, s, 0, 0, -1))
+    if target <= now:
+        target = time.mktime((t.tm_year, t.tm_mon, t.tm_mday + 1, h, m, s, 0, 0, -1))
+    return target - now
+
+
+class SceneScheduler:
+    """
+    recall(isim) çağrılarını zamanlar. schedule(isim, after=sn) ya da
+    schedule(isim, at="20:00"); cues: cue listesi, go() sıradakini çağırır.
+    Tek arka plan thread'i en yakın zamanı bekler; recall o thread'de
+    çalışır (GUI'de root.after ile kendi thread'ine taşınmalıdır).
+    """
+    def __init__(self, recall, cues=()):
+        self.recall = recall
+        self.cues = list(cues)
+        self.position = -1
+        self._heap = []             # (monotonic zaman, sıra, isim)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def schedule(self, name, after=None, at=None):
+        delay = parse_clock(at) if at is not None else float(after or 0.0)
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, name))
+            self._seq += 1
+        self._wake.set()
+        return delay
+
+    def pending(self):
+        """[(isim, kalan sn)] zamana göre."""
+        now = time.monotonic()
+        with self._lock:
+            return [(name, round(due - now, 3)) for due, _, name in sorted(self._heap)]
+
+    def cancel(self):
+        with self._lock:
+            self._heap.clear()
+        self._wake.set()
+
+    def go(self):
+        """Cue listesinde sıradaki sahne; liste bittiyse None."""
+        if self.position + 1 >= len(self.cues):
+            return None
+        self.position += 1
+        name = self.cues[self.position]
+        self._fire(name)
+        return name
+
+    def _fire(self, name):
+        try:
+            self.recall(name)
+        except Exception as e:
+            print(f"[Sahne HATASI] {name}: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                due = self._heap[0][0] if self._heap else None
+            timeout = None if due is None else max(0.0, due - time.monotonic())
+            if timeout is None or timeout > 0:
+                self._wake.wait(timeout)
+                self._wake.clear()
+                continue
+            with self._lock:
+                if not self._heap or self._heap[0][0] > time.monotonic():
+                    continue
+                _, _, name = heapq.heappop(self._heap)
+            self._fire(name)
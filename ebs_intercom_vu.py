@@ -0,0 +1,90 @@
+"""
+Birleştirilmiş VU metre hattı. Ses thread'leri seviyeleri paylaşılan bir
+float dizisine yazar (eleman ataması, kilit ve Tk çağrısı yok); GUI
+tarafında tek bir zamanlayıcı (~30 fps) tüm metreleri okur ve yalnızca
+eşikten fazla değişenleri widget'lara uygular. Peak-hold ve düşüş (decay)
+burada, GUI thread'inde hesaplanır.
+"""
+import time
+
+import numpy as np
+
+FPS = 30
+THRESHOLD = 1.0            # 0..100 ölçeğinde; daha küçük değişim çizilmez
+DECAY_PER_SEC = 60.0       # gösterilen seviyenin düşüş hızı
+PEAK_HOLD = 1.5            # saniye
+PEAK_DECAY_PER_SEC = 25.0
+
+
+class VuMeterBank:
+    """
+    levels: ses tarafının yazdığı dizi (kişi sırasıyla, 0..100).
+    meters_fn: kişi sırasıyla (bar, peak_label) listesi döndürür; kişi
+    eklenip çıkarıldığında liste değişir ve durum sıfırlanır.
+    peak_label None olabilir.
+    """
+    def __init__(self, root, levels, meters_fn, fps=FPS):
+        self.root = root
+        self.levels = levels
+        self.meters_fn = meters_fn
+        self.interval = int(1000 / fps)
+        self.meters = []
+        self.last = time.monotonic()
+        self._resize(0)
+
+    def _resize(self, n):
+        self.shown = np.zeros(n, dtype=np.float32)
+        self.peak = np.zeros(n, dtype=np.float32)
+        self.peak_at = np.zeros(n, dtype=np.float64)
+        self.drawn = np.full(n, -1.0, dtype=np.float32)
+        self.drawn_peak = np.full(n, -1, dtype=np.int32)
+
+    def start(self):
+        self.root.after(self.interval, self.tick)
+
+    def tick(self):
+        try:
+            self.update()
+        except Exception as e:
+            print("[VU HATASI]:", e)
+        self.root.after(self.interval, self.tick)
+
+    def update(self):
+        now = time.monotonic()
+        dt = now - self.last
+        self.last = now
+
+        meters = self.meters_fn()
+        n = len(meters)
+        if meters != self.meters:
+            self.meters = list(meters)
+            self._resize(n)
+        if n == 0:
+            return
+
+        level = self.levels[:n]
+
+        # Hızlı yükselme, yavaş düşüş
+        np.maximum(level, self.shown - DECAY_PER_SEC * dt, out=self.shown)
+        np.clip(self.shown, 0, 100, out=self.shown)
+
+        # Peak-hold: yeni tepe tutulur, süre dolunca yavaşça iner
+        rising = level >= self.peak
+        self.peak_at[rising] = now
+        held = (now - self.peak_at) < PEAK_HOLD
+        falling = np.maximum(self.peak - PEAK_DECAY_PER_SEC * dt, self.shown)
+        self.peak = np.where(rising, level, np.where(held, self.peak, falling)).astype(np.float32)
+
+        # Yalnızca eşiği aşan değişiklikler widget'a gider
+        changed = np.abs(self.shown - self.drawn) >= THRESHOLD
+        changed |= (self.shown == 0) & (self.drawn != 0)
+        for i in np.flatnonzero(changed):
+            self.meters[i][0].configure(value=float(self.shown[i]))
+            self.drawn[i] = self.shown[i]
+
+        peaks = self.peak.astype(np.int32)
+        for i in np.flatnonzero(peaks != self.drawn_peak):
+            label = self.meters[i][1]
+            if label is not None:
+                label.configure(text=f"Peak {peaks[i]}")
+            self.drawn_peak[i] = peaks[i]
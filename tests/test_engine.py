@@ -0,0 +1,96 @@
+import threading
+import time
+
+import numpy as np
+
+from ebs_intercom_backend import SimBackend
+from ebs_intercom_engine import MAX_PEOPLE, ControlState, LoopProfile, MixBus, RoutingMatrix
+
+
+def start_blocking(n, buffers=40, levels=None):
+    """SimBackend (olabildiğince hızlı) üzerinde blocking bus'ı başlatır."""
+    backend = SimBackend(inputs=[f"sine:{200 + 10 * k}:0.3" for k in range(n)], outputs=n,
+                         realtime=False, capture_seconds=0)
+    routing = RoutingMatrix(n)
+    routing.load(np.ones((n, n), dtype=np.float32))
+    profile = LoopProfile(buffers + 64)
+    stop_event = threading.Event()
+    errors = []
+    bus = MixBus(backend, backend.input_ids, backend.output_ids, routing, ControlState(n),
+                 [None] * n, stop_event, chunk=256, profile=profile, levels=levels,
+                 on_error=lambda title, msg: errors.append((title, msg)))
+    bus.start()
+    return bus, backend, profile, stop_event, errors
+
+
+def wait_buffers(bus, profile, count, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while profile.count < count and bus.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def stop_blocking(bus, backend, stop_event):
+    stop_event.set()
+    bus.join()
+    backend.terminate()
+
+
+def run_blocking(n, buffers=40, levels=None, timeout=20.0):
+    """Bus'ı buffers kadar çalıştırır; (buffer sayısı, seviyeler, hatalar)."""
+    bus, backend, profile, stop_event, errors = start_blocking(n, buffers, levels)
+    wait_buffers(bus, profile, buffers, timeout)
+    # Son buffer'ın seviyeleri yazılmadan durdurulmasın
+    snapshot = bus.levels.copy()
+    stop_blocking(bus, backend, stop_event)
+    return profile.count, snapshot, errors
+
+
+def test_blocking_bus_more_inputs_than_max_people(capfd):
+    n = MAX_PEOPLE + 8
+    count, levels, errors = run_blocking(n)
+    assert count >= 40
+    assert not errors
+    assert "HATASI" not in capfd.readouterr().out
+    assert len(levels) >= n
+    assert (levels[:n] > 0).all()
+
+
+def test_blocking_bus_short_external_levels(capfd):
+    n = MAX_PEOPLE + 8
+    levels = np.zeros(MAX_PEOPLE, dtype=np.float32)
+    count, snapshot, errors = run_blocking(n, levels=levels)
+    assert count >= 40
+    assert not errors
+    assert "HATASI" not in capfd.readouterr().out
+    assert (snapshot > 0).all()
+
+
+def test_remove_person_clears_freed_levels(capfd):
+    bus, backend, profile, stop_event, errors = start_blocking(3, buffers=80)
+    try:
+        wait_buffers(bus, profile, 20)
+        assert (bus.levels[:3] > 0).all()
+        bus.remove_person(0)
+        wait_buffers(bus, profile, profile.count + 20)
+        snapshot = bus.levels.copy()
+    finally:
+        stop_blocking(bus, backend, stop_event)
+    assert not errors
+    assert "HATASI" not in capfd.readouterr().out
+    assert (snapshot[:2] > 0).all()
+    assert not snapshot[2:].any()
+
+
+def test_blocking_metering_off_audio_thread(capfd):
+    bus, backend, profile, stop_event, errors = start_blocking(3, buffers=80)
+    try:
+        wait_buffers(bus, profile, 60)
+    finally:
+        stop_blocking(bus, backend, stop_event)
+    assert not errors
+    assert "HATASI" not in capfd.readouterr().out
+    feed = bus.meter_feed
+    assert feed.read_count == feed.write_count >= 60
+    rows = bus.meter_snapshot()
+    assert len(rows) == 6   # 3 giriş + 3 dinleyen
+    assert all(row["rms_dbfs"] > -60.0 for row in rows)
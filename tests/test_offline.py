@@ -0,0 +1,38 @@
+import json
+import os
+
+from ebs_intercom_offline import OfflineRenderer, compare_golden
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "offline")
+GOLDEN = os.path.join(FIXTURE, "golden")
+
+
+def load_config():
+    """Fixture config'i; WAV yolları depo köküne göre yazılı, mutlak yapılır."""
+    with open(os.path.join(FIXTURE, "render.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    for person in config["people"]:
+        person["wav"] = os.path.join(ROOT, person["wav"])
+    return config
+
+
+def test_render_matches_golden(tmp_path):
+    renderer = OfflineRenderer(load_config())
+    assert not renderer.issues
+    report = renderer.render(str(tmp_path))
+    assert report["dosyalar"] == ["01_Reji.wav", "02_Konuk1.wav"]
+    rows = compare_golden(str(tmp_path), GOLDEN, report["dosyalar"])
+    assert [row["durum"] for row in rows] == ["OK", "OK"], rows
+
+
+def test_golden_detects_routing_change(tmp_path):
+    config = load_config()
+    # Konuk1'in PTT'si hiç basılmazsa Reji onu duymaz
+    for event in config["timeline"]:
+        event.pop("ptt", None)
+    report = OfflineRenderer(config).render(str(tmp_path))
+    rows = {row["dosya"]: row for row in compare_golden(str(tmp_path), GOLDEN, report["dosyalar"])}
+    assert rows["01_Reji.wav"]["durum"] == "FARKLI"
+    assert rows["01_Reji.wav"]["ilk_fark_sn"] is not None
+    assert rows["02_Konuk1.wav"]["durum"] == "OK"